@@ -0,0 +1,277 @@
+"""
+Autoscaler pool worker Celery berdasarkan kedalaman queue scraping, waktu tunggu
+lane dan RSS Chrome/chromedriver yang terukur, dengan batas memori keras.
+
+    celery -A app.worker worker -Q scraping_interactive,scraping,scraping_bulk --autoscale=12,2
+    celery -A app.worker worker -Q maintenance -c 1 -n maintenance@%h
+
+Dipasang lewat worker_autoscaler di app.celery_app dan hanya aktif jika worker
+dijalankan dengan --autoscale. Setiap keputusan di-log dan diekspor ke metrics
+worker; proses chromedriver yatim dari task yang crash ikut dihentikan.
+"""
+from time import monotonic, time
+from typing import Dict, List, Optional
+import logging
+import os
+import threading
+from celery.worker import state
+from celery.worker.autoscale import Autoscaler
+from .config import settings
+from .lanes import QUEUE_LANES, SCRAPING_QUEUES, get_lane_stats
+from .metrics import AUTOSCALE_DECISIONS, ORPHANS_REAPED, POOL_PROCESSES, WORKER_MEMORY_MB
+from .services.autoscale_policy import (
+    REASON_MEMORY_CAP,
+    REASON_MEMORY_CEILING,
+    desired_concurrency,
+    memory_capacity,
+)
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+def is_browser_process(name: str) -> bool:
+    """Chrome, chromedriver dan proses pendukungnya (crashpad, zygote)"""
+    return 'chrome' in (name or '').lower()
+
+def find_orphan_browsers(min_age_seconds: float) -> List:
+    """
+    Proses browser milik user ini yang induknya sudah mati. Induk yang sah adalah
+    proses pool (chromedriver) atau chromedriver (Chrome), jadi proses browser yang
+    di-reparent ke init atau ke proses utama worker (PID 1 di container) adalah yatim.
+    """
+    import psutil
+
+    parents = {1, os.getpid()}
+    uid = os.getuid()
+    now = time()
+    orphans = []
+    for proc in psutil.process_iter(['pid', 'ppid', 'name', 'create_time', 'uids']):
+        info = proc.info
+        if not is_browser_process(info['name']) or info['ppid'] not in parents:
+            continue
+        if info['uids'] is None or info['uids'].real != uid:
+            continue
+        if now - info['create_time'] < min_age_seconds:
+            continue
+        orphans.append(proc)
+    return orphans
+
+def reap_orphan_browsers(min_age_seconds: float = None) -> int:
+    """Hentikan proses browser yatim beserta turunannya; return jumlah proses yang dihentikan"""
+    import psutil
+
+    min_age_seconds = settings.autoscale_orphan_min_age_seconds if min_age_seconds is None else min_age_seconds
+    victims = []
+    for orphan in find_orphan_browsers(min_age_seconds):
+        try:
+            victims.extend(orphan.children(recursive=True))
+        except psutil.Error:
+            pass
+        victims.append(orphan)
+    if not victims:
+        return 0
+
+    for proc in victims:
+        try:
+            proc.terminate()
+        except psutil.Error:
+            pass
+    _, alive = psutil.wait_procs(victims, timeout=3)
+    for proc in alive:
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+
+    logger.warning(f"Reaped {len(victims)} orphaned browser processes: {sorted(proc.pid for proc in victims)}")
+    ORPHANS_REAPED.inc(len(victims))
+    return len(victims)
+
+class ScrapingAutoscaler(Autoscaler):
+    """
+    Pengganti Autoscaler bawaan Celery (yang hanya melihat jumlah task reserved).
+    Target dihitung oleh services.autoscale_policy.desired_concurrency; scale down karena
+    memori tidak menunggu keepalive.
+
+    Dengan prefork + broker Redis, maybe_scale dipanggil di event loop worker (setiap
+    keepalive dan setiap pesan task). Pengukuran Redis/psutil dan reaping dilakukan
+    thread sampler terpisah; _maybe_scale hanya membaca sinyal yang di-cache dan
+    dijadwalkan ulang di hub setiap autoscale_interval_seconds.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        import psutil
+
+        self._process = psutil.Process()
+        self._last_decision_at = 0.0
+        self._last_reap_at = 0.0
+        self._hub_registered = False
+        # Estimasi RSS satu slot aktif (proses pool + Chrome), diperhalus dengan EWMA
+        self._slot_mb = float(settings.autoscale_slot_memory_mb)
+        # Sinyal terakhir dari thread sampler: {'sampled_at', 'signals', 'memory'}
+        self._sample: Optional[Dict] = None
+        self._sampler_stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name='AutoscaleSampler', daemon=True)
+        self._sampler.start()
+        self.last_decision: Dict = {}
+
+    def consumed_queues(self) -> List[str]:
+        """Queue scraping yang di-consume worker ini (bukan semua lane)"""
+        try:
+            names = [queue.name for queue in self.worker.consumer.task_consumer.queues]
+        except AttributeError:
+            names = SCRAPING_QUEUES
+        return [name for name in names if name in QUEUE_LANES]
+
+    def measure_memory(self) -> Dict:
+        """RSS proses utama, setiap slot pool beserta turunannya, dan bagian Chrome/chromedriver"""
+        import psutil
+
+        main_mb = self._process.memory_info().rss / MB
+        total_mb = main_mb
+        chrome_mb = 0.0
+        busy_slots = []
+        for child in self._process.children():
+            try:
+                tree = [child] + child.children(recursive=True)
+            except psutil.Error:
+                continue
+            slot_mb = 0.0
+            browser_mb = 0.0
+            for proc in tree:
+                try:
+                    rss = proc.memory_info().rss / MB
+                    slot_mb += rss
+                    if is_browser_process(proc.name()):
+                        browser_mb += rss
+                except psutil.Error:
+                    continue
+            total_mb += slot_mb
+            chrome_mb += browser_mb
+            if browser_mb:
+                busy_slots.append(slot_mb)
+
+        if busy_slots:
+            measured = sum(busy_slots) / len(busy_slots)
+            self._slot_mb = 0.7 * self._slot_mb + 0.3 * measured
+
+        WORKER_MEMORY_MB.labels(kind='total').set(total_mb)
+        WORKER_MEMORY_MB.labels(kind='chrome').set(chrome_mb)
+        WORKER_MEMORY_MB.labels(kind='per_slot').set(self._slot_mb)
+        return {'main_mb': main_mb, 'total_mb': total_mb, 'chrome_mb': chrome_mb, 'slot_mb': self._slot_mb}
+
+    def queue_signals(self) -> Dict:
+        """Kedalaman dan p95 waktu tunggu dari lane yang di-consume worker ini"""
+        queues = set(self.consumed_queues())
+        depth = 0
+        wait_p95 = 0.0
+        for stats in get_lane_stats().values():
+            if stats['queue'] in queues:
+                depth += stats['depth']
+                wait_p95 = max(wait_p95, stats['wait_p95_seconds'])
+        return {'queue_depth': depth, 'wait_p95_seconds': wait_p95}
+
+    def refresh_signals(self):
+        """Satu putaran sampler: reap proses yatim lalu ukur queue dan memori (boleh blocking)"""
+        now = monotonic()
+        if now - self._last_reap_at >= settings.autoscale_reap_interval_seconds:
+            self._last_reap_at = now
+            try:
+                reap_orphan_browsers()
+            except Exception as e:
+                logger.warning(f"Error reaping orphaned browser processes: {str(e)}")
+
+        try:
+            signals = self.queue_signals()
+            memory = self.measure_memory()
+        except Exception as e:
+            logger.warning(f"Error measuring autoscaler signals: {str(e)}")
+            self._sample = None
+            return
+        self._sample = {'sampled_at': monotonic(), 'signals': signals, 'memory': memory}
+
+    def _sample_loop(self):
+        while not self._sampler_stopped.is_set():
+            self.refresh_signals()
+            self._sampler_stopped.wait(settings.autoscale_interval_seconds)
+
+    def stop(self):
+        self._sampler_stopped.set()
+        super().stop()
+
+    def _register_with_hub(self):
+        """
+        Bootstep Celery hanya memanggil maybe_scale setiap keepalive (30 detik), jadi
+        jadwalkan sendiri di hub dengan interval autoscaler. Tanpa event loop (worker
+        tanpa hub), thread Autoscaler bawaan sudah memanggil maybe_scale setiap detik.
+        """
+        if self._hub_registered:
+            return
+        self._hub_registered = True
+        hub = getattr(self.worker, 'hub', None)
+        if hub is not None:
+            hub.call_repeatedly(settings.autoscale_interval_seconds, self.maybe_scale)
+
+    def _maybe_scale(self, req=None):
+        self._register_with_hub()
+        now = monotonic()
+        if now - self._last_decision_at < settings.autoscale_interval_seconds:
+            return False
+        self._last_decision_at = now
+
+        sample = self._sample
+        if sample is None or now - sample['sampled_at'] > 3 * settings.autoscale_interval_seconds:
+            # Redis/psutil gagal atau sampler tertinggal: pakai perilaku bawaan Celery
+            logger.warning("Autoscaler signals unavailable, using default scaling")
+            return super()._maybe_scale(req)
+        signals = sample['signals']
+        memory = sample['memory']
+
+        procs = self.processes
+        busy = len(state.active_requests)
+        target, reason = desired_concurrency(
+            current=procs,
+            min_concurrency=self.min_concurrency,
+            max_concurrency=self.max_concurrency,
+            busy=busy,
+            queue_depth=signals['queue_depth'],
+            wait_p95_seconds=signals['wait_p95_seconds'],
+            memory_cap=memory_capacity(memory['main_mb'], memory['slot_mb']),
+            total_rss_mb=memory['total_mb']
+        )
+        POOL_PROCESSES.labels(kind='current').set(procs)
+        POOL_PROCESSES.labels(kind='target').set(target)
+
+        direction = 'steady'
+        if target > procs:
+            self.scale_up(target - procs)
+            direction = 'up'
+        elif target < procs:
+            memory_pressure = reason in (REASON_MEMORY_CAP, REASON_MEMORY_CEILING)
+            within_keepalive = self._last_scale_up and now - self._last_scale_up <= self.keepalive
+            if memory_pressure or not within_keepalive:
+                self._shrink(procs - target)
+                direction = 'down'
+            else:
+                direction = 'hold'
+
+        self.last_decision = {
+            'direction': direction,
+            'reason': reason,
+            'processes': procs,
+            'target': target,
+            'busy': busy,
+            **signals,
+            **{key: round(value, 1) for key, value in memory.items()},
+        }
+        if direction != 'steady':
+            AUTOSCALE_DECISIONS.labels(direction=direction, reason=reason).inc()
+            logger.info(f"Autoscale {direction}: {self.last_decision}")
+        return direction in ('up', 'down')
+
+    def info(self):
+        info = super().info()
+        info['last_decision'] = self.last_decision
+        return info
@@ -1,12 +1,29 @@
 from celery import Celery
+from celery.signals import setup_logging, worker_init, worker_process_init, worker_process_shutdown
 import redis
 import logging
 import os
+from .config import settings
+from .logging_config import configure_logging, stop_logging
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging (pipeline async JSON, lihat app.logging_config)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# Handler ini mencegah Celery memasang handler logging-nya sendiri di root logger
+@setup_logging.connect
+def setup_worker_logging(**kwargs):
+    configure_logging()
+
+# Thread listener tidak ikut ter-fork ke proses pool prefork
+@worker_process_init.connect
+def setup_pool_process_logging(**kwargs):
+    configure_logging()
+
+@worker_process_shutdown.connect
+def flush_pool_process_logging(**kwargs):
+    stop_logging()
+
 # Redis configuration
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
@@ -21,9 +38,11 @@ def test_redis_connection():
         logger.error(f"Redis connection failed: {str(e)}")
         return False
 
-# Test connection on startup
-if not test_redis_connection():
-    logger.warning("Redis connection failed during startup. Make sure Redis server is running.")
+# Test connection saat worker start (bukan saat import, agar API tidak memblokir di network)
+@worker_init.connect
+def check_redis_on_worker_init(**kwargs):
+    if not test_redis_connection():
+        logger.warning("Redis connection failed during startup. Make sure Redis server is running.")
 
 # Create Celery app
 app = Celery(
@@ -36,24 +55,32 @@ app = Celery(
 # Celery configuration
 app.conf.update(
     # Task settings
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    task_serializer=settings.celery_serializer,
+    # Terima keduanya agar worker lama/baru bisa berjalan bersama saat serializer diganti
+    accept_content=['json', 'msgpack'],
+    result_serializer=settings.celery_serializer,
+    result_accept_content=['json', 'msgpack'],
     timezone='Asia/Jakarta',
     enable_utc=True,
     
-    # Task routing
+    # Task routing; queue maintenance dikonsumsi worker tersendiri (lihat app.worker)
     task_routes={
         'app.tasks.scrape_kemenag': {'queue': 'scraping'},
+        'app.tasks.schedule_rescrapes': {'queue': 'maintenance'},
+        'app.tasks.probe_upstream': {'queue': 'maintenance'},
+        'app.tasks.check_circuit_breaker': {'queue': 'maintenance'},
+        'app.tasks.replay_dead_letters': {'queue': 'maintenance'},
     },
     
     # Worker settings
     worker_prefetch_multiplier=1,
+    # Dipakai jika worker dijalankan dengan --autoscale=max,min (lihat app.autoscale)
+    worker_autoscaler='app.autoscale:ScrapingAutoscaler',
     task_acks_late=True,
     worker_disable_rate_limits=False,
     
     # Result backend settings
-    result_expires=3600,  # 1 hour
+    result_expires=settings.result_expires_seconds,
     result_persistent=True,
     
     # Task execution settings
@@ -69,9 +96,26 @@ app.conf.update(
     # Connection settings
     broker_connection_retry_on_startup=True,
     broker_connection_retry=True,
+    
+    # Priority lanes: worker yang consume beberapa lane memakai weighted round-robin
+    broker_transport_options={
+        'queue_order_strategy': 'app.lanes:WeightedLaneCycle',
+    },
 )
 
-# Optional: Beat schedule for periodic tasks (if needed later)
-app.conf.beat_schedule = {}
+# Beat schedule for periodic tasks
+app.conf.beat_schedule = {
+    'schedule-rescrapes': {
+        'task': 'app.tasks.schedule_rescrapes',
+        'schedule': settings.rescrape_tick_seconds,
+        # Tick yang terlambat tidak berguna, tick berikutnya akan menggantikan
+        'options': {'expires': settings.rescrape_tick_seconds},
+    },
+    'check-circuit-breaker': {
+        'task': 'app.tasks.check_circuit_breaker',
+        'schedule': settings.breaker_watchdog_seconds,
+        'options': {'expires': settings.breaker_watchdog_seconds},
+    },
+}
 
 logger.info("Celery app configured successfully")
\ No newline at end of file
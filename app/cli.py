@@ -0,0 +1,364 @@
+"""
+Runner bulk tanpa Celery/Redis untuk backfill sekali jalan.
+
+    python -m app.cli scrape porsi.txt --workers 4 --output hasil.ndjson
+    cut -d, -f1 export.csv | python -m app.cli scrape - --profile data_only --db
+    python -m app.cli scrape export.csv --column no_porsi --rate 1.5 --retry-failed
+
+Nomor porsi dibaca per baris secara streaming (atau satu kolom CSV dengan --column)
+dan dijalankan di process pool; setiap proses memakai satu KemenagScraper dengan
+Chrome yang dipakai ulang. Hasil ditulis sebagai NDJSON (satu baris per nomor) dan
+file output sekaligus menjadi checkpoint: menjalankan ulang perintah yang sama
+melewati nomor yang sudah ada di output. Progress, throughput dan ETA ditulis ke stderr.
+
+Triage dan replay dead-letter queue (butuh database dan broker Celery):
+
+    python -m app.cli dlq summary
+    python -m app.cli dlq list --class upstream_unavailable --limit 20
+    python -m app.cli dlq replay --class upstream_unavailable --limit 500 --rate 2 --dry-run
+"""
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, TextIO
+import argparse
+import csv
+import json
+import logging
+import os
+import signal
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# State per proses worker (diisi _init_worker)
+_scraper = None
+_profile = None
+_max_attempts = None
+
+def _init_worker(profile: Dict, max_attempts: Optional[int], rate_per_process: float, shared_rate_limit: bool):
+    """Initializer process pool: satu scraper dengan Chrome yang dipakai ulang per proses"""
+    from multiprocessing.util import Finalize
+    from .profiles import resolve_profile
+    from .services.rate_limiter import LocalRateLimiter
+    from .services.selenium_scraper import KemenagScraper
+
+    global _scraper, _profile, _max_attempts
+    # Ctrl+C ditangani proses utama; scrape yang sedang berjalan dibiarkan selesai
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _profile = resolve_profile(profile)
+    _max_attempts = max_attempts
+    _scraper = KemenagScraper(reuse_driver=True)
+    if not shared_rate_limit:
+        _scraper.rate_limiter = LocalRateLimiter(rate_per_process)
+    # Dijalankan saat proses worker keluar (atexit tidak dipanggil di child multiprocessing)
+    Finalize(_scraper, _scraper.close, exitpriority=10)
+
+def _scrape_one(no_porsi: str) -> Dict:
+    started = time.monotonic()
+    success, filename, scraped_data, error_message, attempts_used = _scraper.scrape(
+        no_porsi, max_attempts=_max_attempts, profile=_profile
+    )
+    return {
+        "no_porsi": no_porsi,
+        "success": success,
+        "scraped_data": scraped_data,
+        "screenshot_filename": filename,
+        "error": error_message,
+        "failure_class": _scraper.last_failure_class,
+        "attempts_used": attempts_used,
+        "elapsed_seconds": round(time.monotonic() - started, 2),
+        "scraped_at": datetime.utcnow().isoformat(),
+        "pid": os.getpid(),
+    }
+
+def read_checkpoint(path: str, retry_failed: bool) -> Set[str]:
+    """Nomor porsi yang sudah selesai menurut file output (hasil terakhir per nomor yang berlaku)"""
+    done: Dict[str, bool] = {}
+    if not os.path.exists(path):
+        return set()
+    with open(path) as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # Baris terakhir bisa terpotong jika run sebelumnya dimatikan saat menulis
+                continue
+            done[result["no_porsi"]] = result.get("success", False)
+    return {no_porsi for no_porsi, success in done.items() if success or not retry_failed}
+
+def iter_porsi(source: TextIO, column: Optional[str]) -> Iterator[str]:
+    """Nomor porsi dari input: satu per baris (kolom pertama) atau kolom CSV bernama"""
+    if column:
+        for row in csv.DictReader(source):
+            value = (row.get(column) or "").strip()
+            if value:
+                yield value
+        return
+    for line in source:
+        value = line.split(",", 1)[0].strip()
+        if value and not value.startswith("#"):
+            yield value
+
+def count_lines(path: str) -> Optional[int]:
+    if path == "-":
+        return None
+    with open(path, "rb") as file:
+        return sum(1 for _ in file)
+
+class ProgressMeter:
+    """Throughput dari window geser dan ETA, ditulis ke stderr maksimal sekali per interval"""
+
+    def __init__(self, total: Optional[int], skipped: int, window_seconds: float = 120.0, interval: float = 2.0):
+        self.total = total
+        self.skipped = skipped
+        self.window_seconds = window_seconds
+        self.interval = interval
+        self.started = time.monotonic()
+        self.completions = deque()
+        self.done = 0
+        self.succeeded = 0
+        self.failed = 0
+        self._last_print = 0.0
+
+    def record(self, success: bool):
+        now = time.monotonic()
+        self.done += 1
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.completions.append(now)
+        while self.completions and now - self.completions[0] > self.window_seconds:
+            self.completions.popleft()
+        if now - self._last_print >= self.interval:
+            self._last_print = now
+            self.print()
+
+    def rate_per_minute(self) -> float:
+        elapsed = min(self.window_seconds, time.monotonic() - self.started)
+        return len(self.completions) / elapsed * 60 if elapsed > 0 else 0.0
+
+    def summary(self) -> Dict:
+        rate = self.rate_per_minute()
+        remaining = self.total - self.skipped - self.done if self.total is not None else None
+        return {
+            "done": self.done,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "rate_per_minute": round(rate, 1),
+            "remaining": remaining,
+            "eta_seconds": round(remaining / rate * 60) if remaining is not None and rate > 0 else None,
+            "elapsed_seconds": round(time.monotonic() - self.started, 1),
+        }
+
+    def print(self, final: bool = False):
+        stats = self.summary()
+        total = f"/{self.total - self.skipped}" if self.total is not None else ""
+        eta = f" ETA {format_duration(stats['eta_seconds'])}" if stats["eta_seconds"] is not None else ""
+        sys.stderr.write(
+            f"\r[{stats['done']}{total}] ok {stats['succeeded']} fail {stats['failed']} "
+            f"{stats['rate_per_minute']:.1f}/min{eta}   "
+        )
+        if final:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+
+def format_duration(seconds: float) -> str:
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+class TransactionWriter:
+    """Buffer hasil sukses dan upsert ke tabel transaction per batch"""
+
+    def __init__(self, batch_size: int):
+        from .database import get_db_session
+
+        self.db = get_db_session()
+        self.batch_size = batch_size
+        self.buffer: List[Dict] = []
+        self.inserted = 0
+        self.updated = 0
+
+    def add(self, scraped_data: Dict):
+        self.buffer.append(scraped_data)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        from .crud import upsert_transactions
+
+        if not self.buffer:
+            return
+        inserted, updated = upsert_transactions(self.db, self.buffer)
+        self.inserted += inserted
+        self.updated += updated
+        self.buffer = []
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.db.close()
+
+def run_scrape(args: argparse.Namespace) -> Dict:
+    from .profiles import resolve_profile
+
+    profile = resolve_profile(args.profile)
+    done = read_checkpoint(args.output, args.retry_failed) if args.output != "-" else set()
+    total = args.total if args.total is not None else count_lines(args.input)
+    if total is not None and args.column:
+        total -= 1  # header CSV
+    meter = ProgressMeter(total, skipped=0)
+    if args.db and not profile.persist_transaction:
+        sys.stderr.write(f"Profile '{profile.name}' does not persist transactions, --db ignored\n")
+    writer = TransactionWriter(args.db_batch_size) if args.db and profile.persist_transaction else None
+    output = sys.stdout if args.output == "-" else open(args.output, "a")
+    source = sys.stdin if args.input == "-" else open(args.input, newline="")
+    rate_per_process = args.rate / args.workers if args.rate > 0 else 0.0
+
+    # Batasi nomor yang sedang diproses agar input besar tetap di-stream
+    max_in_flight = args.workers * 2
+    in_flight: List[Future] = []
+    seen: Set[str] = set()
+
+    def drain(block_until: int):
+        while len(in_flight) > block_until:
+            result = in_flight.pop(0).result()
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            if output is not sys.stdout:
+                os.fsync(output.fileno())
+            if writer and result["success"] and result["scraped_data"]:
+                writer.add(result["scraped_data"])
+            meter.record(result["success"])
+
+    pool = ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(profile.model_dump(), args.max_attempts, rate_per_process, args.shared_rate_limit)
+    )
+    interrupted = False
+    try:
+        for no_porsi in iter_porsi(source, args.column):
+            if no_porsi in seen or no_porsi in done:
+                meter.skipped += 1
+                continue
+            seen.add(no_porsi)
+            in_flight.append(pool.submit(_scrape_one, no_porsi))
+            drain(max_in_flight - 1)
+        drain(0)
+    except KeyboardInterrupt:
+        # Chrome ikut menerima SIGINT, jadi hasil yang sedang berjalan tidak ditulis
+        # dan akan diproses ulang saat resume
+        interrupted = True
+        sys.stderr.write(f"\nInterrupted, {len(in_flight)} in-flight lookups will run again on resume\n")
+    finally:
+        pool.shutdown(wait=not interrupted, cancel_futures=True)
+        if writer:
+            writer.close()
+        if output is not sys.stdout:
+            output.close()
+        if source is not sys.stdin:
+            source.close()
+        meter.print(final=True)
+
+    summary = meter.summary()
+    summary["interrupted"] = interrupted
+    summary["profile"] = profile.name
+    if writer:
+        summary["transactions_inserted"] = writer.inserted
+        summary["transactions_updated"] = writer.updated
+    return summary
+
+def run_dlq(args: argparse.Namespace) -> int:
+    """Subcommand dlq: summary, list (NDJSON ke stdout) dan replay bertahap di proses ini"""
+    from .crud import get_dead_letter_summary, get_dead_letters, release_dead_letters
+    from .database import get_db_session
+
+    db = get_db_session()
+    try:
+        if args.action == "summary":
+            for row in get_dead_letter_summary(db):
+                print(json.dumps(row))
+            return 0
+
+        if args.action == "list" or args.dry_run:
+            state = args.state if args.action == "list" else "dead"
+            entries, has_more = get_dead_letters(db, failure_class=args.failure_class, state=state, limit=args.limit, ids=args.ids)
+            for entry in entries:
+                print(json.dumps(entry.to_dict(), ensure_ascii=False))
+            if has_more:
+                sys.stderr.write(f"More than {args.limit} entries, raise --limit to see the rest\n")
+            return 0
+
+        from .dead_letters import claim_for_replay, replay_entries
+
+        entries = claim_for_replay(db, failure_class=args.failure_class, ids=args.ids, limit=args.limit)
+        if not entries:
+            sys.stderr.write("No dead letters to replay\n")
+            return 0
+        meter = ProgressMeter(len(entries), skipped=0)
+        handled: Set[int] = set()
+
+        def on_entry(entry, sent: bool):
+            handled.add(entry.id)
+            meter.record(sent)
+
+        try:
+            stats = replay_entries(db, entries, rate=args.rate, lane=args.lane, on_entry=on_entry)
+        except KeyboardInterrupt:
+            db.rollback()
+            released = release_dead_letters(db, [entry.id for entry in entries if entry.id not in handled])
+            meter.print(final=True)
+            sys.stderr.write(f"Interrupted, {released} unsent entries returned to the dead-letter queue\n")
+            return 130
+        meter.print(final=True)
+        print(json.dumps(stats), file=sys.stderr)
+        return 0
+    finally:
+        db.close()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Runner scraping tanpa Celery")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scrape = commands.add_parser("scrape", help="Scrape daftar nomor porsi dari file atau stdin")
+    scrape.add_argument("input", nargs="?", default="-", help="File berisi nomor porsi, '-' untuk stdin")
+    scrape.add_argument("--column", help="Nama kolom no_porsi jika input berupa CSV dengan header")
+    scrape.add_argument("--output", "-o", default="scrape_results.ndjson", help="File NDJSON (juga checkpoint), '-' untuk stdout")
+    scrape.add_argument("--workers", "-w", type=int, default=2, help="Jumlah proses (masing-masing satu Chrome)")
+    scrape.add_argument("--profile", default="full", help="Preset scrape profile (lihat GET /profiles)")
+    scrape.add_argument("--max-attempts", type=int, help="Percobaan captcha per nomor")
+    scrape.add_argument("--rate", type=float, default=1.0, help="Batas request/detik ke upstream untuk seluruh run (0 = tanpa batas)")
+    scrape.add_argument("--shared-rate-limit", action="store_true", help="Pakai rate limiter Redis bersama worker Celery")
+    scrape.add_argument("--retry-failed", action="store_true", help="Saat resume, ulangi nomor yang sebelumnya gagal")
+    scrape.add_argument("--total", type=int, help="Jumlah nomor untuk ETA saat membaca dari stdin")
+    scrape.add_argument("--db", action="store_true", help="Upsert hasil sukses ke tabel transaction")
+    scrape.add_argument("--db-batch-size", type=int, default=200)
+
+    dlq = commands.add_parser("dlq", help="Triage dan replay dead-letter queue")
+    dlq.add_argument("action", choices=["summary", "list", "replay"])
+    dlq.add_argument("--class", dest="failure_class", help="Filter failure_class (mis. upstream_unavailable, captcha_exhausted)")
+    dlq.add_argument("--id", dest="ids", type=int, action="append", help="Id entry tertentu (boleh berulang)")
+    dlq.add_argument("--state", default="dead", choices=["dead", "replaying", "resolved"], help="State untuk list")
+    dlq.add_argument("--limit", type=int, default=100)
+    dlq.add_argument("--rate", type=float, help="Task per detik yang dikirim ulang (default settings.dlq_replay_rate)")
+    dlq.add_argument("--lane", default="bulk", choices=["interactive", "normal", "bulk"], help="Lane tujuan replay")
+    dlq.add_argument("--dry-run", action="store_true", help="Tampilkan entry yang akan di-replay tanpa mengirim")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    if args.command == "scrape":
+        summary = run_scrape(args)
+        print(json.dumps(summary), file=sys.stderr)
+        if summary["interrupted"]:
+            sys.exit(130)
+    elif args.command == "dlq":
+        sys.exit(run_dlq(args))
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,34 @@
+from sqlalchemy import and_, func, literal, or_, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import Optional
-from .models import ScrapeRecord, Transaction
+from datetime import datetime, timedelta
+from typing import Dict, Optional, List, Tuple
+from .database import has_read_replica
+from .models import ScrapeRecord, Transaction, PorsiSchedule, ScrapeSnapshot, PorsiLatest, PorsiRollup, DeadLetter
+from .metrics import DEAD_LETTERS, timed_db_write
+from .services.extraction import EXTRACTOR_VERSION, compress_html
+from .services.recent_writes import get_recent_writes
+from .services.field_parser import PARSER_VERSION, PARSED_FIELDS, normalize_name, normalize_region
+from .services.rescrape_scheduler import (
+    content_hash,
+    update_change_rate,
+    compute_next_due,
+    compute_priority
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+def record_read_keys(record: ScrapeRecord) -> List[str]:
+    """Key penanda read-your-writes untuk endpoint /records/* (lihat main.get_read_db)"""
+    return [f"id:{record.id}", f"task:{record.task_id}", f"porsi:{record.no_porsi}"]
+
+def mark_record_written(record: Optional[ScrapeRecord]):
+    """Arahkan baca record ini ke primary sementara replica mungkin belum menyusul"""
+    if record is not None and has_read_replica():
+        get_recent_writes().mark(record_read_keys(record))
+
+@timed_db_write('create_scrape_record')
 def create_scrape_record(db: Session, task_id: str, no_porsi: str) -> ScrapeRecord:
     """Create new scrape record with PENDING status"""
     record = ScrapeRecord(
@@ -16,6 +39,7 @@ def create_scrape_record(db: Session, task_id: str, no_porsi: str) -> ScrapeReco
     db.add(record)
     db.commit()
     db.refresh(record)
+    mark_record_written(record)
     logger.info(f"Created scrape record for task_id: {task_id}, no_porsi: {no_porsi}")
     return record
 
@@ -45,6 +69,7 @@ def get_records_by_no_porsi(db: Session, no_porsi: str, limit: int = 10):
         logger.error(f"Error getting records by no_porsi {no_porsi}: {str(e)}")
         return []
 
+@timed_db_write('update_record_started')
 def update_record_started(db: Session, task_id: str) -> Optional[ScrapeRecord]:
     """Update record status to indicate processing started"""
     try:
@@ -54,21 +79,24 @@ def update_record_started(db: Session, task_id: str) -> Optional[ScrapeRecord]:
             record.updated_at = datetime.utcnow()
             db.commit()
             db.refresh(record)
+            mark_record_written(record)
         return record
     except Exception as e:
         logger.error(f"Error updating record started for task_id {task_id}: {str(e)}")
         db.rollback()
         return None
 
+@timed_db_write('update_record_success')
 def update_record_success(
     db: Session, 
     task_id: str, 
     scraped_data: dict,
     screenshot_filename: str = None,
     screenshot_url: str = None,
-    attempts_used: int = 0
+    attempts_used: int = 0,
+    parsed: Optional[dict] = None
 ) -> Optional[ScrapeRecord]:
-    """Update record with successful scraping results"""
+    """Update record with successful scraping results (dan kolom bertipe jika parsed diberikan)"""
     try:
         record = db.query(ScrapeRecord).filter(ScrapeRecord.task_id == task_id).first()
         if record:
@@ -78,6 +106,7 @@ def update_record_success(
             record.attempts_used = attempts_used
             record.screenshot_filename = screenshot_filename
             record.screenshot_url = screenshot_url
+            record.failure_class = None
             
             # Update scraped data fields
             record.nama = scraped_data.get('nama')
@@ -88,8 +117,14 @@ def update_record_success(
             record.estimasi_keberangkatan = scraped_data.get('estimasi_keberangkatan')
             record.waktu_permintaan_informasi = scraped_data.get('waktu_permintaan_informasi')
             
+            if parsed is not None:
+                for field in PARSED_FIELDS:
+                    setattr(record, field, parsed.get(field))
+                record.parser_version = PARSER_VERSION
+            
             db.commit()
             db.refresh(record)
+            mark_record_written(record)
             logger.info(f"Updated record success for task_id: {task_id}")
         return record
     except Exception as e:
@@ -97,13 +132,15 @@ def update_record_success(
         db.rollback()
         return None
 
+@timed_db_write('update_record_failure')
 def update_record_failure(
     db: Session, 
     task_id: str, 
     error_message: str,
-    attempts_used: int = 0
+    attempts_used: int = 0,
+    failure_class: Optional[str] = None
 ) -> Optional[ScrapeRecord]:
-    """Update record with failure status and error message"""
+    """Update record with failure status, error message dan klasifikasi kegagalan"""
     try:
         record = db.query(ScrapeRecord).filter(ScrapeRecord.task_id == task_id).first()
         if record:
@@ -112,9 +149,11 @@ def update_record_failure(
             record.updated_at = datetime.utcnow()
             record.attempts_used = attempts_used
             record.error_message = error_message
+            record.failure_class = failure_class
             
             db.commit()
             db.refresh(record)
+            mark_record_written(record)
             logger.info(f"Updated record failure for task_id: {task_id}")
         return record
     except Exception as e:
@@ -122,6 +161,24 @@ def update_record_failure(
         db.rollback()
         return None
 
+@timed_db_write('save_snapshot')
+def save_snapshot(db: Session, record_id, html: str) -> Optional[ScrapeSnapshot]:
+    """Simpan HTML panel hasil (zlib) untuk record yang berhasil"""
+    try:
+        snapshot = ScrapeSnapshot(
+            record_id=record_id,
+            html_zlib=compress_html(html),
+            extractor_version=EXTRACTOR_VERSION
+        )
+        db.add(snapshot)
+        db.commit()
+        return snapshot
+    except Exception as e:
+        logger.error(f"Error saving snapshot for record_id {record_id}: {str(e)}")
+        db.rollback()
+        return None
+
+@timed_db_write('create_transaction')
 def create_transaction(db: Session, scraped_data: dict):
     """Insert hasil scraping ke tabel transaction"""
     try:
@@ -142,4 +199,476 @@ def create_transaction(db: Session, scraped_data: dict):
     except Exception as e:
         logger.error(f"Error creating transaction: {str(e)}")
         db.rollback()
-        return None
\ No newline at end of file
+        return None
+
+TRANSACTION_FIELDS = (
+    'nama',
+    'kabupaten',
+    'provinsi',
+    'kuota_provinsi_kab_kota_khusus',
+    'status_bayar',
+    'estimasi_keberangkatan',
+    'waktu_permintaan_informasi',
+)
+
+@timed_db_write('upsert_transactions')
+def upsert_transactions(db: Session, scraped_rows: List[dict]) -> Tuple[int, int]:
+    """
+    Bulk upsert hasil scraping ke tabel transaction berdasarkan no_porsi: baris terbaru
+    per porsi diperbarui, porsi yang belum ada di-insert. Field yang tidak di-scrape (None)
+    tidak menimpa nilai lama. Return (inserted, updated).
+    """
+    latest_rows = {row['no_porsi']: row for row in scraped_rows if row.get('no_porsi')}
+    if not latest_rows:
+        return 0, 0
+    try:
+        existing = {}
+        for transaction_id, no_porsi in db.query(Transaction.id, Transaction.no_porsi).filter(
+            Transaction.no_porsi.in_(list(latest_rows))
+        ).order_by(Transaction.created_at.asc()):
+            existing[no_porsi] = transaction_id  # created_at terbaru menang
+        
+        now = datetime.utcnow()
+        inserts, updates = [], []
+        for no_porsi, row in latest_rows.items():
+            mapping = {field: row.get(field) for field in TRANSACTION_FIELDS}
+            mapping['updated_at'] = now
+            if no_porsi in existing:
+                changed = {field: value for field, value in mapping.items() if value is not None}
+                updates.append({'id': existing[no_porsi], **changed})
+            else:
+                inserts.append({'no_porsi': no_porsi, 'created_at': now, **mapping})
+        db.bulk_insert_mappings(Transaction, inserts)
+        db.bulk_update_mappings(Transaction, updates)
+        db.commit()
+        return len(inserts), len(updates)
+    except Exception as e:
+        logger.error(f"Error upserting {len(latest_rows)} transactions: {str(e)}")
+        db.rollback()
+        raise
+
+@timed_db_write('register_porsi')
+def register_porsi(db: Session, no_porsi_list: List[str]) -> int:
+    """Daftarkan no_porsi ke scheduler re-scrape, return jumlah porsi baru"""
+    try:
+        unique_items = list(dict.fromkeys(no_porsi_list))
+        now = datetime.utcnow()
+        registered = 0
+        # Proses per chunk agar klausa IN tetap kecil
+        for start in range(0, len(unique_items), 1000):
+            chunk = unique_items[start:start + 1000]
+            existing = {
+                row.no_porsi for row in db.query(PorsiSchedule.no_porsi).filter(
+                    PorsiSchedule.no_porsi.in_(chunk)
+                ).all()
+            }
+            for no_porsi in chunk:
+                if no_porsi not in existing:
+                    db.add(PorsiSchedule(no_porsi=no_porsi, next_due_at=now))
+                    registered += 1
+            db.commit()
+        logger.info(f"Registered {registered} new porsi for re-scrape scheduling")
+        return registered
+    except Exception as e:
+        logger.error(f"Error registering porsi: {str(e)}")
+        db.rollback()
+        return 0
+
+@timed_db_write('record_porsi_scraped')
+def record_porsi_scraped(db: Session, no_porsi: str, scraped_data: dict) -> Optional[PorsiSchedule]:
+    """Update freshness dan change rate porsi setelah scraping berhasil"""
+    try:
+        schedule = db.query(PorsiSchedule).filter(PorsiSchedule.no_porsi == no_porsi).first()
+        if not schedule:
+            schedule = PorsiSchedule(no_porsi=no_porsi, scrape_count=0, change_count=0, change_rate=1.0)
+            db.add(schedule)
+        
+        now = datetime.utcnow()
+        new_hash = content_hash(scraped_data)
+        # Scrape pertama tidak dihitung sebagai perubahan
+        changed = schedule.content_hash is not None and schedule.content_hash != new_hash
+        
+        if schedule.content_hash is not None:
+            schedule.change_rate = update_change_rate(schedule.change_rate, changed)
+        if changed:
+            schedule.change_count += 1
+            schedule.last_changed_at = now
+        
+        schedule.content_hash = new_hash
+        schedule.scrape_count += 1
+        schedule.last_success_at = now
+        schedule.next_due_at = compute_next_due(now, schedule.change_rate)
+        
+        db.commit()
+        db.refresh(schedule)
+        return schedule
+    except Exception as e:
+        logger.error(f"Error updating porsi schedule for no_porsi {no_porsi}: {str(e)}")
+        db.rollback()
+        return None
+
+def get_due_porsi(db: Session, now: datetime, limit: int) -> List[PorsiSchedule]:
+    """Ambil porsi yang sudah jatuh tempo, diurutkan berdasarkan prioritas"""
+    try:
+        # Ambil kandidat lewat index next_due_at, lalu urutkan berdasarkan prioritas
+        candidates = db.query(PorsiSchedule).filter(
+            PorsiSchedule.next_due_at <= now
+        ).order_by(PorsiSchedule.next_due_at.asc()).limit(limit * 4).all()
+        candidates.sort(
+            key=lambda s: compute_priority(s.last_success_at, s.change_rate, now),
+            reverse=True
+        )
+        return candidates[:limit]
+    except Exception as e:
+        logger.error(f"Error getting due porsi: {str(e)}")
+        return []
+
+@timed_db_write('mark_porsi_enqueued')
+def mark_porsi_enqueued(db: Session, schedules: List[PorsiSchedule], now: datetime, inflight_until: datetime):
+    """Tandai porsi sedang diproses agar tidak di-enqueue dua kali"""
+    try:
+        for schedule in schedules:
+            schedule.last_enqueued_at = now
+            schedule.next_due_at = inflight_until
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error marking porsi enqueued: {str(e)}")
+        db.rollback()
+
+ROLLUP_DIMENSIONS = ('provinsi', 'kabupaten', 'departure_year', 'payment_status')
+
+def rollup_key(latest: PorsiLatest) -> Tuple[str, str, int, str]:
+    """Key bucket porsi_rollup; nilai kosong memakai ''/0"""
+    return (
+        latest.provinsi or '',
+        latest.kabupaten or '',
+        latest.departure_year or 0,
+        latest.payment_status or '',
+    )
+
+def _adjust_rollup(db: Session, key: Tuple[str, str, int, str], delta: int):
+    """Tambah/kurangi porsi_count satu bucket secara atomik (UPDATE count = count + delta)"""
+    provinsi, kabupaten, departure_year, payment_status = key
+    bucket = db.query(PorsiRollup).filter(
+        PorsiRollup.provinsi == provinsi,
+        PorsiRollup.kabupaten == kabupaten,
+        PorsiRollup.departure_year == departure_year,
+        PorsiRollup.payment_status == payment_status
+    )
+    values = {PorsiRollup.porsi_count: PorsiRollup.porsi_count + delta, PorsiRollup.updated_at: datetime.utcnow()}
+    if bucket.update(values, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():
+            db.add(PorsiRollup(
+                provinsi=provinsi,
+                kabupaten=kabupaten,
+                departure_year=departure_year,
+                payment_status=payment_status,
+                porsi_count=delta
+            ))
+    except IntegrityError:
+        # Worker lain baru saja membuat bucket yang sama
+        bucket.update(values, synchronize_session=False)
+
+@timed_db_write('update_porsi_rollup')
+def update_porsi_rollup(db: Session, no_porsi: str, record_id, scraped_data: dict, parsed: dict) -> Optional[PorsiLatest]:
+    """
+    Update porsi_latest dengan hasil scraping terbaru lalu pindahkan porsi ke bucket
+    porsi_rollup yang baru (kurangi bucket lama, tambah bucket baru) dalam satu transaksi.
+    Field yang tidak di-scrape (None) mempertahankan nilai sebelumnya.
+    """
+    try:
+        now = datetime.utcnow()
+        latest = db.query(PorsiLatest).filter(PorsiLatest.no_porsi == no_porsi).with_for_update().first()
+        old_key = rollup_key(latest) if latest else None
+        if not latest:
+            latest = PorsiLatest(no_porsi=no_porsi)
+            db.add(latest)
+        elif latest.requested_at and parsed.get('requested_at') and parsed['requested_at'] < latest.requested_at:
+            # Hasil yang lebih lama selesai belakangan (mis. retry), jangan timpa data yang lebih baru
+            db.rollback()
+            return latest
+        
+        values = {
+            'nama': normalize_name(scraped_data.get('nama')),
+            'provinsi': normalize_region(scraped_data.get('provinsi')),
+            'kabupaten': normalize_region(scraped_data.get('kabupaten')),
+        }
+        values.update({field: parsed.get(field) for field in PARSED_FIELDS})
+        for field, value in values.items():
+            if value is not None:
+                setattr(latest, field, value)
+        latest.record_id = record_id
+        latest.scraped_at = now
+        
+        new_key = rollup_key(latest)
+        if old_key != new_key:
+            # Urutan tetap agar dua worker tidak saling menunggu (deadlock) pada bucket yang sama
+            for key, delta in sorted([(old_key, -1), (new_key, 1)] if old_key else [(new_key, 1)]):
+                _adjust_rollup(db, key, delta)
+        
+        db.commit()
+        return latest
+    except Exception as e:
+        logger.error(f"Error updating porsi rollup for no_porsi {no_porsi}: {str(e)}")
+        db.rollback()
+        return None
+
+def get_rollup_stats(
+    db: Session,
+    group_by: List[str],
+    provinsi: Optional[str] = None,
+    kabupaten: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    payment_status: Optional[str] = None
+) -> List[Dict]:
+    """Jumlah porsi dari porsi_rollup, dikelompokkan berdasarkan dimensi yang diminta"""
+    columns = [getattr(PorsiRollup, dimension) for dimension in group_by]
+    total = func.sum(PorsiRollup.porsi_count)
+    query = db.query(*columns, total.label('porsi_count'))
+    if provinsi:
+        query = query.filter(PorsiRollup.provinsi == normalize_region(provinsi))
+    if kabupaten:
+        query = query.filter(PorsiRollup.kabupaten == normalize_region(kabupaten))
+    if year_from is not None:
+        query = query.filter(PorsiRollup.departure_year >= year_from)
+    if year_to is not None:
+        query = query.filter(PorsiRollup.departure_year <= year_to)
+    if payment_status:
+        query = query.filter(PorsiRollup.payment_status == payment_status)
+    if columns:
+        query = query.group_by(*columns).order_by(*columns)
+    rows = query.having(total > 0).all() if columns else query.all()
+    return [
+        {**{dimension: row[index] for index, dimension in enumerate(group_by)}, 'porsi_count': int(row[-1] or 0)}
+        for row in rows
+    ]
+
+def search_porsi(
+    db: Session,
+    q: str,
+    provinsi: Optional[str] = None,
+    kabupaten: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    similarity_threshold: float = 0.4
+) -> Tuple[List[Dict], bool]:
+    """
+    Cari porsi berdasarkan nama (parsial atau salah ketik) di porsi_latest, diurutkan
+    berdasarkan kemiripan. Di PostgreSQL memakai operator word similarity pg_trgm (%>)
+    yang dilayani index GIN ix_porsi_latest_nama_trgm; dialect lain memakai LIKE per kata.
+    Return (hasil, has_more).
+    """
+    name = normalize_name(q) or ''
+    trigram = db.get_bind().dialect.name == 'postgresql'
+    if trigram:
+        # Threshold operator %> hanya untuk transaksi ini
+        db.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+            {'threshold': str(similarity_threshold)}
+        )
+        score = func.word_similarity(name, PorsiLatest.nama)
+        query = db.query(PorsiLatest, score.label('score')).filter(PorsiLatest.nama.op('%>')(name))
+        order = [score.desc(), PorsiLatest.no_porsi.asc()]
+    else:
+        query = db.query(PorsiLatest, literal(None).label('score'))
+        for word in name.split():
+            query = query.filter(PorsiLatest.nama.like(f"%{word}%"))
+        order = [func.length(PorsiLatest.nama).asc(), PorsiLatest.no_porsi.asc()]
+    
+    if provinsi:
+        query = query.filter(PorsiLatest.provinsi == normalize_region(provinsi))
+    if kabupaten:
+        query = query.filter(PorsiLatest.kabupaten == normalize_region(kabupaten))
+    
+    # Ambil satu baris ekstra untuk has_more, tanpa COUNT(*) atas seluruh hasil
+    rows = query.order_by(*order).offset(offset).limit(limit + 1).all()
+    results = [
+        {
+            'no_porsi': latest.no_porsi,
+            'nama': latest.nama,
+            'provinsi': latest.provinsi,
+            'kabupaten': latest.kabupaten,
+            'departure_year': latest.departure_year,
+            'payment_status': latest.payment_status,
+            'record_id': str(latest.record_id) if latest.record_id else None,
+            'scraped_at': latest.scraped_at.isoformat() if latest.scraped_at else None,
+            'score': round(float(score), 4) if score is not None else None,
+        }
+        for latest, score in rows[:limit]
+    ]
+    return results, len(rows) > limit
+
+DEAD_LETTER_DEAD = "dead"
+DEAD_LETTER_REPLAYING = "replaying"
+DEAD_LETTER_RESOLVED = "resolved"
+
+@timed_db_write('dead_letter_record')
+def dead_letter_record(
+    db: Session,
+    task_id: str,
+    failure_class: str,
+    error_message: Optional[str],
+    attempts_used: int,
+    profile: Optional[dict] = None,
+    lane: Optional[str] = None
+) -> Optional[DeadLetter]:
+    """Masukkan record yang gagal final ke dead-letter queue (atau kembalikan entry lama ke state dead)"""
+    try:
+        record = db.query(ScrapeRecord).filter(ScrapeRecord.task_id == task_id).first()
+        if record is None:
+            return None
+        entry = db.query(DeadLetter).filter(DeadLetter.record_id == record.id).first()
+        if entry is None:
+            entry = DeadLetter(record_id=record.id, task_id=task_id, no_porsi=record.no_porsi, replay_count=0)
+            db.add(entry)
+        entry.failure_class = failure_class
+        entry.error_message = error_message
+        entry.attempts_used = attempts_used
+        entry.profile = profile
+        entry.lane = lane
+        entry.state = DEAD_LETTER_DEAD
+        entry.failed_at = datetime.utcnow()
+        entry.resolved_at = None
+        db.commit()
+        db.refresh(entry)
+        DEAD_LETTERS.labels(failure_class=failure_class).inc()
+        logger.info(f"Dead-lettered task_id: {task_id} ({failure_class})")
+        return entry
+    except Exception as e:
+        logger.error(f"Error dead-lettering task_id {task_id}: {str(e)}")
+        db.rollback()
+        return None
+
+@timed_db_write('resolve_dead_letter')
+def resolve_dead_letter(db: Session, dead_letter_id: int):
+    """Tandai entry selesai setelah replay berhasil"""
+    try:
+        now = datetime.utcnow()
+        db.query(DeadLetter).filter(DeadLetter.id == dead_letter_id).update(
+            {DeadLetter.state: DEAD_LETTER_RESOLVED, DeadLetter.resolved_at: now, DeadLetter.updated_at: now},
+            synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error resolving dead letter {dead_letter_id}: {str(e)}")
+        db.rollback()
+
+def get_dead_letters(
+    db: Session,
+    failure_class: Optional[str] = None,
+    state: Optional[str] = DEAD_LETTER_DEAD,
+    limit: int = 50,
+    offset: int = 0,
+    ids: Optional[List[int]] = None
+) -> Tuple[List[DeadLetter], bool]:
+    """Entry dead-letter terbaru dulu, lewat index (state, failure_class, failed_at). Return (entry, has_more)."""
+    query = db.query(DeadLetter)
+    if state:
+        query = query.filter(DeadLetter.state == state)
+    if failure_class:
+        query = query.filter(DeadLetter.failure_class == failure_class)
+    if ids:
+        query = query.filter(DeadLetter.id.in_(ids))
+    rows = query.order_by(DeadLetter.failed_at.desc(), DeadLetter.id.desc()).offset(offset).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+def get_dead_letter_summary(db: Session) -> List[Dict]:
+    """Jumlah entry per state dan failure_class beserta rentang waktu gagal"""
+    rows = db.query(
+        DeadLetter.state,
+        DeadLetter.failure_class,
+        func.count(DeadLetter.id),
+        func.min(DeadLetter.failed_at),
+        func.max(DeadLetter.failed_at)
+    ).group_by(DeadLetter.state, DeadLetter.failure_class).all()
+    return [
+        {
+            'state': state,
+            'failure_class': failure_class,
+            'count': count,
+            'oldest_failed_at': oldest.isoformat() if oldest else None,
+            'newest_failed_at': newest.isoformat() if newest else None,
+        }
+        for state, failure_class, count, oldest, newest in sorted(rows, key=lambda row: (row[0], -row[2]))
+    ]
+
+@timed_db_write('claim_dead_letters')
+def claim_dead_letters(
+    db: Session,
+    failure_class: Optional[str] = None,
+    ids: Optional[List[int]] = None,
+    limit: int = 100,
+    stale_after_seconds: Optional[int] = None
+) -> List[DeadLetter]:
+    """
+    Ambil entry state dead (terlama dulu) dan tandai replaying dalam satu transaksi,
+    sehingga dua permintaan replay yang bersamaan tidak mengirim entry yang sama.
+    Jika stale_after_seconds diberikan, entry replaying yang tidak pernah selesai
+    (mis. task replay mati) setelah selama itu ikut diambil lagi.
+    """
+    claimable = DeadLetter.state == DEAD_LETTER_DEAD
+    if stale_after_seconds is not None:
+        stale_before = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        claimable = or_(
+            claimable,
+            and_(DeadLetter.state == DEAD_LETTER_REPLAYING, DeadLetter.replayed_at < stale_before)
+        )
+    query = db.query(DeadLetter).filter(claimable)
+    if failure_class:
+        query = query.filter(DeadLetter.failure_class == failure_class)
+    if ids:
+        query = query.filter(DeadLetter.id.in_(ids))
+    entries = query.order_by(DeadLetter.failed_at.asc(), DeadLetter.id.asc()) \
+        .limit(limit).with_for_update(skip_locked=True).all()
+    now = datetime.utcnow()
+    for entry in entries:
+        entry.state = DEAD_LETTER_REPLAYING
+        entry.replay_count += 1
+        entry.replayed_at = now
+    db.commit()
+    return entries
+
+def get_replaying_dead_letters(db: Session, ids: List[int]) -> List[DeadLetter]:
+    """Entry yang sudah di-claim dan belum dikirim, urutan sama seperti saat claim"""
+    if not ids:
+        return []
+    return db.query(DeadLetter).filter(
+        DeadLetter.id.in_(ids),
+        DeadLetter.state == DEAD_LETTER_REPLAYING
+    ).order_by(DeadLetter.failed_at.asc(), DeadLetter.id.asc()).all()
+
+@timed_db_write('release_dead_letters')
+def release_dead_letters(db: Session, ids: List[int]) -> int:
+    """Kembalikan entry replaying yang belum terkirim ke state dead"""
+    if not ids:
+        return 0
+    released = db.query(DeadLetter).filter(
+        DeadLetter.id.in_(ids),
+        DeadLetter.state == DEAD_LETTER_REPLAYING
+    ).update(
+        {DeadLetter.state: DEAD_LETTER_DEAD, DeadLetter.replay_count: DeadLetter.replay_count - 1},
+        synchronize_session=False
+    )
+    db.commit()
+    return released
+
+@timed_db_write('reset_record_for_replay')
+def reset_record_for_replay(db: Session, record_id) -> Optional[ScrapeRecord]:
+    """Kembalikan scrape_record ke PENDING sebelum task-nya dikirim ulang"""
+    record = db.query(ScrapeRecord).filter(ScrapeRecord.id == record_id).first()
+    if record is None:
+        return None
+    record.status = "PENDING"
+    record.error_message = None
+    record.failure_class = None
+    record.attempts_used = 0
+    record.started_at = None
+    record.completed_at = None
+    record.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(record)
+    mark_record_written(record)
+    return record
@@ -0,0 +1,57 @@
+"""
+Engine dan session database.
+
+Tulis (worker, enqueue) selalu ke primary lewat engine/SessionLocal. Endpoint GET
+memakai read_engine/ReadSessionLocal: replica jika settings.database_read_url diisi
+(pool terpisah, sehingga beban baca tidak mengantre di pool yang sama dengan commit
+hasil scraping), atau primary jika tidak ada replica.
+"""
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import declarative_base, sessionmaker
+from .config import settings
+
+def make_engine(url: str, pool_size: int, max_overflow: int):
+    kwargs = {"pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        # Stand-in lokal: session dipakai lintas thread threadpool FastAPI
+        kwargs["connect_args"] = {"check_same_thread": False}
+    else:
+        kwargs.update(pool_size=pool_size, max_overflow=max_overflow)
+    return create_engine(url, **kwargs)
+
+engine = make_engine(settings.database_url, settings.database_pool_size, settings.database_max_overflow)
+
+if settings.database_read_url:
+    read_engine = make_engine(settings.database_read_url, settings.database_read_pool_size, settings.database_read_max_overflow)
+else:
+    read_engine = engine
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+Base = declarative_base()
+
+def has_read_replica() -> bool:
+    return read_engine is not engine
+
+def get_db():
+    """Dependency FastAPI: session primary"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_db_session():
+    """Session primary untuk worker dan CLI (harus di-close pemanggil)"""
+    return SessionLocal()
+
+def get_read_db_session(primary: bool = False):
+    """Session baca: replica, atau primary jika primary=True (read-your-writes)"""
+    return SessionLocal() if primary else ReadSessionLocal()
+
+def test_connection(bind=None) -> bool:
+    """Cek koneksi primary (atau engine lain, mis. read_engine)"""
+    with (bind or engine).connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return True
@@ -0,0 +1,114 @@
+"""
+Dead-letter queue untuk task scraping.
+
+Task yang habis attempt budget-nya dicatat di tabel dead_letters (crud.dead_letter_record)
+dengan failure_class terstruktur. Replay memakai ulang scrape_record dan task_id yang
+sama (dispatch.requeue_dead_letter) dan dikirim bertahap agar pemulihan setelah upstream
+down tidak menjadi thundering herd:
+
+- maksimal `rate` task per detik ke lane tujuan (default lane bulk),
+- ditahan selama queue lane tujuan melebihi settings.dlq_replay_max_queue_depth,
+- berhenti dan mengembalikan sisa entry ke state dead jika circuit breaker terbuka.
+
+Dipakai oleh POST /dead-letters/replay (lewat task replay_dead_letters) dan
+`python -m app.cli dlq replay`.
+"""
+from typing import Callable, Dict, List, Optional
+import logging
+import time
+
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .crud import claim_dead_letters, release_dead_letters
+from .dispatch import get_queue_depth, requeue_dead_letter
+from .lanes import LANE_QUEUES
+from .metrics import DEAD_LETTER_REPLAYS
+from .models import DeadLetter
+from .services.circuit_breaker import get_circuit_breaker
+
+logger = logging.getLogger(__name__)
+
+def claim_for_replay(db: Session, failure_class: Optional[str] = None, ids: Optional[List[int]] = None, limit: Optional[int] = None) -> List[DeadLetter]:
+    """Claim entry untuk satu permintaan replay (dibatasi settings.dlq_replay_max_batch)"""
+    limit = min(limit or settings.dlq_replay_max_batch, settings.dlq_replay_max_batch)
+    return claim_dead_letters(db, failure_class=failure_class, ids=ids, limit=limit,
+                              stale_after_seconds=settings.dlq_replay_stale_seconds)
+
+def _wait_for_queue(lane: str, deadline: Optional[float], sleep: Callable[[float], None]) -> bool:
+    """Tunggu sampai queue lane di bawah batas; False jika deadline terlewati lebih dulu"""
+    while get_queue_depth(LANE_QUEUES[lane]) >= settings.dlq_replay_max_queue_depth:
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        sleep(1.0)
+    return True
+
+def replay_entries(
+    db: Session,
+    entries: List[DeadLetter],
+    rate: Optional[float] = None,
+    lane: Optional[str] = None,
+    deadline: Optional[float] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    on_entry: Optional[Callable[[DeadLetter, bool], None]] = None
+) -> Dict:
+    """
+    Kirim ulang entry yang sudah di-claim dengan jeda 1/rate detik. Jika deadline
+    (time.monotonic) terlewati, id yang belum dikirim dikembalikan di 'remaining'
+    dan tetap replaying untuk dilanjutkan pemanggil. on_entry(entry, sent) dipanggil
+    setelah setiap entry selesai diproses (terkirim atau dikembalikan ke state dead).
+    """
+    rate = rate if rate is not None else settings.dlq_replay_rate
+    lane = lane or settings.dlq_replay_lane
+    interval = 1.0 / rate if rate > 0 else 0.0
+    breaker = get_circuit_breaker()
+    stats = {'sent': 0, 'failed': 0, 'released': 0, 'remaining': [], 'stopped': None}
+
+    for index, entry in enumerate(entries):
+        pending = entries[index:]
+        stop_reason = None
+        if breaker.is_open():
+            stop_reason = 'breaker_open'
+        else:
+            try:
+                if not _wait_for_queue(lane, deadline, sleep):
+                    stats['remaining'] = [item.id for item in pending]
+                    break
+            except Exception as e:
+                logger.error(f"Cannot read queue depth for lane {lane}: {str(e)}")
+                stop_reason = 'queue_depth_unavailable'
+        if stop_reason:
+            # Sisa entry kembali ke state dead dan bisa di-replay lagi nanti
+            stats['stopped'] = stop_reason
+            stats['released'] = release_dead_letters(db, [item.id for item in pending])
+            for item in pending:
+                DEAD_LETTER_REPLAYS.labels(failure_class=item.failure_class, result='released').inc()
+            logger.warning(f"Dead letter replay stopped ({stop_reason}), released {stats['released']} entries")
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            stats['remaining'] = [item.id for item in pending]
+            break
+
+        try:
+            requeue_dead_letter(db, entry, lane)
+            sent = True
+            stats['sent'] += 1
+            DEAD_LETTER_REPLAYS.labels(failure_class=entry.failure_class, result='sent').inc()
+        except Exception as e:
+            logger.error(f"Error replaying dead letter {entry.id}: {str(e)}")
+            db.rollback()
+            release_dead_letters(db, [entry.id])
+            sent = False
+            stats['failed'] += 1
+            DEAD_LETTER_REPLAYS.labels(failure_class=entry.failure_class, result='released').inc()
+        if on_entry is not None:
+            on_entry(entry, sent)
+
+        if interval and index < len(entries) - 1:
+            sleep(interval)
+
+    logger.info(
+        f"Dead letter replay: sent {stats['sent']}, failed {stats['failed']}, "
+        f"released {stats['released']}, remaining {len(stats['remaining'])}"
+    )
+    return stats
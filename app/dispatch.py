@@ -0,0 +1,139 @@
+from sqlalchemy.orm import Session
+from typing import Optional
+import json
+import logging
+import redis
+import time
+import uuid
+from .crud import create_scrape_record, reset_record_for_replay, update_record_failure
+from .models import DeadLetter, ScrapeRecord
+from .lanes import LANE_NORMAL, LANE_QUEUES, SCRAPING_QUEUES
+from .tracing import Trace, new_trace_context
+from .profiles import ScrapeProfile
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_TASK_NAME = 'app.tasks.scrape_kemenag'
+
+def get_queue_depth(queue: str = LANE_QUEUES[LANE_NORMAL]) -> int:
+    """Jumlah pesan yang menunggu di queue broker Redis"""
+    r = redis.from_url(settings.redis_url)
+    return r.llen(queue)
+
+def enqueue_scrape(db: Session, no_porsi: str, priority: str = LANE_NORMAL, profile: Optional[ScrapeProfile] = None) -> ScrapeRecord:
+    """
+    Buat record PENDING lalu kirim task scraping dengan task_id yang sama ke queue
+    sesuai lane prioritas, sehingga worker selalu menemukan record-nya di database.
+    Tanpa profile, worker memakai profile default (full).
+    """
+    task_id = str(uuid.uuid4())
+    trace_context = new_trace_context()
+    started = time.time()
+    # Celery di-import saat dibutuhkan agar import API tetap ringan (lihat main.run_startup_checks)
+    from .celery_app import app as celery_app
+    
+    record = create_scrape_record(db=db, task_id=task_id, no_porsi=no_porsi)
+    task_kwargs = {'task_id': task_id, 'no_porsi': no_porsi}
+    if profile is not None:
+        task_kwargs['profile'] = profile.model_dump()
+    try:
+        celery_app.send_task(
+            SCRAPE_TASK_NAME,
+            kwargs=task_kwargs,
+            task_id=task_id,
+            queue=LANE_QUEUES[priority],
+            # lane/enqueued_at untuk mengukur waktu tunggu per lane, trace untuk tracing end-to-end
+            headers={'lane': priority, 'enqueued_at': time.time(), 'trace': trace_context}
+        )
+    except Exception as e:
+        logger.error(f"Error sending task for no_porsi {no_porsi}: {str(e)}")
+        update_record_failure(db=db, task_id=task_id, error_message=f"Failed to enqueue task: {str(e)}")
+        raise
+    
+    if trace_context['sampled']:
+        trace = Trace(task_id, trace_context['trace_id'])
+        trace.add_span('enqueue', started, time.time(), no_porsi=no_porsi, lane=priority)
+        trace.flush()
+    return record
+
+def requeue_dead_letter(db: Session, entry: DeadLetter, priority: str) -> ScrapeRecord:
+    """
+    Kirim ulang task dari dead-letter queue dengan record dan task_id yang sama (record
+    dikembalikan ke PENDING). Header dead_letter_id dipakai worker untuk menandai entry
+    resolved jika berhasil; jika gagal lagi entry kembali ke state dead.
+    """
+    from .celery_app import app as celery_app
+    
+    record = reset_record_for_replay(db, entry.record_id)
+    if record is None:
+        raise ValueError(f"Record {entry.record_id} for dead letter {entry.id} no longer exists")
+    task_kwargs = {'task_id': entry.task_id, 'no_porsi': entry.no_porsi}
+    if entry.profile:
+        task_kwargs['profile'] = entry.profile
+    try:
+        celery_app.send_task(
+            SCRAPE_TASK_NAME,
+            kwargs=task_kwargs,
+            task_id=entry.task_id,
+            queue=LANE_QUEUES[priority],
+            headers={'lane': priority, 'enqueued_at': time.time(), 'trace': new_trace_context(), 'dead_letter_id': entry.id}
+        )
+    except Exception as e:
+        logger.error(f"Error sending replay for no_porsi {entry.no_porsi}: {str(e)}")
+        update_record_failure(
+            db=db,
+            task_id=entry.task_id,
+            error_message=f"Failed to enqueue replay: {str(e)}",
+            attempts_used=entry.attempts_used,
+            failure_class=entry.failure_class
+        )
+        raise
+    return record
+
+# hostname worker -> JSON daftar queue scraping yang dikonsumsi sebelum di-pause
+PAUSED_CONSUMERS_KEY = 'breaker:paused_consumers'
+PAUSED_CONSUMERS_TTL_SECONDS = 7 * 24 * 3600
+
+def pause_scraping_consumers():
+    """
+    Minta worker berhenti mengambil task dari lane scraping. Queue yang dikonsumsi
+    tiap worker dicatat di Redis sehingga resume hanya mengembalikan queue itu ke
+    worker yang sama (worker interactive tidak ikut mengambil lane normal/bulk).
+    """
+    from .celery_app import app as celery_app
+    
+    active = celery_app.control.inspect().active_queues() or {}
+    if not active:
+        logger.warning("No worker replied to active_queues, nothing to pause")
+    r = redis.from_url(settings.redis_url)
+    for hostname, queues in active.items():
+        consumed = [queue['name'] for queue in queues if queue.get('name') in SCRAPING_QUEUES]
+        if not consumed:
+            continue
+        # Pause berulang (probe gagal) tidak boleh menimpa catatan pause pertama
+        previous = r.hget(PAUSED_CONSUMERS_KEY, hostname)
+        if previous:
+            consumed = sorted(set(consumed) | set(json.loads(previous)))
+        r.hset(PAUSED_CONSUMERS_KEY, hostname, json.dumps(consumed))
+        for queue in consumed:
+            logger.warning(f"Pausing consumption of queue '{queue}' on {hostname}")
+            celery_app.control.cancel_consumer(queue, destination=[hostname])
+    r.expire(PAUSED_CONSUMERS_KEY, PAUSED_CONSUMERS_TTL_SECONDS)
+
+def has_paused_consumers() -> bool:
+    r = redis.from_url(settings.redis_url)
+    return bool(r.exists(PAUSED_CONSUMERS_KEY))
+
+def resume_scraping_consumers():
+    """Kembalikan queue scraping yang dicatat saat pause ke masing-masing worker"""
+    from .celery_app import app as celery_app
+    
+    r = redis.from_url(settings.redis_url)
+    paused = r.hgetall(PAUSED_CONSUMERS_KEY)
+    for hostname, queues in paused.items():
+        hostname = hostname.decode() if isinstance(hostname, bytes) else hostname
+        for queue in json.loads(queues):
+            logger.info(f"Resuming consumption of queue '{queue}' on {hostname}")
+            celery_app.control.add_consumer(queue, destination=[hostname])
+    r.delete(PAUSED_CONSUMERS_KEY)
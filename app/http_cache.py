@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import threading
+import time
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from .config import settings
+
+# Hanya SUCCESS yang final (isinya berubah lewat replay ekstraksi, app.replay). FAILURE
+# tidak: record FAILURE di antara retry bisa berhasil nanti, dan replay dead-letter
+# mengembalikannya ke PENDING.
+CACHEABLE_STATUSES = ("SUCCESS",)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def make_etag(*parts) -> str:
+    """Strong ETag dari bagian-bagian yang menentukan isi response"""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+def http_date(value: datetime) -> str:
+    """Format header Last-Modified; datetime naive dianggap UTC (datetime.utcnow)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluasi If-None-Match (prioritas) lalu If-Modified-Since sesuai RFC 9110.
+    Perbandingan ETag memakai weak comparison seperti yang disyaratkan untuk GET.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+def cache_headers(etag: str, cache_control: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def conditional_json(request: Request, content: Dict, etag: str, cache_control: str,
+                     last_modified: Optional[datetime] = None) -> Response:
+    """JSONResponse dengan validator, atau 304 tanpa body jika client sudah punya versi yang sama"""
+    headers = cache_headers(etag, cache_control, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+def record_cache_control(record_status: str) -> str:
+    """Record SUCCESS boleh di-cache CDN; record lain masih bisa berubah dan harus selalu divalidasi ulang"""
+    if record_status in CACHEABLE_STATUSES:
+        return f"public, max-age={settings.record_cache_max_age_seconds}"
+    return "no-cache"
+
+def record_etag(record: Dict) -> str:
+    return make_etag(record["id"], record["status"], record["updated_at"])
+
+def records_etag(records) -> str:
+    """ETag untuk daftar record: berubah jika ada record baru atau record yang berubah"""
+    return make_etag(*(f"{record['id']}@{record['updated_at']}" for record in records))
+
+def body_etag(content: Dict) -> str:
+    return make_etag(json.dumps(content, sort_keys=True, default=str))
+
+class SuccessRecordCache:
+    """
+    Cache in-process (LRU + TTL) untuk record SUCCESS, sehingga request ulang
+    dan revalidasi dari CDN tidak perlu query database. TTL sama dengan max-age agar
+    hasil replay tetap terlihat setelah cache kedaluwarsa.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, record = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return record
+
+    def put(self, record: Dict, *keys: str):
+        """Simpan record (hanya jika SUCCESS) di bawah beberapa key, mis. id dan task_id"""
+        if record.get("status") not in CACHEABLE_STATUSES or self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (expires_at, record)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+record_cache = SuccessRecordCache(settings.record_cache_size, settings.record_cache_max_age_seconds)
@@ -0,0 +1,116 @@
+"""
+Priority lanes untuk task scraping.
+
+Setiap lane punya queue sendiri. Worker mengambil dari beberapa lane dengan
+weighted round-robin (lihat WeightedLaneCycle), dan kapasitas interactive
+dicadangkan dengan worker khusus:
+
+    celery -A app.worker worker -Q scraping_interactive -c 2 -n interactive@%h
+    celery -A app.worker worker -Q scraping_interactive,scraping,scraping_bulk -c 8 -n shared@%h
+    celery -A app.worker worker -Q maintenance -c 1 -n maintenance@%h
+"""
+from typing import Dict, List
+import logging
+import math
+import redis
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+LANE_INTERACTIVE = "interactive"
+LANE_NORMAL = "normal"
+LANE_BULK = "bulk"
+
+# Lane normal tetap memakai queue 'scraping' yang lama
+LANE_QUEUES = {
+    LANE_INTERACTIVE: "scraping_interactive",
+    LANE_NORMAL: "scraping",
+    LANE_BULK: "scraping_bulk",
+}
+QUEUE_LANES = {queue: lane for lane, queue in LANE_QUEUES.items()}
+SCRAPING_QUEUES = list(LANE_QUEUES.values())
+
+def lane_weights() -> Dict[str, int]:
+    """Bobot konsumsi per queue"""
+    return {
+        LANE_QUEUES[LANE_INTERACTIVE]: settings.lane_weight_interactive,
+        LANE_QUEUES[LANE_NORMAL]: settings.lane_weight_normal,
+        LANE_QUEUES[LANE_BULK]: settings.lane_weight_bulk,
+    }
+
+class WeightedLaneCycle:
+    """
+    Queue order strategy untuk kombu Redis transport (smooth weighted round-robin).
+    Dipasang lewat broker_transport_options['queue_order_strategy'].
+
+    Urutan queue menentukan urutan key BRPOP, sehingga queue dengan kredit tertinggi
+    dilayani lebih dulu jika ada pesan. Queue di luar lane (mis. maintenance) berbobot 1.
+    """
+
+    def __init__(self, it=None):
+        self.items = list(it) if it is not None else []
+        self.weights = lane_weights()
+        self.credits = {}
+
+    def _weight(self, queue: str) -> int:
+        return self.weights.get(queue, 1)
+
+    def update(self, it):
+        self.items[:] = it
+        self.credits = {queue: self.credits.get(queue, 0) for queue in self.items}
+
+    def consume(self, n: int) -> List[str]:
+        return sorted(
+            self.items,
+            key=lambda queue: self.credits.get(queue, 0) + self._weight(queue),
+            reverse=True
+        )[:n]
+
+    def rotate(self, last_used: str) -> str:
+        total = sum(self._weight(queue) for queue in self.items)
+        for queue in self.items:
+            self.credits[queue] = self.credits.get(queue, 0) + self._weight(queue)
+        if last_used in self.credits:
+            self.credits[last_used] -= total
+        # Batasi kredit agar lane yang lama kosong tidak menumpuk prioritas tanpa batas
+        for queue in self.items:
+            self.credits[queue] = max(-total, min(total, self.credits[queue]))
+        return last_used
+
+def _wait_key(lane: str) -> str:
+    return f"lane_wait:{lane}"
+
+def record_queue_wait(lane: str, wait_seconds: float):
+    """Simpan sampel waktu tunggu di queue (ring buffer di Redis)"""
+    try:
+        r = redis.from_url(settings.redis_url)
+        pipe = r.pipeline()
+        pipe.lpush(_wait_key(lane), round(wait_seconds, 3))
+        pipe.ltrim(_wait_key(lane), 0, settings.lane_wait_sample_size - 1)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Error recording queue wait for lane {lane}: {str(e)}")
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile nearest-rank dari list yang sudah diurutkan"""
+    if not values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(values))
+    return values[min(len(values), max(1, rank)) - 1]
+
+def get_lane_stats() -> Dict:
+    """Kedalaman queue dan distribusi waktu tunggu per lane"""
+    r = redis.from_url(settings.redis_url)
+    stats = {}
+    for lane, queue in LANE_QUEUES.items():
+        samples = sorted(float(value) for value in r.lrange(_wait_key(lane), 0, -1))
+        stats[lane] = {
+            "queue": queue,
+            "depth": r.llen(queue),
+            "weight": lane_weights()[queue],
+            "wait_samples": len(samples),
+            "wait_p50_seconds": percentile(samples, 50),
+            "wait_p95_seconds": percentile(samples, 95),
+            "wait_p99_seconds": percentile(samples, 99),
+        }
+    return stats
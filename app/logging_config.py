@@ -0,0 +1,185 @@
+"""
+Pipeline logging: QueueHandler di thread pemanggil, QueueListener menulis ke stdout.
+
+Thread scraping hanya menjalankan filter (level, sampling, rate limit) lalu memasukkan
+record ke queue. Format pesan (msg % args), serialisasi JSON dan write ke stream
+dikerjakan thread listener, jadi pemanggil memakai gaya lazy
+`logger.info("... %s", value, extra={'event': 'field_scraped'})`.
+
+Context (task_id, no_porsi, trace_id) dibawa lewat contextvar (log_context /
+bind_log_context) dan ikut di setiap record. Event yang ramai disampling lewat
+settings.log_sample_rates dan dibatasi per menit lewat settings.log_event_rate_limit_per_minute.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, TextIO
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from .config import settings
+from .metrics import LOG_RECORDS_DROPPED
+
+_log_context: ContextVar[Dict] = ContextVar('log_context', default={})
+
+def bind_log_context(**fields) -> Token:
+    """Tambahkan field context untuk sisa eksekusi di context ini; kembalikan token untuk reset"""
+    return _log_context.set({**_log_context.get(), **fields})
+
+def reset_log_context(token: Token):
+    _log_context.reset(token)
+
+@contextmanager
+def log_context(**fields):
+    token = bind_log_context(**fields)
+    try:
+        yield
+    finally:
+        reset_log_context(token)
+
+class EventFilter(logging.Filter):
+    """
+    Sampling dan rate limit untuk record yang punya atribut event (extra={'event': ...}).
+    Record tanpa event selalu lolos. Jumlah record yang ditahan rate limit dilaporkan
+    di record berikutnya yang lolos (field suppressed).
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], rate_limit_per_minute: int):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self._windows: Dict[str, list] = {}  # event -> [window, count, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, 'event', None)
+        if event is None:
+            return True
+
+        rate = self.sample_rates.get(event)
+        if rate is not None and rate < 1.0:
+            if random.random() >= rate:
+                LOG_RECORDS_DROPPED.labels(reason='sampled').inc()
+                return False
+            record.sample_rate = rate
+
+        if self.rate_limit_per_minute > 0:
+            window = int(time.monotonic() // 60)
+            with self._lock:
+                state = self._windows.get(event)
+                if state is None or state[0] != window:
+                    suppressed = state[2] if state else 0
+                    state = self._windows[event] = [window, 0, 0]
+                    if suppressed:
+                        record.suppressed = suppressed
+                if state[1] >= self.rate_limit_per_minute:
+                    state[2] += 1
+                    LOG_RECORDS_DROPPED.labels(reason='rate_limited').inc()
+                    return False
+                state[1] += 1
+        return True
+
+class AsyncQueueHandler(QueueHandler):
+    """QueueHandler yang menunda format ke thread listener dan tidak pernah memblokir"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Record tetap di proses yang sama, jadi args/exc_info tidak perlu diformat di sini
+        context = _log_context.get()
+        if context:
+            record.log_context = context
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(reason='queue_full').inc()
+
+class _Listener(QueueListener):
+    """QueueListener yang menunggu tempat di queue untuk sentinel saat stop (queue bisa penuh)"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+class JsonFormatter(logging.Formatter):
+    """Satu objek JSON per baris"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process,
+        }
+        event = getattr(record, 'event', None)
+        if event is not None:
+            entry['event'] = event
+        entry.update(getattr(record, 'log_context', None) or {})
+        for field in ('sample_rate', 'suppressed'):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Format teks untuk development, context ditambahkan di akhir baris"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = getattr(record, 'log_context', None)
+        if context:
+            line += ' [' + ' '.join(f'{key}={value}' for key, value in context.items()) + ']'
+        return line
+
+_listener: Optional[QueueListener] = None
+_configured_pid: Optional[int] = None
+
+def configure_logging(stream: Optional[TextIO] = None, force: bool = False):
+    """
+    Pasang pipeline di root logger. Idempotent per proses; dipanggil ulang setelah fork
+    (mis. worker_process_init Celery) karena thread listener tidak ikut ter-fork.
+    """
+    global _listener, _configured_pid
+    if _configured_pid == os.getpid() and not force:
+        return
+    if _configured_pid == os.getpid():
+        stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.log_format == 'json' else TextFormatter())
+
+    log_queue = queue.Queue(maxsize=settings.log_queue_size)
+    handler = AsyncQueueHandler(log_queue)
+    handler.addFilter(EventFilter(settings.log_sample_rates, settings.log_event_rate_limit_per_minute))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+
+    _listener = _Listener(log_queue, output)
+    _listener.start()
+    if _configured_pid is None:
+        atexit.register(stop_logging)
+    _configured_pid = os.getpid()
+
+def stop_logging():
+    """Tulis sisa record di queue lalu hentikan thread listener"""
+    global _listener
+    if _listener is not None and _configured_pid == os.getpid():
+        _listener.stop()
+    _listener = None
@@ -1,43 +1,117 @@
-from fastapi import FastAPI, HTTPException, Depends, status
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, RedirectResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
 from datetime import datetime
+import asyncio
 import os
 import logging
-from typing import Optional
+from typing import Optional, List, Literal, Union
 import redis
 
-from .database import get_db, test_connection, Base, engine
+from .database import get_db, get_read_db_session, has_read_replica, read_engine, test_connection
 from .crud import (
-    create_scrape_record,
     get_record_by_id,
     get_record_by_task_id,
-    get_records_by_no_porsi
+    get_records_by_no_porsi,
+    get_rollup_stats,
+    register_porsi,
+    search_porsi,
+    get_dead_letters,
+    get_dead_letter_summary,
+    release_dead_letters,
+    ROLLUP_DIMENSIONS
 )
-from .tasks import scrape_kemenag
-from .celery_app import app as celery_app
+from .dead_letters import claim_for_replay
+from .dispatch import enqueue_scrape
+from .profiles import PROFILE_PRESETS, ScrapeProfile, resolve_profile
+from .lanes import LANE_BULK, LANE_NORMAL, get_lane_stats
+from .metrics import DB_READ_ROUTES, render_api_metrics
+from .logging_config import configure_logging
+from .tracing import get_trace
+from .services.storage import get_screenshot_storage, media_type_for, is_content_addressed, S3ScreenshotStorage
+from .http_cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    body_etag,
+    cache_headers,
+    conditional_json,
+    is_not_modified,
+    make_etag,
+    record_cache,
+    record_cache_control,
+    record_etag,
+    records_etag,
+)
+from prometheus_client import CONTENT_TYPE_LATEST
 from .config import settings
+from .services.rate_limiter import get_rate_limiter
+from .services.circuit_breaker import get_circuit_breaker
+from .services.recent_writes import get_recent_writes
+from .services.stats_cache import get_stats_cache
+from .schema import create_schema
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging (pipeline async JSON, lihat app.logging_config)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Create database tables
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
-except Exception as e:
-    logger.error(f"Error creating database tables: {str(e)}")
+# Hasil pengecekan startup, diisi di background oleh run_startup_checks
+startup_state = {
+    "schema": "pending" if settings.auto_create_schema else "skipped",
+    "database": "pending",
+    "redis": "pending",
+}
+
+async def run_startup_checks():
+    """
+    Pembuatan schema (opsional) dan cek koneksi dijalankan di threadpool setelah
+    server siap, sehingga startup tidak memblokir pada database/Redis
+    """
+    # Celery cukup berat untuk di-import; dimuat di background sebelum request pertama memakainya
+    try:
+        await run_in_threadpool(get_celery_app)
+    except Exception as e:
+        logger.error(f"Error loading Celery app: {str(e)}")
+    
+    if settings.auto_create_schema:
+        try:
+            await run_in_threadpool(create_schema)
+            startup_state["schema"] = "created"
+        except Exception as e:
+            logger.error(f"Error creating database tables: {str(e)}")
+            startup_state["schema"] = f"error: {str(e)}"
+    
+    database_ok, redis_ok = await asyncio.gather(
+        run_in_threadpool(test_connection),
+        run_in_threadpool(test_redis)
+    )
+    startup_state["database"] = "healthy" if database_ok else "unhealthy"
+    startup_state["redis"] = "healthy" if redis_ok else "unhealthy"
+    if not redis_ok:
+        logger.warning("Redis connection failed during startup. Make sure Redis server is running.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    checks = asyncio.create_task(run_startup_checks())
+    yield
+    if not checks.done():
+        checks.cancel()
 
 # FastAPI app
 app = FastAPI(
     title="Kemenag Scraper API with Celery",
     description="API service untuk scraping data Kemenag dengan background processing menggunakan Celery",
-    version="3.0.0"
+    version="3.0.0",
+    lifespan=lifespan
 )
 
 # Test Redis connection on startup
+def get_celery_app():
+    """Celery app di-import saat dibutuhkan agar startup API tidak membayar biaya import Celery"""
+    from .celery_app import app as celery_app
+    return celery_app
+
 def test_redis():
     try:
         r = redis.from_url(settings.redis_url)
@@ -51,12 +125,17 @@ def test_redis():
 # Pydantic models
 class EnqueueRequest(BaseModel):
     no_porsi: str
+    priority: Literal["interactive", "normal", "bulk"] = LANE_NORMAL
+    # Nama preset (lihat GET /profiles) atau profile custom
+    profile: Union[str, ScrapeProfile] = "full"
 
 class EnqueueResponse(BaseModel):
     success: bool
     message: str
     task_id: str
     record_id: str
+    priority: str
+    profile: str
 
 class TaskStatusResponse(BaseModel):
     success: bool
@@ -72,6 +151,52 @@ class RecordResponse(BaseModel):
     data: Optional[dict] = None
     message: Optional[str] = None
 
+class ScheduleRegisterRequest(BaseModel):
+    no_porsi: List[str]
+
+class DeadLetterReplayRequest(BaseModel):
+    # Pilih entry per failure_class dan/atau id tertentu; tanpa keduanya semua entry dead (terlama dulu)
+    failure_class: Optional[str] = None
+    ids: Optional[List[int]] = None
+    limit: int = Field(100, ge=1)
+    rate: Optional[float] = Field(None, gt=0, description="Task per detik, default settings.dlq_replay_rate")
+    priority: Literal["interactive", "normal", "bulk"] = LANE_BULK
+    dry_run: bool = False
+
+# Path parameter -> prefix key penanda read-your-writes (lihat crud.record_read_keys)
+READ_YOUR_WRITES_PARAMS = {"record_id": "id", "task_id": "task", "no_porsi": "porsi"}
+
+def get_read_db(request: Request):
+    """
+    Dependency untuk endpoint GET: session replica, kecuali record di path baru saja
+    ditulis worker/enqueue sehingga replica mungkin belum menyusul (baca dari primary).
+    """
+    target = "primary"
+    if has_read_replica():
+        keys = [
+            f"{prefix}:{request.path_params[param]}"
+            for param, prefix in READ_YOUR_WRITES_PARAMS.items()
+            if param in request.path_params
+        ]
+        target = "primary_recent_write" if get_recent_writes().is_recent(keys) else "replica"
+    DB_READ_ROUTES.labels(target=target).inc()
+    db = get_read_db_session(primary=target != "replica")
+    try:
+        yield db
+    finally:
+        db.close()
+
+def record_response(request: Request, data: dict) -> Response:
+    """Response record dengan ETag/Last-Modified; record SUCCESS boleh di-cache"""
+    updated_at = datetime.fromisoformat(data["updated_at"]) if data.get("updated_at") else None
+    return conditional_json(
+        request,
+        RecordResponse(success=True, data=data).model_dump(),
+        etag=record_etag(data),
+        cache_control=record_cache_control(data["status"]),
+        last_modified=updated_at
+    )
+
 class HealthResponse(BaseModel):
     success: bool
     message: str
@@ -99,7 +224,15 @@ async def enqueue_scraping_task(request: EnqueueRequest, db: Session = Depends(g
                 detail="Nomor porsi harus minimal 3 karakter"
             )
         
-        logger.info(f"Enqueue request received for no_porsi: {no_porsi}")
+        try:
+            profile = resolve_profile(request.profile)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        logger.info(f"Enqueue request received for no_porsi: {no_porsi}, profile: {profile.name}")
         
         # Test Redis connection sebelum enqueue
         if not test_redis():
@@ -108,10 +241,10 @@ async def enqueue_scraping_task(request: EnqueueRequest, db: Session = Depends(g
                 detail="Redis service not available. Make sure Redis server is running."
             )
         
-        # Create Celery task
+        # Create database record dan kirim Celery task ke lane sesuai prioritas
         try:
-            task = scrape_kemenag.delay(task_id="temp", no_porsi=no_porsi)
-            task_id = task.id
+            record = enqueue_scrape(db=db, no_porsi=no_porsi, priority=request.priority, profile=profile)
+            task_id = record.task_id
         except Exception as e:
             logger.error(f"Error creating Celery task: {str(e)}")
             raise HTTPException(
@@ -119,23 +252,15 @@ async def enqueue_scraping_task(request: EnqueueRequest, db: Session = Depends(g
                 detail=f"Failed to enqueue task. Error: {str(e)}"
             )
         
-        # Create database record dengan task_id yang benar
-        try:
-            record = create_scrape_record(db=db, task_id=task_id, no_porsi=no_porsi)
-        except Exception as e:
-            logger.error(f"Error creating database record: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to create database record. Error: {str(e)}"
-            )
-        
-        logger.info(f"Task enqueued successfully: {task_id}, record_id: {record.id}")
+        logger.info(f"Task enqueued successfully: {task_id}, record_id: {record.id}, priority: {request.priority}")
         
         return EnqueueResponse(
             success=True,
             message="Scraping task berhasil di-enqueue",
             task_id=task_id,
-            record_id=str(record.id)
+            record_id=str(record.id),
+            priority=request.priority,
+            profile=profile.name
         )
         
     except HTTPException:
@@ -161,7 +286,7 @@ async def get_task_status(task_id: str):
             )
         
         # Get task result dari Celery
-        task_result = celery_app.AsyncResult(task_id)
+        task_result = get_celery_app().AsyncResult(task_id)
         
         # Get task info
         task_info = {
@@ -202,24 +327,58 @@ async def get_task_status(task_id: str):
             detail=f"Error getting task status: {str(e)}"
         )
 
-@app.get("/records/{record_id}", response_model=RecordResponse)
-async def get_record_by_record_id(record_id: str, db: Session = Depends(get_db)):
+@app.get("/traces/{task_id}")
+async def get_task_trace(task_id: str):
     """
-    Get permanent record dari database berdasarkan record ID
+    Timeline span dari enqueue sampai commit database untuk satu task (jika ter-sample)
     """
     try:
-        record = get_record_by_id(db, record_id)
+        spans = get_trace(task_id)
         
-        if not record:
+        if not spans:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Record tidak ditemukan"
+                detail="Trace tidak ditemukan (task tidak ter-sample atau sudah kedaluwarsa)"
             )
         
-        return RecordResponse(
-            success=True,
-            data=record.to_dict()
+        return {
+            "success": True,
+            "task_id": task_id,
+            "trace_id": spans[0]["trace_id"],
+            "count": len(spans),
+            "spans": spans
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting trace: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting trace: {str(e)}"
         )
+
+@app.get("/records/{record_id}", response_model=RecordResponse)
+async def get_record_by_record_id(record_id: str, request: Request, db: Session = Depends(get_read_db)):
+    """
+    Get permanent record dari database berdasarkan record ID
+    """
+    try:
+        data = record_cache.get(f"id:{record_id}")
+        
+        if data is None:
+            record = get_record_by_id(db, record_id)
+            
+            if not record:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Record tidak ditemukan"
+                )
+            
+            data = record.to_dict()
+            record_cache.put(data, f"id:{data['id']}", f"task:{data['task_id']}")
+        
+        return record_response(request, data)
         
     except HTTPException:
         raise
@@ -231,23 +390,26 @@ async def get_record_by_record_id(record_id: str, db: Session = Depends(get_db))
         )
 
 @app.get("/records/by-task/{task_id}", response_model=RecordResponse)
-async def get_record_by_task_id_endpoint(task_id: str, db: Session = Depends(get_db)):
+async def get_record_by_task_id_endpoint(task_id: str, request: Request, db: Session = Depends(get_read_db)):
     """
     Get record dari database berdasarkan task ID
     """
     try:
-        record = get_record_by_task_id(db, task_id)
+        data = record_cache.get(f"task:{task_id}")
         
-        if not record:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Record tidak ditemukan"
-            )
+        if data is None:
+            record = get_record_by_task_id(db, task_id)
+            
+            if not record:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Record tidak ditemukan"
+                )
+            
+            data = record.to_dict()
+            record_cache.put(data, f"id:{data['id']}", f"task:{data['task_id']}")
         
-        return RecordResponse(
-            success=True,
-            data=record.to_dict()
-        )
+        return record_response(request, data)
         
     except HTTPException:
         raise
@@ -259,18 +421,24 @@ async def get_record_by_task_id_endpoint(task_id: str, db: Session = Depends(get
         )
 
 @app.get("/records/by-porsi/{no_porsi}")
-async def get_records_by_no_porsi_endpoint(no_porsi: str, limit: int = 10, db: Session = Depends(get_db)):
+async def get_records_by_no_porsi_endpoint(no_porsi: str, request: Request, limit: int = 10, db: Session = Depends(get_read_db)):
     """
-    Get records dari database berdasarkan nomor porsi
+    Get records dari database berdasarkan nomor porsi.
+    Daftar bisa bertambah kapan saja, jadi hanya divalidasi ulang lewat ETag (no-cache).
     """
     try:
-        records = get_records_by_no_porsi(db, no_porsi, limit)
+        records = [record.to_dict() for record in get_records_by_no_porsi(db, no_porsi, limit)]
         
-        return {
-            "success": True,
-            "count": len(records),
-            "data": [record.to_dict() for record in records]
-        }
+        return conditional_json(
+            request,
+            {
+                "success": True,
+                "count": len(records),
+                "data": records
+            },
+            etag=records_etag(records),
+            cache_control="no-cache"
+        )
         
     except Exception as e:
         logger.error(f"Error getting records: {str(e)}")
@@ -279,27 +447,72 @@ async def get_records_by_no_porsi_endpoint(no_porsi: str, limit: int = 10, db: S
             detail=f"Error getting records: {str(e)}"
         )
 
-@app.get("/files/{filename}")
-async def serve_file(filename: str):
+@app.get("/files/{filename:path}")
+async def serve_file(filename: str, request: Request, w: Optional[int] = None):
     """
-    Serve screenshot file
+    Serve screenshot file (key sharded seperti ab/cd/<hash>.webp atau nama file lama).
+    Parameter w mengembalikan thumbnail dengan lebar tersebut (lihat settings.thumbnail_widths),
+    dibuat saat pertama kali diminta lalu disimpan. Mendukung If-None-Match/If-Modified-Since
+    (304) dan Range request.
     """
     try:
-        # Sanitize filename
-        filename = os.path.basename(filename)
-        filepath = os.path.join(settings.screenshot_folder, filename)
-        
-        if os.path.exists(filepath):
-            return FileResponse(
-                path=filepath,
-                media_type='image/png',
-                filename=filename
+        storage = get_screenshot_storage()
+        
+        if w is not None:
+            if w not in settings.thumbnail_widths:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Lebar thumbnail harus salah satu dari: {', '.join(map(str, settings.thumbnail_widths))}"
+                )
+            # Resize berjalan di threadpool agar event loop tidak terblokir
+            thumb_key = await run_in_threadpool(storage.ensure_thumbnail, filename, w)
+            if thumb_key is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="File tidak ditemukan"
+                )
+            filename = thumb_key
+        
+        if isinstance(storage, S3ScreenshotStorage):
+            if not storage.exists(filename):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="File tidak ditemukan"
+                )
+            # S3 menangani ETag dan Range sendiri; redirect boleh di-cache selama URL presigned masih berlaku
+            return RedirectResponse(
+                storage.presigned_url(filename),
+                headers={"Cache-Control": "private, max-age=1800"}
             )
-        else:
+        
+        # Sanitize path: tolak key yang keluar dari folder screenshot
+        filepath = storage.resolve_path(filename)
+        
+        if not filepath or not os.path.isfile(filepath):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="File tidak ditemukan"
             )
+        
+        stat = os.stat(filepath)
+        immutable = is_content_addressed(filename)
+        last_modified = datetime.utcfromtimestamp(stat.st_mtime)
+        # Key berbasis hash konten tidak pernah berubah; nama file lama divalidasi dari mtime/ukuran
+        etag = make_etag(filename) if immutable else make_etag(filename, stat.st_mtime_ns, stat.st_size)
+        cache_control = IMMUTABLE_CACHE_CONTROL if immutable else f"public, max-age={settings.file_cache_max_age_seconds}"
+        headers = cache_headers(etag, cache_control, last_modified)
+        
+        if is_not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+        
+        # FileResponse menangani Range/If-Range (206) dan memakai ETag dari headers
+        return FileResponse(
+            path=filepath,
+            media_type=media_type_for(filename),
+            filename=os.path.basename(filename),
+            headers=headers,
+            stat_result=stat
+        )
             
     except HTTPException:
         raise
@@ -310,6 +523,299 @@ async def serve_file(filename: str):
             detail=f"Error serving file: {str(e)}"
         )
 
+@app.post("/schedule/porsi")
+async def register_porsi_for_rescrape(request: ScheduleRegisterRequest, db: Session = Depends(get_db)):
+    """
+    Daftarkan nomor porsi ke scheduler re-scrape (Celery Beat)
+    """
+    try:
+        no_porsi_list = [no_porsi.strip() for no_porsi in request.no_porsi if len(no_porsi.strip()) >= 3]
+        
+        if not no_porsi_list:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Tidak ada nomor porsi yang valid"
+            )
+        
+        registered = register_porsi(db, no_porsi_list)
+        
+        return {
+            "success": True,
+            "submitted": len(no_porsi_list),
+            "registered": registered
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error registering porsi: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error registering porsi: {str(e)}"
+        )
+
+@app.get("/dead-letters")
+async def list_dead_letters(
+    failure_class: Optional[str] = None,
+    state: Optional[Literal["dead", "replaying", "resolved"]] = "dead",
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    Task yang habis attempt budget (dead-letter queue), terbaru dulu, filter per failure_class
+    """
+    try:
+        entries, has_more = get_dead_letters(db, failure_class=failure_class, state=state, limit=page_size, offset=(page - 1) * page_size)
+        return {
+            "success": True,
+            "page": page,
+            "page_size": page_size,
+            "has_more": has_more,
+            "count": len(entries),
+            "data": [entry.to_dict() for entry in entries]
+        }
+    except Exception as e:
+        logger.error(f"Error listing dead letters: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error listing dead letters: {str(e)}"
+        )
+
+@app.get("/dead-letters/summary")
+async def dead_letter_summary(db: Session = Depends(get_db)):
+    """
+    Jumlah entry dead-letter per state dan failure_class
+    """
+    try:
+        return {
+            "success": True,
+            "data": get_dead_letter_summary(db)
+        }
+    except Exception as e:
+        logger.error(f"Error getting dead letter summary: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting dead letter summary: {str(e)}"
+        )
+
+@app.post("/dead-letters/replay")
+async def replay_dead_letters_endpoint(request: DeadLetterReplayRequest, db: Session = Depends(get_db)):
+    """
+    Replay entry dead-letter secara bertahap dengan record dan task_id yang sama.
+    Entry di-claim di sini lalu dikirim oleh task replay_dead_letters di queue maintenance.
+    """
+    try:
+        rate = request.rate or settings.dlq_replay_rate
+        limit = min(request.limit, settings.dlq_replay_max_batch)
+        if request.dry_run:
+            entries, has_more = get_dead_letters(db, failure_class=request.failure_class, limit=limit, ids=request.ids)
+            return {
+                "success": True,
+                "dry_run": True,
+                "would_replay": len(entries),
+                "has_more": has_more,
+                "estimated_seconds": round(len(entries) / rate),
+                "data": [entry.to_dict() for entry in entries]
+            }
+        
+        if not test_redis():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Redis service not available. Make sure Redis server is running."
+            )
+        
+        entries = claim_for_replay(db, failure_class=request.failure_class, ids=request.ids, limit=limit)
+        if not entries:
+            return {"success": True, "claimed": 0, "message": "Tidak ada entry dead-letter yang cocok"}
+        
+        ids = [entry.id for entry in entries]
+        try:
+            task = get_celery_app().send_task(
+                'app.tasks.replay_dead_letters',
+                kwargs={'ids': ids, 'rate': rate, 'lane': request.priority}
+            )
+        except Exception as e:
+            release_dead_letters(db, ids)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Failed to start replay. Error: {str(e)}"
+            )
+        
+        logger.info(f"Dead letter replay started: {len(ids)} entries at {rate}/s to lane {request.priority}")
+        return {
+            "success": True,
+            "claimed": len(ids),
+            "replay_task_id": task.id,
+            "rate": rate,
+            "priority": request.priority,
+            "estimated_seconds": round(len(ids) / rate)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error replaying dead letters: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error replaying dead letters: {str(e)}"
+        )
+
+@app.get("/search")
+async def search_porsi_endpoint(
+    q: str = Query(..., min_length=3, max_length=200, description="Nama jemaah, boleh sebagian atau salah ketik"),
+    provinsi: Optional[str] = None,
+    kabupaten: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Cari jemaah berdasarkan nama di data terbaru per nomor porsi, diurutkan berdasarkan
+    kemiripan nama. Filter provinsi/kabupaten memakai nama wilayah lengkap.
+    """
+    try:
+        page_size = min(page_size, settings.search_max_page_size)
+        results, has_more = search_porsi(
+            db,
+            q,
+            provinsi=provinsi,
+            kabupaten=kabupaten,
+            limit=page_size,
+            offset=(page - 1) * page_size,
+            similarity_threshold=settings.search_similarity_threshold
+        )
+        return {
+            "success": True,
+            "query": q,
+            "page": page,
+            "page_size": page_size,
+            "has_more": has_more,
+            "count": len(results),
+            "data": results
+        }
+        
+    except Exception as e:
+        logger.error(f"Error searching porsi: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching porsi: {str(e)}"
+        )
+
+@app.get("/stats")
+async def get_porsi_stats(
+    request: Request,
+    group_by: str = "provinsi",
+    provinsi: Optional[str] = None,
+    kabupaten: Optional[str] = None,
+    year: Optional[int] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    payment_status: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Jumlah porsi per provinsi/kabupaten/tahun keberangkatan/status bayar dari tabel rollup.
+    group_by berisi dimensi dipisah koma, mis. group_by=kabupaten,departure_year&provinsi=Jawa Barat
+    """
+    try:
+        dimensions = [dimension.strip() for dimension in group_by.split(",") if dimension.strip()]
+        unknown = [dimension for dimension in dimensions if dimension not in ROLLUP_DIMENSIONS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"group_by tidak dikenal: {', '.join(unknown)}. Pilihan: {', '.join(ROLLUP_DIMENSIONS)}"
+            )
+        if year is not None:
+            year_from = year_to = year
+        
+        filters = {
+            "provinsi": provinsi,
+            "kabupaten": kabupaten,
+            "year_from": year_from,
+            "year_to": year_to,
+            "payment_status": payment_status,
+        }
+        rows = get_stats_cache().get_or_compute(
+            {"group_by": dimensions, **filters},
+            lambda: get_rollup_stats(db, dimensions, **filters)
+        )
+        
+        content = {
+            "success": True,
+            "group_by": dimensions,
+            "filters": {key: value for key, value in filters.items() if value is not None},
+            "total": sum(row["porsi_count"] for row in rows),
+            "count": len(rows),
+            "data": rows
+        }
+        return conditional_json(
+            request,
+            content,
+            etag=body_etag(content),
+            cache_control=f"public, max-age={settings.stats_cache_ttl_seconds}"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting stats: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting stats: {str(e)}"
+        )
+
+@app.get("/lanes")
+async def get_lanes_stats():
+    """
+    Kedalaman queue dan waktu tunggu (p50/p95/p99) per priority lane
+    """
+    try:
+        return {
+            "success": True,
+            "data": get_lane_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error getting lane stats: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Error getting lane stats: {str(e)}"
+        )
+
+@app.get("/profiles")
+async def get_scrape_profiles():
+    """
+    Preset scrape profile yang bisa dipakai di POST /enqueue
+    """
+    return {
+        "success": True,
+        "data": {name: profile.model_dump() for name, profile in PROFILE_PRESETS.items()}
+    }
+
+@app.get("/rate-limit")
+async def get_rate_limit_stats():
+    """
+    Status rate limiter upstream: rate saat ini, waktu tunggu dan throttle events
+    """
+    try:
+        return {
+            "success": True,
+            "data": get_rate_limiter().get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error getting rate limit stats: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Error getting rate limit stats: {str(e)}"
+        )
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics endpoint
+    """
+    return Response(content=render_api_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/favicon.ico")
 async def favicon():
     """Handle favicon requests"""
@@ -323,25 +829,39 @@ async def health_check():
     try:
         services = {}
         
-        # Test database
+        # Test database (cek yang blocking dijalankan di threadpool)
         try:
-            db_healthy = test_connection()
+            db_healthy = await run_in_threadpool(test_connection)
             services["database"] = "healthy" if db_healthy else "unhealthy"
         except Exception as e:
             services["database"] = f"unhealthy: {str(e)}"
         
+        if has_read_replica():
+            try:
+                replica_healthy = await run_in_threadpool(test_connection, read_engine)
+                services["database_replica"] = "healthy" if replica_healthy else "unhealthy"
+            except Exception as e:
+                services["database_replica"] = f"unhealthy: {str(e)}"
+        
         # Test Redis
         try:
-            redis_healthy = test_redis()
+            redis_healthy = await run_in_threadpool(test_redis)
             services["redis"] = "healthy" if redis_healthy else "unhealthy"
         except Exception as e:
             services["redis"] = f"unhealthy: {str(e)}"
         
+        # Upstream circuit breaker
+        try:
+            breaker_state = await run_in_threadpool(get_circuit_breaker().get_state)
+            services["upstream"] = "healthy" if breaker_state["state"] == "closed" else "unhealthy: circuit breaker open"
+        except Exception as e:
+            services["upstream"] = f"unhealthy: {str(e)}"
+        
         # Test Celery
         try:
             # Check if we can inspect Celery
-            inspect = celery_app.control.inspect()
-            active_tasks = inspect.active()
+            inspect = get_celery_app().control.inspect()
+            active_tasks = await run_in_threadpool(inspect.active)
             services["celery"] = "healthy" if active_tasks is not None else "unhealthy"
         except Exception as e:
             services["celery"] = f"unhealthy: {str(e)}"
@@ -364,6 +884,28 @@ async def health_check():
             services={"error": str(e)}
         )
 
+def startup_failed() -> bool:
+    """True jika salah satu cek startup sudah selesai dan gagal (pending belum dihitung gagal)"""
+    return any(
+        value == "unhealthy" or value.startswith("error")
+        for value in startup_state.values()
+    )
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness probe: langsung 200 setelah proses siap menerima request, tanpa
+    menunggu cek dependency saat startup. 503 jika salah satu cek sudah gagal,
+    agar instance dikeluarkan dari rotasi.
+    """
+    failed = startup_failed()
+    if failed:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "success": not failed,
+        "startup": startup_state
+    }
+
 @app.get("/")
 async def root():
     """
@@ -381,13 +923,25 @@ async def root():
             "scraper": "Selenium + OCR"
         },
         "endpoints": {
-            "POST /enqueue": "Enqueue scraping task",
+            "POST /enqueue": "Enqueue scraping task (priority: interactive, normal, bulk; profile: preset or custom)",
+            "GET /profiles": "Available scrape profile presets",
             "GET /status/{task_id}": "Get task status from Redis",
+            "GET /traces/{task_id}": "Get sampled trace timeline for a task",
             "GET /records/{record_id}": "Get permanent record from database",
             "GET /records/by-task/{task_id}": "Get record by task ID",
             "GET /records/by-porsi/{no_porsi}": "Get records by nomor porsi",
-            "GET /files/{filename}": "Download screenshot file",
+            "GET /files/{filename}": "Download screenshot file (?w= for a cached thumbnail)",
+            "POST /schedule/porsi": "Register nomor porsi for periodic re-scrape",
+            "GET /dead-letters": "Tasks that exhausted their attempt budget, filtered by failure_class",
+            "GET /dead-letters/summary": "Dead-letter counts per state and failure_class",
+            "POST /dead-letters/replay": "Replay dead-lettered tasks at a controlled rate, reusing their records",
+            "GET /rate-limit": "Upstream rate limiter state and throttle events",
+            "GET /lanes": "Queue depth and wait time per priority lane",
+            "GET /search?q=": "Fuzzy search pilgrims by name, filtered by provinsi/kabupaten",
+            "GET /stats": "Porsi counts by provinsi/kabupaten/departure year/payment status",
             "GET /health": "Health check",
+            "GET /ready": "Readiness probe (does not wait for dependencies)",
+            "GET /metrics": "Prometheus metrics",
             "GET /docs": "API Documentation (Swagger UI)",
             "GET /redoc": "API Documentation (ReDoc)"
         },
@@ -0,0 +1,233 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import logging
+import os
+import time
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client import multiprocess
+from .config import settings
+from .tracing import child_span, span
+
+logger = logging.getLogger(__name__)
+
+# Nama scrape profile (app.profiles) yang sedang dijalankan, dipakai sebagai label metrics
+_current_profile: ContextVar[str] = ContextVar('scrape_profile', default='full')
+
+# Tahap scraping: driver_startup, page_load, captcha_ocr, result_wait,
+# field_extraction, screenshot_write, standby_prepare (di thread standby pool)
+STAGE_SECONDS = Histogram(
+    'kemenag_scrape_stage_seconds',
+    'Durasi per tahap scraping',
+    ['stage', 'profile'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+)
+
+SCRAPE_SECONDS = Histogram(
+    'kemenag_scrape_seconds',
+    'Durasi satu sesi scraping (browser sampai data) per profile',
+    ['profile'],
+    buckets=(1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90, 120)
+)
+
+CAPTCHA_ATTEMPTS_PER_SUCCESS = Histogram(
+    'kemenag_captcha_attempts_per_success',
+    'Jumlah percobaan captcha sampai hasil didapat',
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10)
+)
+
+DB_WRITE_SECONDS = Histogram(
+    'kemenag_db_write_seconds',
+    'Durasi operasi tulis database di app.crud',
+    ['operation'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+SCRAPE_OUTCOMES = Counter(
+    'kemenag_scrape_outcomes_total',
+    'Hasil akhir eksekusi task scraping',
+    ['outcome', 'profile']
+)
+
+TASKS_IN_FLIGHT = Gauge(
+    'kemenag_tasks_in_flight',
+    'Task scraping yang sedang dieksekusi',
+    multiprocess_mode='livesum'
+)
+
+# Autoscaler worker (app.autoscale), diekspor dari proses utama worker
+AUTOSCALE_DECISIONS = Counter(
+    'kemenag_autoscale_decisions_total',
+    'Keputusan autoscaler per arah dan alasan',
+    ['direction', 'reason']
+)
+
+POOL_PROCESSES = Gauge(
+    'kemenag_worker_pool_processes',
+    'Jumlah proses pool worker (current) dan target autoscaler (target)',
+    ['kind'],
+    multiprocess_mode='livemax'
+)
+
+WORKER_MEMORY_MB = Gauge(
+    'kemenag_worker_memory_mb',
+    'RSS worker: total, chrome (Chrome/chromedriver) dan rata-rata per slot aktif',
+    ['kind'],
+    multiprocess_mode='livemax'
+)
+
+ORPHANS_REAPED = Counter(
+    'kemenag_orphan_browser_processes_reaped_total',
+    'Proses chromedriver/Chrome yatim yang dihentikan autoscaler'
+)
+
+# target: replica, primary (tidak ada replica) atau primary_recent_write (read-your-writes)
+DB_READ_ROUTES = Counter(
+    'kemenag_db_read_routes_total',
+    'Session baca endpoint GET per target database',
+    ['target']
+)
+
+# reason: sampled, rate_limited, queue_full
+LOG_RECORDS_DROPPED = Counter(
+    'kemenag_log_records_dropped_total',
+    'Record log yang tidak ditulis oleh pipeline logging',
+    ['reason']
+)
+
+# Standby page (app.services.standby_pages). result: hit, miss, expired
+STANDBY_TAKES = Counter(
+    'kemenag_standby_takes_total',
+    'Task scraping yang mendapat (atau tidak) standby page siap pakai',
+    ['result']
+)
+
+# result: ready, low_confidence, upstream_error, driver_error, rate_limited
+STANDBY_PREPARES = Counter(
+    'kemenag_standby_prepares_total',
+    'Hasil penyiapan standby page dan percobaan captcha-nya',
+    ['result']
+)
+
+# Dead-letter queue (app.dead_letters)
+DEAD_LETTERS = Counter(
+    'kemenag_dead_letters_total',
+    'Task scraping yang masuk dead-letter queue setelah attempt budget habis',
+    ['failure_class']
+)
+
+# result: sent, released (tidak terkirim, kembali ke state dead)
+DEAD_LETTER_REPLAYS = Counter(
+    'kemenag_dead_letter_replays_total',
+    'Entry dead-letter yang dikirim ulang ke lane scraping',
+    ['failure_class', 'result']
+)
+
+def current_profile() -> str:
+    return _current_profile.get()
+
+@contextmanager
+def profile_label(profile: str):
+    """Set label profile untuk semua metrics tahap scraping di dalam blok ini"""
+    token = _current_profile.set(profile)
+    try:
+        yield
+    finally:
+        _current_profile.reset(token)
+
+@contextmanager
+def time_stage(stage: str, parent=None):
+    """
+    Ukur durasi satu tahap scraping (histogram + span trace). parent dari
+    tracing.span_parent() dipakai untuk tahap yang berjalan di thread lain.
+    """
+    started = time.perf_counter()
+    try:
+        with (child_span(parent, stage) if parent is not None else span(stage)):
+            yield
+    finally:
+        STAGE_SECONDS.labels(stage=stage, profile=_current_profile.get()).observe(time.perf_counter() - started)
+
+def timed_db_write(operation: str):
+    """Decorator untuk mengukur durasi fungsi tulis di app.crud"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                with span(f"db.{operation}"):
+                    return func(*args, **kwargs)
+            finally:
+                DB_WRITE_SECONDS.labels(operation=operation).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+class UpstreamCollector:
+    """Gauge yang dibaca dari Redis saat scrape: kedalaman queue per lane dan state upstream"""
+
+    def collect(self):
+        # Import di sini agar modul metrics tidak bergantung pada dispatch/services saat import
+        from .lanes import LANE_QUEUES
+        from .services.circuit_breaker import get_circuit_breaker
+        from .services.rate_limiter import get_rate_limiter
+        import redis
+
+        depth = GaugeMetricFamily('kemenag_queue_depth', 'Pesan yang menunggu per lane', labels=['lane'])
+        try:
+            r = redis.from_url(settings.redis_url)
+            for lane, queue in LANE_QUEUES.items():
+                depth.add_metric([lane], r.llen(queue))
+        except Exception as e:
+            logger.warning(f"Error collecting queue depth: {str(e)}")
+        yield depth
+
+        try:
+            stats = get_rate_limiter().get_stats()
+            yield GaugeMetricFamily('kemenag_upstream_rate', 'Rate token bucket upstream saat ini (req/s)', value=stats['current_rate'])
+            throttles = GaugeMetricFamily('kemenag_upstream_throttle_events', 'Jumlah throttle event per alasan', labels=['reason'])
+            for reason, count in stats['throttle_events'].items():
+                throttles.add_metric([reason], count)
+            yield throttles
+            yield GaugeMetricFamily('kemenag_upstream_wait_seconds', 'Total waktu tunggu rate limiter', value=stats['wait_seconds_total'])
+            breaker_open = 1 if get_circuit_breaker().is_open() else 0
+            yield GaugeMetricFamily('kemenag_circuit_breaker_open', '1 jika circuit breaker upstream terbuka', value=breaker_open)
+        except Exception as e:
+            logger.warning(f"Error collecting upstream metrics: {str(e)}")
+
+def build_registry() -> CollectorRegistry:
+    """Registry untuk exporter; memakai multiprocess mode jika PROMETHEUS_MULTIPROC_DIR di-set"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+_api_registry = None
+
+def render_api_metrics() -> bytes:
+    """Output /metrics untuk API, termasuk gauge queue dan upstream"""
+    global _api_registry
+    if _api_registry is None:
+        _api_registry = build_registry()
+        _api_registry.register(UpstreamCollector())
+    return generate_latest(_api_registry)
+
+def start_worker_exporter():
+    """
+    Jalankan HTTP exporter di proses utama worker Celery.
+    Worker prefork perlu PROMETHEUS_MULTIPROC_DIR agar metrics dari child process ikut terbaca.
+    """
+    try:
+        start_http_server(settings.worker_metrics_port, registry=build_registry())
+        logger.info(f"Worker metrics exporter listening on port {settings.worker_metrics_port}")
+    except OSError as e:
+        logger.warning(f"Worker metrics exporter not started: {str(e)}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer
+from sqlalchemy import Column, String, DateTime, Text, Integer, Float, BigInteger, LargeBinary, ForeignKey, SmallInteger, UniqueConstraint, Index, JSON
 from sqlalchemy.dialects.postgresql import VARCHAR, UUID
 from datetime import datetime
 import uuid
@@ -21,6 +21,14 @@ class ScrapeRecord(Base):
     estimasi_keberangkatan = Column(VARCHAR(3000), nullable=True)
     waktu_permintaan_informasi = Column(VARCHAR(3000), nullable=True)
     
+    # Kolom bertipe hasil services.field_parser
+    departure_year = Column(SmallInteger, nullable=True)
+    departure_hijri_year = Column(SmallInteger, nullable=True)
+    requested_at = Column(DateTime, nullable=True)
+    quota_class = Column(String(20), nullable=True)
+    payment_status = Column(String(20), nullable=True)
+    parser_version = Column(SmallInteger, nullable=True)
+    
     # File info
     screenshot_filename = Column(String(500), nullable=True)
     screenshot_url = Column(String(1000), nullable=True)
@@ -28,6 +36,8 @@ class ScrapeRecord(Base):
     # Processing info
     attempts_used = Column(Integer, default=0)
     error_message = Column(Text, nullable=True)
+    # Klasifikasi kegagalan: upstream_unavailable, captcha_exhausted, driver_error, exception
+    failure_class = Column(String(50), nullable=True, index=True)
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -49,16 +59,33 @@ class ScrapeRecord(Base):
             "status_bayar": self.status_bayar,
             "estimasi_keberangkatan": self.estimasi_keberangkatan,
             "waktu_permintaan_informasi": self.waktu_permintaan_informasi,
+            "departure_year": self.departure_year,
+            "departure_hijri_year": self.departure_hijri_year,
+            "requested_at": self.requested_at.isoformat() if self.requested_at else None,
+            "quota_class": self.quota_class,
+            "payment_status": self.payment_status,
             "screenshot_filename": self.screenshot_filename,
             "screenshot_url": self.screenshot_url,
             "attempts_used": self.attempts_used,
             "error_message": self.error_message,
+            "failure_class": self.failure_class,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
+class ScrapeSnapshot(Base):
+    __tablename__ = "scrape_snapshots"
+    
+    # Primary key integer agar replay bisa paging dengan keyset
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    record_id = Column(UUID(as_uuid=True), ForeignKey("scrape_records.id", ondelete="CASCADE"), unique=True, index=True, nullable=False)
+    html_zlib = Column(LargeBinary, nullable=False)
+    extractor_version = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    replayed_at = Column(DateTime, nullable=True)
+
 class Transaction(Base):
     __tablename__ = "transaction"
     
@@ -72,4 +99,134 @@ class Transaction(Base):
     estimasi_keberangkatan = Column(VARCHAR(3000), nullable=True)
     waktu_permintaan_informasi = Column(VARCHAR(3000), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PorsiSchedule(Base):
+    __tablename__ = "porsi_schedule"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    no_porsi = Column(VARCHAR(3000), unique=True, index=True, nullable=False)
+    
+    # Freshness tracking
+    content_hash = Column(String(64), nullable=True)
+    scrape_count = Column(Integer, default=0, nullable=False)
+    change_count = Column(Integer, default=0, nullable=False)
+    change_rate = Column(Float, default=1.0, nullable=False)  # EWMA 0..1
+    
+    # Scheduling
+    last_success_at = Column(DateTime, nullable=True)
+    last_changed_at = Column(DateTime, nullable=True)
+    last_enqueued_at = Column(DateTime, nullable=True)
+    next_due_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            "no_porsi": self.no_porsi,
+            "scrape_count": self.scrape_count,
+            "change_count": self.change_count,
+            "change_rate": self.change_rate,
+            "last_success_at": self.last_success_at.isoformat() if self.last_success_at else None,
+            "last_changed_at": self.last_changed_at.isoformat() if self.last_changed_at else None,
+            "last_enqueued_at": self.last_enqueued_at.isoformat() if self.last_enqueued_at else None,
+            "next_due_at": self.next_due_at.isoformat() if self.next_due_at else None,
+        }
+
+class PorsiLatest(Base):
+    """Data terbaru per nomor porsi, sumber key untuk porsi_rollup dan pencarian nama"""
+    __tablename__ = "porsi_latest"
+    __table_args__ = (
+        # GIN trigram untuk pencarian nama parsial/salah ketik (butuh extension pg_trgm, lihat app.schema)
+        Index('ix_porsi_latest_nama_trgm', 'nama', postgresql_using='gin', postgresql_ops={'nama': 'gin_trgm_ops'}),
+        Index('ix_porsi_latest_region', 'provinsi', 'kabupaten'),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    no_porsi = Column(VARCHAR(3000), unique=True, index=True, nullable=False)
+    record_id = Column(UUID(as_uuid=True), nullable=True)
+    
+    nama = Column(VARCHAR(3000), nullable=True)
+    provinsi = Column(VARCHAR(3000), nullable=True)
+    kabupaten = Column(VARCHAR(3000), nullable=True)
+    departure_year = Column(SmallInteger, nullable=True)
+    departure_hijri_year = Column(SmallInteger, nullable=True)
+    requested_at = Column(DateTime, nullable=True)
+    quota_class = Column(String(20), nullable=True)
+    payment_status = Column(String(20), nullable=True)
+    scraped_at = Column(DateTime, nullable=True)  # completed_at record sumber, untuk newest-wins
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PorsiRollup(Base):
+    """
+    Jumlah porsi per provinsi/kabupaten/tahun keberangkatan/status bayar, dipelihara
+    inkremental setiap kali porsi_latest berubah. Nilai kosong disimpan sebagai ''/0
+    agar unique constraint berlaku.
+    """
+    __tablename__ = "porsi_rollup"
+    __table_args__ = (
+        UniqueConstraint('provinsi', 'kabupaten', 'departure_year', 'payment_status', name='uq_porsi_rollup_key'),
+        Index('ix_porsi_rollup_year_provinsi', 'departure_year', 'provinsi'),
+    )
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    provinsi = Column(VARCHAR(255), nullable=False, default='')
+    kabupaten = Column(VARCHAR(255), nullable=False, default='')
+    departure_year = Column(SmallInteger, nullable=False, default=0)
+    payment_status = Column(String(20), nullable=False, default='')
+    porsi_count = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DeadLetter(Base):
+    """
+    Dead-letter queue: task scraping yang habis attempt budget-nya. Satu baris per
+    scrape_record; replay memakai ulang record dan task_id yang sama (lihat app.dead_letters).
+    """
+    __tablename__ = "dead_letters"
+    __table_args__ = (
+        # Triage per class dan replay urut waktu gagal
+        Index('ix_dead_letters_state_class_failed', 'state', 'failure_class', 'failed_at'),
+    )
+    
+    # Primary key integer agar listing bisa paging dengan keyset
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    record_id = Column(UUID(as_uuid=True), ForeignKey("scrape_records.id", ondelete="CASCADE"), unique=True, nullable=False)
+    task_id = Column(String(255), nullable=False)
+    no_porsi = Column(VARCHAR(3000), nullable=False, index=True)
+    failure_class = Column(String(50), nullable=False)
+    error_message = Column(Text, nullable=True)
+    attempts_used = Column(Integer, default=0, nullable=False)
+    profile = Column(JSON, nullable=True)  # profile task asli, dipakai lagi saat replay
+    lane = Column(String(20), nullable=True)
+    
+    state = Column(String(20), default="dead", nullable=False)  # dead, replaying, resolved
+    replay_count = Column(Integer, default=0, nullable=False)
+    failed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    replayed_at = Column(DateTime, nullable=True)
+    resolved_at = Column(DateTime, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            "id": self.id,
+            "record_id": str(self.record_id),
+            "task_id": self.task_id,
+            "no_porsi": self.no_porsi,
+            "failure_class": self.failure_class,
+            "error_message": self.error_message,
+            "attempts_used": self.attempts_used,
+            "profile": (self.profile or {}).get("name"),
+            "lane": self.lane,
+            "state": self.state,
+            "replay_count": self.replay_count,
+            "failed_at": self.failed_at.isoformat() if self.failed_at else None,
+            "replayed_at": self.replayed_at.isoformat() if self.replayed_at else None,
+            "resolved_at": self.resolved_at.isoformat() if self.resolved_at else None,
+        }
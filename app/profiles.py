@@ -0,0 +1,49 @@
+from typing import Dict, List, Optional, Union
+from pydantic import BaseModel, Field, field_validator
+from .services.extraction import SCRAPED_FIELDS
+
+class ScrapeProfile(BaseModel):
+    """Menentukan langkah scraping mana yang dijalankan untuk satu request"""
+    name: str = "custom"
+    fields: List[str] = Field(default_factory=lambda: list(SCRAPED_FIELDS))
+    screenshot: bool = True
+    screenshot_quality: Optional[int] = Field(default=None, ge=1, le=100)  # None = settings.screenshot_quality
+    persist_transaction: bool = True
+
+    @field_validator('fields')
+    @classmethod
+    def validate_fields(cls, value: List[str]) -> List[str]:
+        unknown = [field for field in value if field not in SCRAPED_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(SCRAPED_FIELDS)}")
+        if not value:
+            raise ValueError("At least one field is required")
+        return list(dict.fromkeys(value))
+
+PROFILE_PRESETS: Dict[str, ScrapeProfile] = {
+    # Perilaku lama: semua field, screenshot dan insert ke transaction
+    "full": ScrapeProfile(name="full"),
+    # Hanya estimasi keberangkatan, tanpa screenshot dan tanpa transaction
+    "estimasi": ScrapeProfile(
+        name="estimasi",
+        fields=["estimasi_keberangkatan"],
+        screenshot=False,
+        persist_transaction=False
+    ),
+    # Semua field tanpa screenshot
+    "data_only": ScrapeProfile(name="data_only", screenshot=False),
+}
+
+DEFAULT_PROFILE = PROFILE_PRESETS["full"]
+
+def resolve_profile(value: Union[str, Dict, ScrapeProfile, None]) -> ScrapeProfile:
+    """Profile dari nama preset, dict (payload Celery) atau objek ScrapeProfile"""
+    if value is None:
+        return DEFAULT_PROFILE
+    if isinstance(value, ScrapeProfile):
+        return value
+    if isinstance(value, str):
+        if value not in PROFILE_PRESETS:
+            raise ValueError(f"Unknown profile '{value}'. Available: {', '.join(PROFILE_PRESETS)}")
+        return PROFILE_PRESETS[value]
+    return ScrapeProfile(**value)
@@ -0,0 +1,48 @@
+"""
+Protokol progress dan hasil task yang ringkas di result backend Celery.
+
+Setiap update_state adalah satu SET ke Redis. Update PROGRESS yang jaraknya lebih
+rapat dari settings.progress_min_interval_seconds digabung (yang lama dibuang,
+karena update berikutnya menggantikannya), dan hasil SUCCESS hanya berisi referensi
+ke record database, bukan scraped_data lengkap.
+"""
+from typing import Callable, Dict, Optional
+import time
+from .config import settings
+
+class ProgressReporter:
+    """Throttle update_state PROGRESS untuk satu eksekusi task"""
+
+    def __init__(self, task, min_interval: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.task = task
+        self.min_interval = settings.progress_min_interval_seconds if min_interval is None else min_interval
+        self.clock = clock
+        self.writes = 0
+        self.skipped = 0
+        self._last_write: Optional[float] = None
+
+    def update(self, status: str, progress: int, force: bool = False) -> bool:
+        """Return True jika state benar-benar ditulis ke backend"""
+        now = self.clock()
+        if not force and self._last_write is not None and now - self._last_write < self.min_interval:
+            self.skipped += 1
+            return False
+        self.task.update_state(state='PROGRESS', meta={'status': status, 'progress': progress})
+        self._last_write = now
+        self.writes += 1
+        return True
+
+def result_summary(record_id: Optional[str], no_porsi: str, attempts_used: int, filename: Optional[str] = None) -> Dict:
+    """
+    Nilai return task yang disimpan backend sebagai hasil SUCCESS.
+    Data lengkap diambil dari GET /records/{record_id}.
+    """
+    summary = {
+        'status': 'SUCCESS',
+        'record_id': record_id,
+        'no_porsi': no_porsi,
+        'attempts_used': attempts_used,
+    }
+    if filename:
+        summary['filename'] = filename
+    return summary
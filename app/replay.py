@@ -0,0 +1,134 @@
+"""
+Replay ekstraksi field dari snapshot HTML yang tersimpan, tanpa Chrome.
+
+    python -m app.replay --workers 8 --batch-size 2000
+    python -m app.replay --all --dry-run
+
+Secara default hanya snapshot dengan extractor_version lebih lama dari
+EXTRACTOR_VERSION yang diproses, sehingga replay bisa dihentikan dan dilanjutkan.
+Kolom bertipe ikut diperbarui; jalankan `python -m app.rollups --backfill --rebuild`
+setelahnya agar /stats memakai hasil replay.
+"""
+from concurrent.futures import ProcessPoolExecutor, Future
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+import argparse
+import logging
+import time
+
+from .database import get_db_session
+from .models import ScrapeRecord, ScrapeSnapshot
+from .services.extraction import (
+    EXTRACTOR_VERSION,
+    SCRAPED_FIELDS,
+    decompress_html,
+    extract_fields_from_html,
+)
+from .services.field_parser import PARSER_VERSION, parse_scraped_fields
+
+logger = logging.getLogger(__name__)
+
+def extract_batch(batch: List[Tuple[int, str, bytes]]) -> Tuple[List[int], List[Dict], int]:
+    """Jalan di worker process: decompress + ekstraksi untuk satu batch snapshot"""
+    snapshot_ids = []
+    mappings = []
+    errors = 0
+    for snapshot_id, record_id, html_zlib in batch:
+        snapshot_ids.append(snapshot_id)
+        try:
+            fields = extract_fields_from_html(decompress_html(html_zlib))
+        except Exception:
+            errors += 1
+            continue
+        mapping = {'id': record_id}
+        mapping.update({field: fields.get(field) for field in SCRAPED_FIELDS})
+        mapping.update(parse_scraped_fields(fields))
+        mapping['parser_version'] = PARSER_VERSION
+        mappings.append(mapping)
+    return snapshot_ids, mappings, errors
+
+def iter_batches(batch_size: int, replay_all: bool) -> Iterator[List[Tuple[int, str, bytes]]]:
+    """Baca snapshot per batch dengan keyset pagination pada id"""
+    db = get_db_session()
+    try:
+        last_id = 0
+        while True:
+            query = db.query(
+                ScrapeSnapshot.id,
+                ScrapeSnapshot.record_id,
+                ScrapeSnapshot.html_zlib
+            ).filter(ScrapeSnapshot.id > last_id)
+            if not replay_all:
+                query = query.filter(ScrapeSnapshot.extractor_version < EXTRACTOR_VERSION)
+            rows = query.order_by(ScrapeSnapshot.id.asc()).limit(batch_size).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield [(row.id, row.record_id, bytes(row.html_zlib)) for row in rows]
+    finally:
+        db.close()
+
+def write_batch(snapshot_ids: List[int], mappings: List[Dict], dry_run: bool):
+    """Tulis field hasil replay dan tandai snapshot dalam satu transaksi"""
+    if dry_run:
+        return
+    db = get_db_session()
+    try:
+        now = datetime.utcnow()
+        for mapping in mappings:
+            mapping['updated_at'] = now
+        db.bulk_update_mappings(ScrapeRecord, mappings)
+        db.bulk_update_mappings(ScrapeSnapshot, [
+            {'id': snapshot_id, 'extractor_version': EXTRACTOR_VERSION, 'replayed_at': now}
+            for snapshot_id in snapshot_ids
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def run_replay(workers: int, batch_size: int, replay_all: bool = False, dry_run: bool = False) -> Dict:
+    """Pipeline: baca batch di proses utama, ekstraksi di process pool, tulis balik secara bulk"""
+    started = time.monotonic()
+    totals = {'snapshots': 0, 'updated': 0, 'errors': 0}
+    # Batasi batch yang sedang diproses agar memori tetap konstan
+    max_in_flight = workers * 2
+    in_flight: List[Future] = []
+
+    def drain(block_until: int):
+        while len(in_flight) > block_until:
+            snapshot_ids, mappings, errors = in_flight.pop(0).result()
+            write_batch(snapshot_ids, mappings, dry_run)
+            totals['snapshots'] += len(snapshot_ids)
+            totals['updated'] += len(mappings)
+            totals['errors'] += errors
+            elapsed = time.monotonic() - started
+            logger.info(f"Replayed {totals['snapshots']} snapshots ({totals['snapshots'] / elapsed:.0f}/s), errors: {totals['errors']}")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in iter_batches(batch_size, replay_all):
+            in_flight.append(pool.submit(extract_batch, batch))
+            drain(max_in_flight - 1)
+        drain(0)
+
+    totals['elapsed_seconds'] = round(time.monotonic() - started, 2)
+    totals['extractor_version'] = EXTRACTOR_VERSION
+    totals['dry_run'] = dry_run
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay ekstraksi field dari snapshot HTML tanpa browser")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--all", action="store_true", help="Proses semua snapshot, bukan hanya versi lama")
+    parser.add_argument("--dry-run", action="store_true", help="Ekstraksi tanpa menulis ke database")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    totals = run_replay(args.workers, args.batch_size, args.all, args.dry_run)
+    logger.info(f"Replay completed: {totals}")
+
+if __name__ == "__main__":
+    main()
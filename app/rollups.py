@@ -0,0 +1,181 @@
+"""
+Backfill kolom bertipe dan rebuild tabel rollup analitik untuk /stats.
+
+    python -m app.rollups --backfill --rebuild
+    python -m app.rollups --backfill --all --batch-size 5000
+    python -m app.rollups --rebuild
+
+--backfill mem-parse ulang record SUCCESS dengan parser_version lebih lama dari
+PARSER_VERSION (atau semua record dengan --all) dan memperbarui porsi_latest
+(record terbaru per porsi yang menang). --rebuild menghitung ulang porsi_rollup
+dari porsi_latest dalam satu transaksi; worker tetap memelihara rollup secara
+inkremental setelahnya.
+"""
+from typing import Dict, Iterator, List, Optional
+import argparse
+import logging
+import time
+
+from sqlalchemy import func, or_
+
+from .database import get_db_session
+from .models import PorsiLatest, PorsiRollup, ScrapeRecord
+from .services.field_parser import PARSED_FIELDS, PARSER_VERSION, normalize_name, normalize_region, parse_scraped_fields
+
+logger = logging.getLogger(__name__)
+
+RAW_COLUMNS = (
+    ScrapeRecord.id,
+    ScrapeRecord.no_porsi,
+    ScrapeRecord.nama,
+    ScrapeRecord.provinsi,
+    ScrapeRecord.kabupaten,
+    ScrapeRecord.kuota_provinsi_kab_kota_khusus,
+    ScrapeRecord.status_bayar,
+    ScrapeRecord.estimasi_keberangkatan,
+    ScrapeRecord.waktu_permintaan_informasi,
+    ScrapeRecord.completed_at,
+)
+
+def iter_records(db, batch_size: int, backfill_all: bool) -> Iterator[List]:
+    """Record SUCCESS per batch dengan keyset pagination pada created_at, id"""
+    last = None
+    while True:
+        query = db.query(*RAW_COLUMNS, ScrapeRecord.created_at).filter(ScrapeRecord.status == "SUCCESS")
+        if not backfill_all:
+            query = query.filter(or_(ScrapeRecord.parser_version.is_(None), ScrapeRecord.parser_version < PARSER_VERSION))
+        if last is not None:
+            created_at, record_id = last
+            query = query.filter(or_(
+                ScrapeRecord.created_at > created_at,
+                (ScrapeRecord.created_at == created_at) & (ScrapeRecord.id > record_id)
+            ))
+        rows = query.order_by(ScrapeRecord.created_at.asc(), ScrapeRecord.id.asc()).limit(batch_size).all()
+        if not rows:
+            return
+        last = (rows[-1].created_at, rows[-1].id)
+        yield rows
+
+def merge_latest(current: Optional[Dict], values: Dict) -> Dict:
+    """
+    Gabungkan nilai record ke kandidat porsi_latest seperti crud.update_porsi_rollup:
+    field None (tidak di-scrape, mis. profile estimasi) mempertahankan nilai sebelumnya.
+    Record yang lebih lama hanya mengisi field yang masih kosong.
+    """
+    if current is None:
+        return dict(values)
+    newer = values['scraped_at'] >= current['scraped_at']
+    merged = dict(current)
+    for field, value in values.items():
+        if value is not None and (newer or merged.get(field) is None):
+            merged[field] = value
+    return merged
+
+def upsert_latest(db, newest: Dict[str, Dict]) -> int:
+    """
+    Update porsi_latest untuk satu batch; record yang lebih lama dari data tersimpan
+    dilewati dan field None tidak menimpa nilai tersimpan.
+    """
+    existing = {
+        latest.no_porsi: latest
+        for latest in db.query(PorsiLatest).filter(PorsiLatest.no_porsi.in_(list(newest)))
+    }
+    updated = 0
+    for no_porsi, values in newest.items():
+        latest = existing.get(no_porsi)
+        if latest is None:
+            latest = PorsiLatest(no_porsi=no_porsi)
+            db.add(latest)
+        elif latest.scraped_at and values['scraped_at'] and values['scraped_at'] < latest.scraped_at:
+            continue
+        for field, value in values.items():
+            if value is not None:
+                setattr(latest, field, value)
+        updated += 1
+    return updated
+
+def backfill(batch_size: int, backfill_all: bool) -> Dict:
+    """Parse ulang field mentah ke kolom bertipe dan isi porsi_latest"""
+    db = get_db_session()
+    stats = {'records': 0, 'latest_updated': 0}
+    try:
+        for rows in iter_records(db, batch_size, backfill_all):
+            mappings = []
+            newest: Dict[str, Dict] = {}
+            for row in rows:
+                parsed = parse_scraped_fields({
+                    'kuota_provinsi_kab_kota_khusus': row.kuota_provinsi_kab_kota_khusus,
+                    'status_bayar': row.status_bayar,
+                    'estimasi_keberangkatan': row.estimasi_keberangkatan,
+                    'waktu_permintaan_informasi': row.waktu_permintaan_informasi,
+                })
+                mappings.append({'id': row.id, 'parser_version': PARSER_VERSION, **parsed})
+
+                newest[row.no_porsi] = merge_latest(newest.get(row.no_porsi), {
+                    'record_id': row.id,
+                    'nama': normalize_name(row.nama),
+                    'provinsi': normalize_region(row.provinsi),
+                    'kabupaten': normalize_region(row.kabupaten),
+                    'scraped_at': row.completed_at or row.created_at,
+                    **{field: parsed[field] for field in PARSED_FIELDS},
+                })
+
+            db.bulk_update_mappings(ScrapeRecord, mappings)
+            stats['latest_updated'] += upsert_latest(db, newest)
+            db.commit()
+            stats['records'] += len(rows)
+            logger.info(f"Backfilled {stats['records']} records")
+        return stats
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def rebuild() -> int:
+    """Hitung ulang porsi_rollup dari porsi_latest (DELETE + INSERT ... SELECT ... GROUP BY)"""
+    db = get_db_session()
+    try:
+        dimensions = [
+            func.coalesce(PorsiLatest.provinsi, ''),
+            func.coalesce(PorsiLatest.kabupaten, ''),
+            func.coalesce(PorsiLatest.departure_year, 0),
+            func.coalesce(PorsiLatest.payment_status, ''),
+        ]
+        select = db.query(*dimensions, func.count(PorsiLatest.id), func.max(PorsiLatest.updated_at)) \
+            .group_by(*dimensions).statement
+        db.query(PorsiRollup).delete(synchronize_session=False)
+        db.execute(PorsiRollup.__table__.insert().from_select(
+            ['provinsi', 'kabupaten', 'departure_year', 'payment_status', 'porsi_count', 'updated_at'],
+            select
+        ))
+        db.commit()
+        return db.query(func.count(PorsiRollup.id)).scalar() or 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Backfill kolom bertipe dan rebuild porsi_rollup")
+    parser.add_argument("--backfill", action="store_true", help="Parse ulang record ke kolom bertipe dan porsi_latest")
+    parser.add_argument("--all", action="store_true", help="Backfill semua record, bukan hanya parser_version lama")
+    parser.add_argument("--rebuild", action="store_true", help="Hitung ulang porsi_rollup dari porsi_latest")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+    if not (args.backfill or args.rebuild):
+        parser.error("pilih minimal satu dari --backfill atau --rebuild")
+
+    if args.backfill:
+        started = time.perf_counter()
+        stats = backfill(args.batch_size, args.all)
+        logger.info(f"Backfill done in {time.perf_counter() - started:.1f}s: {stats}")
+    if args.rebuild:
+        started = time.perf_counter()
+        buckets = rebuild()
+        logger.info(f"Rollup rebuilt in {time.perf_counter() - started:.1f}s: {buckets} buckets")
+
+if __name__ == "__main__":
+    main()
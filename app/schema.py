@@ -0,0 +1,63 @@
+"""
+Manajemen schema database, dipisah dari import time API.
+
+    python -m app.schema
+
+Dijalankan sekali per deploy (mis. sebagai job sebelum rollout). Untuk development,
+API tetap membuat tabel di background saat startup jika settings.auto_create_schema aktif.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+def add_missing_columns(engine, metadata):
+    """
+    Tambahkan kolom nullable baru ke tabel yang sudah ada (ALTER TABLE ADD COLUMN).
+    Hanya aditif: kolom NOT NULL, perubahan tipe dan index tetap butuh migrasi manual.
+    """
+    from sqlalchemy import inspect
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+                logger.info(f"Added column {table.name}.{column.name} ({column_type})")
+
+def create_missing_indexes(engine, metadata):
+    """Buat index yang didefinisikan di model tapi belum ada di tabel lama"""
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def create_extensions(engine):
+    """Extension PostgreSQL yang dibutuhkan index (pg_trgm untuk pencarian nama)"""
+    if engine.dialect.name != 'postgresql':
+        return
+    with engine.begin() as connection:
+        connection.exec_driver_sql('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+def create_schema():
+    """Buat tabel, kolom nullable dan index yang belum ada"""
+    from .database import Base, engine
+    from . import models  # noqa: F401 - register tabel di Base.metadata
+
+    create_extensions(engine)
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine, Base.metadata)
+    create_missing_indexes(engine, Base.metadata)
+    logger.info("Database tables created successfully")
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    create_schema()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from typing import Optional, Tuple
+import math
+from ..config import settings
+
+# Alasan keputusan autoscaler (dipakai sebagai label metrics)
+REASON_BACKLOG = "backlog"
+REASON_WAIT = "lane_wait"
+REASON_IDLE = "idle"
+REASON_MEMORY_CAP = "memory_cap"
+REASON_MEMORY_CEILING = "memory_ceiling"
+REASON_STEADY = "steady"
+
+def memory_capacity(base_mb: float, slot_mb: float) -> int:
+    """Jumlah slot maksimum yang muat di bawah settings.autoscale_memory_ceiling_mb"""
+    if slot_mb <= 0:
+        return 0
+    return max(0, math.floor((settings.autoscale_memory_ceiling_mb - base_mb) / slot_mb))
+
+def desired_concurrency(
+    current: int,
+    min_concurrency: int,
+    max_concurrency: int,
+    busy: int,
+    queue_depth: int,
+    wait_p95_seconds: float,
+    memory_cap: int,
+    total_rss_mb: Optional[float] = None
+) -> Tuple[int, str]:
+    """
+    Target jumlah proses pool dan alasannya.
+
+    - backlog: task yang sedang jalan + yang menunggu di queue
+    - lane wait: p95 di atas target berarti antrean tidak terkejar, naikkan per step
+    - memory: target tidak boleh melewati kapasitas memori; jika RSS sudah di atas
+      ceiling, kurangi satu proses walaupun di bawah min_concurrency
+    """
+    if total_rss_mb is not None and total_rss_mb > settings.autoscale_memory_ceiling_mb:
+        return max(1, current - 1), REASON_MEMORY_CEILING
+
+    demand = busy + queue_depth
+    target, reason = demand, REASON_BACKLOG
+    if wait_p95_seconds > settings.autoscale_wait_target_seconds and queue_depth > 0:
+        stepped = current + settings.autoscale_scale_up_step
+        if stepped > target:
+            target, reason = stepped, REASON_WAIT
+    if target < current:
+        reason = REASON_IDLE
+
+    target = min(max(target, min_concurrency), max_concurrency)
+    if target > memory_cap:
+        target, reason = max(1, min(memory_cap, target)), REASON_MEMORY_CAP
+    if target == current:
+        reason = REASON_STEADY
+    return target, reason
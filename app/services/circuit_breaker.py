@@ -0,0 +1,124 @@
+from typing import Dict
+import logging
+import time
+import redis
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+
+class CircuitBreaker:
+    """
+    Circuit breaker upstream yang dibagi semua worker lewat Redis.
+    Breaker terbuka jika jumlah kegagalan upstream dalam satu window melewati threshold,
+    dan ditutup kembali oleh probe yang berhasil. State open punya TTL
+    (settings.breaker_max_open_seconds) yang diperpanjang setiap probe dijadwalkan, jadi
+    breaker tidak terbuka selamanya jika task probe hilang; check_circuit_breaker juga
+    menjadwalkan probe baru jika probe yang diharapkan tidak pernah berjalan.
+    """
+
+    def __init__(self, name: str = "kemenag"):
+        self.state_key = f"breaker:{name}:state"
+        self.failures_key = f"breaker:{name}:failures"
+        self._redis = None
+
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.redis_url)
+        return self._redis
+
+    def is_open(self) -> bool:
+        """True jika upstream dianggap down. Jika Redis tidak tersedia, breaker dianggap tertutup."""
+        try:
+            return self._client().hget(self.state_key, "state") == STATE_OPEN.encode()
+        except redis.RedisError as e:
+            logger.warning(f"Circuit breaker state unavailable: {str(e)}")
+            return False
+
+    def record_failure(self) -> bool:
+        """
+        Catat kegagalan upstream. Return True hanya untuk pemanggil yang membuka breaker,
+        sehingga pause consumer dan penjadwalan probe cukup dilakukan sekali.
+        """
+        try:
+            client = self._client()
+            failures = client.incr(self.failures_key)
+            if failures == 1:
+                client.expire(self.failures_key, settings.breaker_window_seconds)
+            if failures < settings.breaker_failure_threshold:
+                return False
+            # HSETNX memastikan hanya satu worker yang melakukan transisi ke open
+            opened = client.hsetnx(self.state_key, "opened_at", time.time())
+            if opened:
+                pipe = client.pipeline()
+                pipe.hset(self.state_key, "state", STATE_OPEN)
+                pipe.expire(self.state_key, settings.breaker_max_open_seconds)
+                pipe.execute()
+                logger.error(f"Circuit breaker opened after {failures} upstream failures")
+            return bool(opened)
+        except redis.RedisError as e:
+            logger.warning(f"Error recording upstream failure: {str(e)}")
+            return False
+
+    def expect_probe(self, delay: float):
+        """Catat kapan probe berikutnya dijadwalkan dan perpanjang TTL state open"""
+        try:
+            pipe = self._client().pipeline()
+            pipe.hset(self.state_key, "probe_due_at", time.time() + delay)
+            pipe.expire(self.state_key, settings.breaker_max_open_seconds)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Error recording scheduled probe: {str(e)}")
+
+    def probe_overdue(self) -> bool:
+        """True jika breaker terbuka tetapi probe yang dijadwalkan tidak berjalan tepat waktu"""
+        try:
+            state = self._client().hgetall(self.state_key)
+        except redis.RedisError as e:
+            logger.warning(f"Circuit breaker state unavailable: {str(e)}")
+            return False
+        if state.get(b"state") != STATE_OPEN.encode():
+            return False
+        due_at = float(state.get(b"probe_due_at") or state.get(b"opened_at") or 0)
+        grace = settings.breaker_probe_timeout + settings.breaker_watchdog_seconds
+        return time.time() > due_at + grace
+
+    def record_success(self):
+        """Upstream merespons normal, reset hitungan kegagalan"""
+        try:
+            self._client().delete(self.failures_key)
+        except redis.RedisError as e:
+            logger.warning(f"Error resetting upstream failures: {str(e)}")
+
+    def close(self):
+        """Tutup breaker setelah probe berhasil"""
+        client = self._client()
+        pipe = client.pipeline()
+        pipe.delete(self.state_key)
+        pipe.delete(self.failures_key)
+        pipe.execute()
+        logger.info("Circuit breaker closed, upstream is reachable again")
+
+    def get_state(self) -> Dict:
+        """State breaker untuk monitoring"""
+        client = self._client()
+        state = client.hgetall(self.state_key)
+        failures = client.get(self.failures_key)
+        return {
+            "state": state.get(b"state", STATE_CLOSED.encode()).decode(),
+            "opened_at": float(state[b"opened_at"]) if b"opened_at" in state else None,
+            "probe_due_at": float(state[b"probe_due_at"]) if b"probe_due_at" in state else None,
+            "recent_failures": int(failures) if failures else 0,
+            "failure_threshold": settings.breaker_failure_threshold,
+        }
+
+_circuit_breaker = None
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Shared CircuitBreaker per proses"""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
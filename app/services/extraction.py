@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Naikkan setiap kali XPath/aturan ekstraksi berubah, agar replay tahu snapshot mana yang perlu diproses ulang
+EXTRACTOR_VERSION = 1
+
+# Panel hasil pencarian di halaman estimasi
+RESULT_PANEL_XPATH = '//*[@id="search-tabs"]/div[3]/div/div[2]'
+
+# XPath setiap field, relatif terhadap panel hasil
+FIELD_XPATHS = {
+    'nama': 'div[1]/p[1]',
+    'kabupaten': 'div[1]/p[2]',
+    'provinsi': 'div[2]/p[1]',
+    'kuota_provinsi_kab_kota_khusus': 'div[2]/p[2]',
+    'status_bayar': 'div[3]/p[1]',
+    'waktu_permintaan_informasi': 'div[3]/p[2]',
+}
+
+# Estimasi keberangkatan berupa text node langsung di dalam elemen ini (bukan <p>)
+ESTIMASI_XPATH = 'div[3]'
+
+SCRAPED_FIELDS = (
+    'nama',
+    'kabupaten',
+    'provinsi',
+    'kuota_provinsi_kab_kota_khusus',
+    'status_bayar',
+    'estimasi_keberangkatan',
+    'waktu_permintaan_informasi',
+)
+
+def absolute_xpath(relative_xpath: str) -> str:
+    """XPath absolut untuk dipakai Selenium"""
+    return f"{RESULT_PANEL_XPATH}/{relative_xpath}"
+
+def compress_html(html: str) -> bytes:
+    return zlib.compress(html.encode('utf-8'), 6)
+
+def decompress_html(data: bytes) -> str:
+    return zlib.decompress(data).decode('utf-8')
+
+def extract_fields_from_html(panel_html: str, no_porsi: Optional[str] = None) -> Dict:
+    """
+    Ekstraksi field dari outerHTML panel hasil tanpa browser.
+    Memakai XPath yang sama dengan KemenagScraper.scrape_text_elements.
+    """
+    from lxml import html as lxml_html
+
+    panel = lxml_html.fragment_fromstring(panel_html)
+    scraped_data = {}
+
+    for field, xpath in FIELD_XPATHS.items():
+        nodes = panel.xpath(xpath)
+        scraped_data[field] = nodes[0].text_content().strip() if nodes else None
+
+    text_nodes = [text.strip() for text in panel.xpath(f'{ESTIMASI_XPATH}/text()') if text.strip()]
+    scraped_data['estimasi_keberangkatan'] = ' '.join(text_nodes).strip() if text_nodes else None
+
+    if no_porsi is not None:
+        scraped_data['no_porsi'] = no_porsi
+    return scraped_data
@@ -0,0 +1,141 @@
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import re
+
+# Naikkan setiap kali aturan parsing berubah, agar backfill tahu record mana yang perlu diproses ulang
+PARSER_VERSION = 1
+
+QUOTA_PROVINSI = "provinsi"
+QUOTA_KAB_KOTA = "kab_kota"
+QUOTA_KHUSUS = "khusus"
+
+PAYMENT_LUNAS = "lunas"
+PAYMENT_LUNAS_TUNDA = "lunas_tunda"
+PAYMENT_BELUM_LUNAS = "belum_lunas"
+PAYMENT_BATAL = "batal"
+PAYMENT_LAINNYA = "lainnya"
+
+BULAN = {
+    'januari': 1, 'februari': 2, 'maret': 3, 'april': 4, 'mei': 5, 'juni': 6,
+    'juli': 7, 'agustus': 8, 'september': 9, 'oktober': 10, 'november': 11, 'desember': 12,
+    # Singkatan yang kadang dipakai di halaman Kemenag
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'jun': 6, 'jul': 7, 'agu': 8, 'agt': 8,
+    'sep': 9, 'okt': 10, 'nov': 11, 'des': 12,
+}
+
+HIJRI_YEAR_PATTERN = re.compile(r'(\d{4})\s*H\b', re.IGNORECASE)
+GREGORIAN_YEAR_PATTERN = re.compile(r'(\d{4})\s*M\b', re.IGNORECASE)
+ANY_YEAR_PATTERN = re.compile(r'\b(\d{4})\b')
+TEXT_DATE_PATTERN = re.compile(
+    r'(\d{1,2})\s+([A-Za-z]+)\s+(\d{4})(?:\s*,?\s*(?:pukul\s*)?(\d{1,2})[:.](\d{2})(?:[:.](\d{2}))?)?',
+    re.IGNORECASE
+)
+NUMERIC_DATE_PATTERN = re.compile(
+    r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})(?:\s+(\d{1,2})[:.](\d{2})(?:[:.](\d{2}))?)?'
+)
+
+# Selisih kasar tahun Hijriah dan Masehi, hanya untuk melengkapi salah satu yang hilang
+HIJRI_OFFSET = 579
+
+def parse_departure_year(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Tahun keberangkatan (Masehi, Hijriah) dari teks estimasi,
+    mis. 'Estimasi Keberangkatan Tahun 1451 H / 2030 M'
+    """
+    if not text:
+        return None, None
+    hijri = HIJRI_YEAR_PATTERN.search(text)
+    gregorian = GREGORIAN_YEAR_PATTERN.search(text)
+    hijri_year = int(hijri.group(1)) if hijri else None
+    gregorian_year = int(gregorian.group(1)) if gregorian else None
+
+    if hijri_year is None and gregorian_year is None:
+        # Tanpa penanda H/M: tebak dari rentang tahun
+        for match in ANY_YEAR_PATTERN.finditer(text):
+            year = int(match.group(1))
+            if 1990 <= year <= 2150 and gregorian_year is None:
+                gregorian_year = year
+            elif 1400 <= year <= 1600 and hijri_year is None:
+                hijri_year = year
+
+    if gregorian_year is None and hijri_year is not None:
+        gregorian_year = hijri_year + HIJRI_OFFSET
+    if hijri_year is None and gregorian_year is not None:
+        hijri_year = gregorian_year - HIJRI_OFFSET
+    return gregorian_year, hijri_year
+
+def _build_datetime(day, month, year, hour, minute, second) -> Optional[datetime]:
+    try:
+        return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+    except ValueError:
+        return None
+
+def parse_request_time(text: Optional[str]) -> Optional[datetime]:
+    """Waktu permintaan informasi, mis. '19 Oktober 2026 10:15:42' atau '19/10/2026 10:15'"""
+    if not text:
+        return None
+    match = TEXT_DATE_PATTERN.search(text)
+    if match:
+        month = BULAN.get(match.group(2).lower())
+        if month:
+            return _build_datetime(match.group(1), month, match.group(3), *match.group(4, 5, 6))
+    match = NUMERIC_DATE_PATTERN.search(text)
+    if match:
+        return _build_datetime(match.group(1), match.group(2), match.group(3), *match.group(4, 5, 6))
+    return None
+
+def parse_quota_class(text: Optional[str]) -> Optional[str]:
+    """Kelas kuota: provinsi, kab_kota atau khusus"""
+    if not text:
+        return None
+    normalized = text.lower()
+    if 'khusus' in normalized:
+        return QUOTA_KHUSUS
+    if 'kab' in normalized or 'kota' in normalized:
+        return QUOTA_KAB_KOTA
+    if 'prov' in normalized:
+        return QUOTA_PROVINSI
+    return None
+
+def normalize_payment_status(text: Optional[str]) -> Optional[str]:
+    """Status pembayaran yang dinormalisasi dari teks status_bayar"""
+    if not text:
+        return None
+    normalized = text.lower()
+    if 'batal' in normalized:
+        return PAYMENT_BATAL
+    if 'belum' in normalized:
+        return PAYMENT_BELUM_LUNAS
+    if 'tunda' in normalized:
+        return PAYMENT_LUNAS_TUNDA
+    if 'lunas' in normalized:
+        return PAYMENT_LUNAS
+    return PAYMENT_LAINNYA
+
+def normalize_region(text: Optional[str]) -> Optional[str]:
+    """Nama provinsi/kabupaten untuk key rollup: huruf besar, spasi dirapikan"""
+    if not text:
+        return None
+    return ' '.join(text.upper().split()) or None
+
+def normalize_name(text: Optional[str]) -> Optional[str]:
+    """Nama jemaah untuk pencarian: huruf besar seperti di halaman Kemenag, spasi dirapikan"""
+    if not text:
+        return None
+    return ' '.join(text.upper().split()) or None
+
+def parse_scraped_fields(scraped_data: Dict) -> Dict:
+    """
+    Kolom bertipe dari field mentah hasil ekstraksi. Field yang tidak di-scrape
+    (mis. karena scrape profile) menghasilkan None.
+    """
+    departure_year, departure_hijri_year = parse_departure_year(scraped_data.get('estimasi_keberangkatan'))
+    return {
+        'departure_year': departure_year,
+        'departure_hijri_year': departure_hijri_year,
+        'requested_at': parse_request_time(scraped_data.get('waktu_permintaan_informasi')),
+        'quota_class': parse_quota_class(scraped_data.get('kuota_provinsi_kab_kota_khusus')),
+        'payment_status': normalize_payment_status(scraped_data.get('status_bayar')),
+    }
+
+PARSED_FIELDS = ('departure_year', 'departure_hijri_year', 'requested_at', 'quota_class', 'payment_status')
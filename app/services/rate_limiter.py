@@ -0,0 +1,292 @@
+from typing import Dict, Optional
+import logging
+import time
+import redis
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Token bucket atomik. Rate disimpan di Redis sehingga semua worker
+# berbagi bucket dan rate adaptif yang sama.
+# KEYS[1] = bucket hash, ARGV = initial_rate, burst
+# Return: wait time dalam milidetik (0 berarti token didapat)
+ACQUIRE_SCRIPT = """
+local key = KEYS[1]
+local initial_rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+
+local rate = tonumber(redis.call('HGET', key, 'rate'))
+if not rate then
+    rate = initial_rate
+    redis.call('HSET', key, 'rate', rate)
+end
+local tokens = tonumber(redis.call('HGET', key, 'tokens'))
+local ts = tonumber(redis.call('HGET', key, 'ts'))
+if not tokens or not ts then
+    tokens = burst
+    ts = now
+end
+
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait_ms = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+return wait_ms
+"""
+
+# AIMD: additive increase pada sukses, multiplicative decrease pada throttle.
+# Decrease dibatasi cooldown agar satu lonjakan error dari banyak worker
+# tidak langsung menjatuhkan rate ke minimum.
+# KEYS[1] = bucket hash, ARGV = mode, initial_rate, min_rate, max_rate, step, cooldown
+# Return: rate baru (string) dan flag apakah decrease diterapkan
+ADJUST_SCRIPT = """
+local key = KEYS[1]
+local mode = ARGV[1]
+local initial_rate = tonumber(ARGV[2])
+local min_rate = tonumber(ARGV[3])
+local max_rate = tonumber(ARGV[4])
+local step = tonumber(ARGV[5])
+local cooldown = tonumber(ARGV[6])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+
+local rate = tonumber(redis.call('HGET', key, 'rate')) or initial_rate
+local applied = 0
+if mode == 'increase' then
+    rate = math.min(max_rate, rate + step)
+    applied = 1
+else
+    local last = tonumber(redis.call('HGET', key, 'last_decrease')) or 0
+    if now - last >= cooldown then
+        rate = math.max(min_rate, rate * step)
+        redis.call('HSET', key, 'last_decrease', now)
+        applied = 1
+    end
+end
+redis.call('HSET', key, 'rate', rate)
+return {tostring(rate), applied}
+"""
+
+class RateLimitExceeded(Exception):
+    """Token tidak didapat dalam settings.rate_limit_max_wait_seconds; request tidak boleh dikirim"""
+
+class RateLimiter:
+    """Cluster-wide adaptive token bucket untuk haji.kemenag.go.id"""
+
+    def __init__(self, name: str = "kemenag"):
+        self.enabled = settings.rate_limit_enabled
+        self.bucket_key = f"ratelimit:{name}"
+        self.stats_key = f"ratelimit:{name}:stats"
+        self.captcha_key = f"ratelimit:{name}:captcha"
+        self._redis = None
+        self._acquire = None
+        self._adjust = None
+
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.redis_url)
+            self._acquire = self._redis.register_script(ACQUIRE_SCRIPT)
+            self._adjust = self._redis.register_script(ADJUST_SCRIPT)
+        return self._redis
+
+    def acquire(self, action: str) -> float:
+        """
+        Tunggu sampai token tersedia sebelum request ke upstream.
+        Return total waktu tunggu dalam detik. Raise RateLimitExceeded jika token tidak
+        didapat dalam rate_limit_max_wait_seconds (budget cluster habis, request tidak
+        dikirim). Fail-open hanya jika Redis tidak tersedia.
+        """
+        if not self.enabled:
+            return 0.0
+
+        started = time.monotonic()
+        deadline = started + settings.rate_limit_max_wait_seconds
+        try:
+            client = self._client()
+            while True:
+                wait_ms = self._acquire(
+                    keys=[self.bucket_key],
+                    args=[settings.rate_limit_initial_rate, settings.rate_limit_burst]
+                )
+                if wait_ms <= 0:
+                    break
+                if time.monotonic() + wait_ms / 1000 > deadline:
+                    client.hincrby(self.stats_key, f"exceeded:{action}", 1)
+                    raise RateLimitExceeded(
+                        f"Rate limiter wait for {action} exceeded {settings.rate_limit_max_wait_seconds}s"
+                    )
+                time.sleep(wait_ms / 1000)
+
+            waited = time.monotonic() - started
+            pipe = client.pipeline()
+            pipe.hincrby(self.stats_key, f"acquired:{action}", 1)
+            pipe.hincrbyfloat(self.stats_key, "wait_seconds_total", waited)
+            pipe.execute()
+            return waited
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter unavailable, proceeding without limit: {str(e)}")
+            return time.monotonic() - started
+
+    def record_success(self):
+        """Upstream merespons normal, naikkan rate secara aditif"""
+        if not self.enabled:
+            return
+        self._adjust_rate('increase', settings.rate_limit_additive_increase)
+
+    def record_throttle(self, reason: str):
+        """Sinyal throttling dari upstream (timeout, HTTP error, captcha reject spike)"""
+        if not self.enabled:
+            return
+        new_rate, applied = self._adjust_rate('decrease', settings.rate_limit_multiplicative_decrease)
+        try:
+            client = self._client()
+            pipe = client.pipeline()
+            pipe.hincrby(self.stats_key, f"throttle:{reason}", 1)
+            pipe.hset(self.stats_key, "last_throttle_at", time.time())
+            pipe.hset(self.stats_key, "last_throttle_reason", reason)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Error recording throttle event: {str(e)}")
+        if applied:
+            logger.warning(f"Upstream throttle ({reason}), rate decreased to {new_rate:.3f} req/s")
+
+    def record_captcha_result(self, accepted: bool):
+        """
+        Lacak rasio captcha ditolak dalam sliding window. Penolakan sesekali itu normal
+        (OCR salah), tapi lonjakan penolakan menandakan upstream sedang membatasi kita.
+        """
+        if not self.enabled:
+            return
+        try:
+            client = self._client()
+            window = settings.rate_limit_captcha_window_seconds
+            bucket = int(time.time() // window)
+            key = f"{self.captcha_key}:{bucket}"
+            pipe = client.pipeline()
+            pipe.hincrby(key, "total", 1)
+            if not accepted:
+                pipe.hincrby(key, "rejected", 1)
+            pipe.expire(key, window * 2)
+            pipe.hgetall(key)
+            counts = pipe.execute()[-1]
+        except redis.RedisError as e:
+            logger.warning(f"Error recording captcha result: {str(e)}")
+            return
+
+        if accepted:
+            self.record_success()
+            return
+
+        total = int(counts.get(b"total", 0))
+        rejected = int(counts.get(b"rejected", 0))
+        if total >= settings.rate_limit_captcha_min_samples and rejected / total >= settings.rate_limit_captcha_reject_threshold:
+            self.record_throttle("captcha_reject_spike")
+
+    def _adjust_rate(self, mode: str, step: float):
+        try:
+            self._client()
+            rate, applied = self._adjust(
+                keys=[self.bucket_key],
+                args=[
+                    mode,
+                    settings.rate_limit_initial_rate,
+                    settings.rate_limit_min_rate,
+                    settings.rate_limit_max_rate,
+                    step,
+                    settings.rate_limit_decrease_cooldown_seconds
+                ]
+            )
+            return float(rate), bool(applied)
+        except redis.RedisError as e:
+            logger.warning(f"Error adjusting rate limit: {str(e)}")
+            return None, False
+
+    def get_stats(self) -> Dict:
+        """Rate saat ini, total waktu tunggu dan jumlah throttle event"""
+        client = self._client()
+        bucket = client.hgetall(self.bucket_key)
+        raw_stats = client.hgetall(self.stats_key)
+        stats = {key.decode(): value.decode() for key, value in raw_stats.items()}
+
+        acquired = {k.split(':', 1)[1]: int(v) for k, v in stats.items() if k.startswith('acquired:')}
+        throttles = {k.split(':', 1)[1]: int(v) for k, v in stats.items() if k.startswith('throttle:')}
+        exceeded = {k.split(':', 1)[1]: int(v) for k, v in stats.items() if k.startswith('exceeded:')}
+        total_acquired = sum(acquired.values())
+        wait_total = float(stats.get('wait_seconds_total', 0))
+
+        return {
+            "enabled": self.enabled,
+            "current_rate": float(bucket.get(b"rate", settings.rate_limit_initial_rate)),
+            "min_rate": settings.rate_limit_min_rate,
+            "max_rate": settings.rate_limit_max_rate,
+            "tokens": float(bucket.get(b"tokens", settings.rate_limit_burst)),
+            "acquired": acquired,
+            "wait_seconds_total": wait_total,
+            "avg_wait_seconds": wait_total / total_acquired if total_acquired else 0.0,
+            "throttle_events": throttles,
+            "wait_exceeded": exceeded,
+            "last_throttle_at": float(stats["last_throttle_at"]) if "last_throttle_at" in stats else None,
+            "last_throttle_reason": stats.get("last_throttle_reason"),
+        }
+
+class LocalRateLimiter:
+    """
+    Token bucket AIMD dalam satu proses, interface sama dengan RateLimiter.
+    Untuk runner tanpa Redis (app.cli): setiap proses mendapat bagian rate total.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.enabled = rate > 0
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.ts = time.monotonic()
+        self.last_decrease = 0.0
+        # Step AIMD dan batas bawah mengikuti porsi rate proses ini terhadap rate cluster
+        self.scale = rate / settings.rate_limit_initial_rate
+
+    def acquire(self, action: str) -> float:
+        if not self.enabled:
+            return 0.0
+        started = time.monotonic()
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.ts) * self.rate)
+            self.ts = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return now - started
+            time.sleep((1 - self.tokens) / self.rate)
+
+    def record_success(self):
+        if self.enabled:
+            self.rate = min(self.max_rate, self.rate + settings.rate_limit_additive_increase * self.scale)
+
+    def record_throttle(self, reason: str):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self.last_decrease >= settings.rate_limit_decrease_cooldown_seconds:
+            self.last_decrease = now
+            self.rate = max(settings.rate_limit_min_rate * self.scale, self.rate * settings.rate_limit_multiplicative_decrease)
+            logger.warning(f"Upstream throttle ({reason}), local rate decreased to {self.rate:.3f} req/s")
+
+    def record_captcha_result(self, accepted: bool):
+        if accepted:
+            self.record_success()
+
+_rate_limiter: Optional[RateLimiter] = None
+
+def get_rate_limiter() -> RateLimiter:
+    """Shared RateLimiter per proses"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
@@ -0,0 +1,54 @@
+from typing import Iterable
+import logging
+import redis
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class RecentWrites:
+    """
+    Penanda record yang baru ditulis, dibagi worker dan instance API lewat Redis.
+    Selama penanda ada (settings.read_your_writes_seconds), baca record tersebut
+    diarahkan ke primary agar tidak melihat data lama dari replica yang tertinggal.
+    """
+
+    def __init__(self, prefix: str = "rw"):
+        self.prefix = prefix
+        self._redis = None
+
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.redis_url)
+        return self._redis
+
+    def mark(self, keys: Iterable[str]):
+        """Tandai key (mis. task:<id>, id:<uuid>, porsi:<no>) sebagai baru ditulis"""
+        keys = [key for key in keys if key]
+        if not keys:
+            return
+        try:
+            pipe = self._client().pipeline(transaction=False)
+            for key in keys:
+                pipe.set(f"{self.prefix}:{key}", 1, ex=settings.read_your_writes_seconds)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Error marking recent writes: {str(e)}")
+
+    def is_recent(self, keys: Iterable[str]) -> bool:
+        """True jika salah satu key baru ditulis. Jika Redis tidak tersedia, anggap baru (baca dari primary)."""
+        keys = [f"{self.prefix}:{key}" for key in keys if key]
+        if not keys:
+            return False
+        try:
+            return self._client().exists(*keys) > 0
+        except redis.RedisError as e:
+            logger.warning(f"Recent writes unavailable, reading from primary: {str(e)}")
+            return True
+
+_recent_writes = None
+
+def get_recent_writes() -> RecentWrites:
+    global _recent_writes
+    if _recent_writes is None:
+        _recent_writes = RecentWrites()
+    return _recent_writes
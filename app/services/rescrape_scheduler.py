@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Field yang dibandingkan untuk mendeteksi perubahan data.
+# waktu_permintaan_informasi sengaja tidak ikut karena selalu berubah tiap request.
+TRACKED_FIELDS = (
+    'nama',
+    'kabupaten',
+    'provinsi',
+    'kuota_provinsi_kab_kota_khusus',
+    'status_bayar',
+    'estimasi_keberangkatan',
+)
+
+def content_hash(scraped_data: Dict) -> str:
+    """Hash stabil dari field yang dilacak untuk mendeteksi perubahan"""
+    payload = {field: scraped_data.get(field) for field in TRACKED_FIELDS}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+def covers_tracked_fields(fields) -> bool:
+    """True jika scrape mengambil semua TRACKED_FIELDS (hash-nya sebanding dengan scrape full)"""
+    return set(TRACKED_FIELDS).issubset(fields)
+
+def update_change_rate(previous_rate: float, changed: bool) -> float:
+    """Update EWMA change rate (0 = tidak pernah berubah, 1 = selalu berubah)"""
+    alpha = settings.rescrape_change_alpha
+    return alpha * (1.0 if changed else 0.0) + (1 - alpha) * previous_rate
+
+def rescrape_interval(change_rate: float) -> timedelta:
+    """Interval re-scrape target: makin sering berubah, makin pendek intervalnya"""
+    change_rate = min(max(change_rate, 0.0), 1.0)
+    span = settings.rescrape_max_interval_seconds - settings.rescrape_min_interval_seconds
+    return timedelta(seconds=settings.rescrape_min_interval_seconds + span * (1.0 - change_rate))
+
+def compute_next_due(last_success_at: datetime, change_rate: float) -> datetime:
+    """Waktu paling awal porsi ini perlu di-scrape ulang"""
+    return last_success_at + rescrape_interval(change_rate)
+
+def compute_priority(last_success_at: Optional[datetime], change_rate: float, now: datetime) -> float:
+    """
+    Prioritas = staleness relatif terhadap interval target.
+    Porsi yang belum pernah berhasil di-scrape selalu didahulukan.
+    """
+    if last_success_at is None:
+        return float('inf')
+    staleness = (now - last_success_at).total_seconds()
+    return staleness / rescrape_interval(change_rate).total_seconds()
+
+def available_capacity(queue_depth: int) -> int:
+    """Jumlah task yang boleh di-enqueue tanpa melewati batas kedalaman broker"""
+    return max(0, min(settings.rescrape_batch_size, settings.rescrape_max_queue_depth - queue_depth))
@@ -0,0 +1,11 @@
+import random
+from ..config import settings
+
+def backoff_with_jitter(retries: int) -> float:
+    """Exponential backoff dengan full jitter untuk retry task ke-N"""
+    ceiling = min(settings.retry_backoff_max_seconds, settings.retry_backoff_base_seconds * (2 ** retries))
+    return random.uniform(settings.retry_backoff_base_seconds / 2, ceiling)
+
+def remaining_attempts(attempts_spent: int) -> int:
+    """Sisa attempt budget untuk satu no_porsi, dibagi antara loop captcha dan retry Celery"""
+    return max(0, settings.scrape_attempt_budget - attempts_spent)
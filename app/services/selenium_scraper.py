@@ -11,20 +11,83 @@ import pytesseract
 from PIL import Image
 import io
 import os
-from datetime import datetime
-import uuid
+import signal
 import logging
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, Iterable, TYPE_CHECKING
 from ..config import settings
+from .rate_limiter import RateLimitExceeded, get_rate_limiter
+from ..metrics import time_stage, CAPTCHA_ATTEMPTS_PER_SUCCESS
+from ..profiles import ScrapeProfile, DEFAULT_PROFILE
+from .storage import get_screenshot_storage
+from .extraction import FIELD_XPATHS, ESTIMASI_XPATH, RESULT_PANEL_XPATH, SCRAPED_FIELDS, absolute_xpath
+
+if TYPE_CHECKING:
+    from .standby_pages import StandbyPool
 
 logger = logging.getLogger(__name__)
 
+# Klasifikasi kegagalan scraping
+FAILURE_UPSTREAM = "upstream_unavailable"
+FAILURE_CAPTCHA = "captcha_exhausted"
+FAILURE_DRIVER = "driver_error"
+FAILURE_RATE_LIMITED = "rate_limited"  # budget request cluster habis, request tidak dikirim
+
+# Penanda halaman error/throttle dari upstream (Selenium tidak mengekspos HTTP status)
+HTTP_ERROR_MARKERS = (
+    "429 Too Many Requests",
+    "502 Bad Gateway",
+    "503 Service Unavailable",
+    "504 Gateway Time-out",
+    "Access Denied",
+)
+
+TESSERACT_CONFIG = "--oem 3 --psm 7"
+
 class KemenagScraper:
-    def __init__(self):
+    def __init__(self, reuse_driver: bool = False, standby_pool: Optional["StandbyPool"] = None):
+        """
+        reuse_driver=True mempertahankan Chrome antar panggilan scrape() (untuk runner
+        bulk yang memproses banyak nomor per proses); driver diganti setelah
+        settings.driver_max_reuse pemakaian atau setelah error driver. Panggil close() di akhir.
+        standby_pool: jika ada page siap pakai, scrape() langsung mengisi no_porsi dan submit.
+        """
+        self.reuse_driver = reuse_driver
+        self.standby_pool = standby_pool
+        self._driver = None
+        self._driver_uses = 0
         self.max_attempts = settings.max_attempts
         self.timeout = settings.selenium_timeout
-        self.screenshot_folder = settings.screenshot_folder
+        self.storage = get_screenshot_storage()
+        self.search_url = settings.kemenag_search_url
         pytesseract.pytesseract.tesseract_cmd = settings.tesseract_cmd
+        self.rate_limiter = get_rate_limiter()
+        self.last_failure_class = None
+        self.last_snapshot_html = None
+
+    def detect_http_error(self, driver: webdriver.Chrome) -> Optional[str]:
+        """Cek apakah halaman yang dimuat adalah halaman error dari upstream"""
+        try:
+            title = driver.title or ""
+            for marker in HTTP_ERROR_MARKERS:
+                if marker in title:
+                    return marker
+        except Exception:
+            pass
+        return None
+
+    def read_captcha(self, elem) -> Tuple[str, float]:
+        """OCR canvas captcha; return (teks, rata-rata confidence Tesseract per karakter 0-100)"""
+        img = Image.open(io.BytesIO(elem.screenshot_as_png))
+        data = pytesseract.image_to_data(img, lang="eng", config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+        words = [
+            (word.strip(), float(conf))
+            for word, conf in zip(data['text'], data['conf'])
+            if word.strip() and float(conf) >= 0
+        ]
+        text = ' '.join(word for word, _ in words)
+        chars = sum(len(word) for word, _ in words)
+        confidence = sum(len(word) * conf for word, conf in words) / chars if chars else 0.0
+        return text, confidence
 
     def setup_chrome_driver(self) -> webdriver.Chrome:
         """Setup Chrome driver dengan opsi headless"""
@@ -41,186 +104,234 @@ class KemenagScraper:
             chrome_options.add_argument("--disable-blink-features=AutomationControlled")
             
             # Use webdriver-manager to handle ChromeDriver
-            service = Service(ChromeDriverManager().install())
+            # Process group sendiri: Chrome ikut dimatikan jika chromedriver crash (lihat _quit_driver)
+            popen_kw = {'process_group': 0} if os.name == 'posix' else {}
+            service = Service(ChromeDriverManager().install(), popen_kw=popen_kw)
             driver = webdriver.Chrome(service=service, options=chrome_options)
-            driver.set_page_load_timeout(self.timeout)
+            try:
+                driver.set_page_load_timeout(self.timeout)
+            except Exception:
+                self._quit_driver(driver)
+                raise
             
             return driver
         except Exception as e:
             logger.error(f"Error setting up Chrome driver: {str(e)}")
             raise
 
-    def scrape_text_elements(self, driver: webdriver.Chrome, wait: WebDriverWait, no_porsi: str) -> Optional[Dict]:
-        """Fungsi untuk scraping text dari elemen-elemen yang ditentukan"""
+    def scrape_text_elements(self, driver: webdriver.Chrome, wait: WebDriverWait, no_porsi: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """
+        Fungsi untuk scraping text dari elemen-elemen yang ditentukan (lihat FIELD_XPATHS).
+        Jika fields diberikan, hanya field tersebut yang dicari; sisanya bernilai None.
+        """
         try:
-            scraped_data = {}
-            
-            # Scraping Nama
-            try:
-                nama = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, '//*[@id="search-tabs"]/div[3]/div/div[2]/div[1]/p[1]')
-                )).text.strip()
-                scraped_data['nama'] = nama
-                logger.info(f"Nama berhasil di-scrape: {nama}")
-            except Exception as e:
-                logger.warning(f"Error scraping nama: {str(e)}")
-                scraped_data['nama'] = None
+            requested = set(fields) if fields is not None else set(SCRAPED_FIELDS)
+            scraped_data = {field: None for field in SCRAPED_FIELDS}
             
-            # Scraping Kabupaten
-            try:
-                kabupaten = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, '//*[@id="search-tabs"]/div[3]/div/div[2]/div[1]/p[2]')
-                )).text.strip()
-                scraped_data['kabupaten'] = kabupaten
-                logger.info(f"Kabupaten berhasil di-scrape: {kabupaten}")
-            except Exception as e:
-                logger.warning(f"Error scraping kabupaten: {str(e)}")
-                scraped_data['kabupaten'] = None
-            
-            # Scraping Provinsi
-            try:
-                provinsi = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, '//*[@id="search-tabs"]/div[3]/div/div[2]/div[2]/p[1]')
-                )).text.strip()
-                scraped_data['provinsi'] = provinsi
-                logger.info(f"Provinsi berhasil di-scrape: {provinsi}")
-            except Exception as e:
-                logger.warning(f"Error scraping provinsi: {str(e)}")
-                scraped_data['provinsi'] = None
-            
-            # Scraping Kuota Provinsi Kab/Kota Khusus
-            try:
-                kuota = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, '//*[@id="search-tabs"]/div[3]/div/div[2]/div[2]/p[2]')
-                )).text.strip()
-                scraped_data['kuota_provinsi_kab_kota_khusus'] = kuota
-                logger.info(f"Kuota berhasil di-scrape: {kuota}")
-            except Exception as e:
-                logger.warning(f"Error scraping kuota: {str(e)}")
-                scraped_data['kuota_provinsi_kab_kota_khusus'] = None
-            
-            # Scraping Status Bayar
-            try:
-                status_bayar = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, '//*[@id="search-tabs"]/div[3]/div/div[2]/div[3]/p[1]')
-                )).text.strip()
-                scraped_data['status_bayar'] = status_bayar
-                logger.info(f"Status Bayar berhasil di-scrape: {status_bayar}")
-            except Exception as e:
-                logger.warning(f"Error scraping status bayar: {str(e)}")
-                scraped_data['status_bayar'] = None
+            for field, xpath in FIELD_XPATHS.items():
+                if field not in requested:
+                    continue
+                try:
+                    value = wait.until(EC.presence_of_element_located(
+                        (By.XPATH, absolute_xpath(xpath))
+                    )).text.strip()
+                    scraped_data[field] = value
+                    logger.info("%s berhasil di-scrape: %s", field, value, extra={'event': 'field_scraped'})
+                except Exception as e:
+                    logger.warning("Error scraping %s: %s", field, e, extra={'event': 'field_error'})
+                    scraped_data[field] = None
             
             # Scraping Estimasi Keberangkatan (gabungan text nodes)
-            try:
-                parent_element = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, '//*[@id="search-tabs"]/div[3]/div/div[2]/div[3]')
-                ))
+            if 'estimasi_keberangkatan' in requested:
+                try:
+                    parent_element = wait.until(EC.presence_of_element_located(
+                        (By.XPATH, absolute_xpath(ESTIMASI_XPATH))
+                    ))
                 
-                # Ambil semua text nodes menggunakan JavaScript
-                script = """
-                var element = arguments[0];
-                var textNodes = [];
-                for (var i = 0; i < element.childNodes.length; i++) {
-                    if (element.childNodes[i].nodeType === 3) { // Text node
-                        var text = element.childNodes[i].textContent.trim();
-                        if (text) {
-                            textNodes.push(text);
+                    # Ambil semua text nodes menggunakan JavaScript
+                    script = """
+                    var element = arguments[0];
+                    var textNodes = [];
+                    for (var i = 0; i < element.childNodes.length; i++) {
+                        if (element.childNodes[i].nodeType === 3) { // Text node
+                            var text = element.childNodes[i].textContent.trim();
+                            if (text) {
+                                textNodes.push(text);
+                            }
                         }
                     }
-                }
-                return textNodes;
-                """
-                text_nodes = driver.execute_script(script, parent_element)
+                    return textNodes;
+                    """
+                    text_nodes = driver.execute_script(script, parent_element)
                 
-                # Gabungkan text nodes menjadi satu string
-                if text_nodes:
-                    estimasi_keberangkatan = ' '.join(text_nodes).strip()
-                    scraped_data['estimasi_keberangkatan'] = estimasi_keberangkatan
-                    logger.info(f"Estimasi Keberangkatan berhasil di-scrape: {estimasi_keberangkatan}")
-                else:
-                    scraped_data['estimasi_keberangkatan'] = None
+                    # Gabungkan text nodes menjadi satu string
+                    if text_nodes:
+                        estimasi_keberangkatan = ' '.join(text_nodes).strip()
+                        scraped_data['estimasi_keberangkatan'] = estimasi_keberangkatan
+                        logger.info("Estimasi Keberangkatan berhasil di-scrape: %s", estimasi_keberangkatan, extra={'event': 'field_scraped'})
+                    else:
+                        scraped_data['estimasi_keberangkatan'] = None
                     
-            except Exception as e:
-                logger.warning(f"Error scraping estimasi keberangkatan: {str(e)}")
-                scraped_data['estimasi_keberangkatan'] = None
-            
-            # Scraping Waktu Permintaan Informasi
-            try:
-                waktu_permintaan = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, '//*[@id="search-tabs"]/div[3]/div/div[2]/div[3]/p[2]')
-                )).text.strip()
-                scraped_data['waktu_permintaan_informasi'] = waktu_permintaan
-                logger.info(f"Waktu Permintaan Informasi berhasil di-scrape: {waktu_permintaan}")
-            except Exception as e:
-                logger.warning(f"Error scraping waktu permintaan informasi: {str(e)}")
-                scraped_data['waktu_permintaan_informasi'] = None
+                except Exception as e:
+                    logger.warning("Error scraping estimasi keberangkatan: %s", e, extra={'event': 'field_error'})
+                    scraped_data['estimasi_keberangkatan'] = None
             
             # Tambahkan no_porsi ke data
             scraped_data['no_porsi'] = no_porsi
             
-            logger.info(f"Semua data berhasil di-scrape untuk nomor porsi {no_porsi}")
+            logger.info("Semua data berhasil di-scrape untuk nomor porsi %s", no_porsi)
             return scraped_data
             
         except Exception as e:
             logger.error(f"Error saat scraping text: {str(e)}")
             return None
 
-    def scrape(self, no_porsi: str) -> Tuple[bool, Optional[str], Optional[Dict], Optional[str], int]:
+    def acquire_driver(self) -> webdriver.Chrome:
+        """Driver yang disimpan dari scrape sebelumnya (mode reuse) atau Chrome baru"""
+        if self._driver is not None:
+            driver, self._driver = self._driver, None
+            try:
+                driver.delete_all_cookies()
+                return driver
+            except Exception as e:
+                logger.warning(f"Reused driver is unusable, starting a new one: {str(e)}")
+                self._quit_driver(driver)
+        self._driver_uses = 0
+        return self.setup_chrome_driver()
+
+    def release_driver(self, driver: webdriver.Chrome, healthy: bool):
+        """Simpan driver untuk scrape berikutnya (mode reuse) atau tutup"""
+        self._driver_uses += 1
+        if self.reuse_driver and healthy and self._driver_uses < settings.driver_max_reuse:
+            self._driver = driver
+            return
+        self._quit_driver(driver)
+
+    def _quit_driver(self, driver: webdriver.Chrome):
+        process = getattr(getattr(driver, 'service', None), 'process', None)
+        # chromedriver yang sudah mati (crash, OOM kill) tidak bisa menutup Chrome miliknya
+        crashed = process is not None and process.poll() is not None
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error closing driver: {str(e)}")
+        if crashed:
+            self._kill_orphaned_browser(process.pid)
+
+    def _kill_orphaned_browser(self, pgid: int):
+        """Matikan proses Chrome yang tertinggal di process group chromedriver"""
+        if os.name != 'posix':
+            return
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+            logger.warning(f"Killed orphaned Chrome processes of crashed chromedriver (pgid {pgid})")
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def close(self):
+        """Tutup driver yang disimpan mode reuse"""
+        if self._driver is not None:
+            driver, self._driver = self._driver, None
+            self._quit_driver(driver)
+
+    def scrape(self, no_porsi: str, max_attempts: Optional[int] = None, profile: Optional[ScrapeProfile] = None) -> Tuple[bool, Optional[str], Optional[Dict], Optional[str], int]:
         """
         Main scraping function
         Returns: (success, filename, scraped_data, error_message, attempts_used)
+        Jenis kegagalan tersedia di self.last_failure_class.
+        Profile menentukan field yang diekstrak dan apakah screenshot diambil (filename None jika tidak).
         """
         driver = None
+        standby = None
         attempts_used = 0
+        max_attempts = max_attempts if max_attempts is not None else self.max_attempts
+        profile = profile or DEFAULT_PROFILE
+        self.last_failure_class = None
+        self.last_snapshot_html = None
         
         try:
-            logger.info(f"Memproses nomor porsi: {no_porsi}")
+            logger.info("Memproses nomor porsi: %s", no_porsi)
             
-            driver = self.setup_chrome_driver()
+            # Standby page: halaman sudah dimuat dan captcha sudah diisi, langsung ke input no_porsi
+            if self.standby_pool is not None:
+                standby = self.standby_pool.take()
+            if standby is not None:
+                driver = standby.driver
+            else:
+                try:
+                    with time_stage('driver_startup'):
+                        driver = self.acquire_driver()
+                except Exception as e:
+                    self.last_failure_class = FAILURE_DRIVER
+                    return False, None, None, f"Error setting up Chrome driver: {str(e)}", attempts_used
             wait = WebDriverWait(driver, 15)
             
             success = False
             
-            # Buka URL dengan error handling
-            try:
-                driver.get("https://haji.kemenag.go.id/v5/?search=estimation")
-                time.sleep(3)
-            except Exception as e:
-                logger.error(f"Error loading website: {str(e)}")
-                return False, None, None, f"Error loading website: {str(e)}", attempts_used
+            # Buka URL dengan error handling (sudah dilakukan jika memakai standby page)
+            if standby is None:
+                try:
+                    self.rate_limiter.acquire('page_load')
+                    with time_stage('page_load'):
+                        driver.get(self.search_url)
+                    time.sleep(3)
+                except RateLimitExceeded as e:
+                    self.last_failure_class = FAILURE_RATE_LIMITED
+                    logger.warning(str(e))
+                    return False, None, None, str(e), attempts_used
+                except TimeoutException as e:
+                    self.rate_limiter.record_throttle('timeout')
+                    self.last_failure_class = FAILURE_UPSTREAM
+                    logger.error(f"Timeout loading website: {str(e)}")
+                    return False, None, None, f"Error loading website: {str(e)}", attempts_used
+                except Exception as e:
+                    self.last_failure_class = FAILURE_UPSTREAM
+                    logger.error(f"Error loading website: {str(e)}")
+                    return False, None, None, f"Error loading website: {str(e)}", attempts_used
+            
+                http_error = self.detect_http_error(driver)
+                if http_error:
+                    self.rate_limiter.record_throttle('http_error')
+                    self.last_failure_class = FAILURE_UPSTREAM
+                    logger.error(f"Upstream returned error page: {http_error}")
+                    return False, None, None, f"Error loading website: {http_error}", attempts_used
             
             # Loop dengan maksimal attempts
-            while not success and attempts_used < self.max_attempts:
+            while not success and attempts_used < max_attempts:
                 try:
                     attempts_used += 1
-                    logger.info(f"Percobaan ke-{attempts_used} untuk nomor {no_porsi}")
+                    logger.info("Percobaan ke-%d untuk nomor %s", attempts_used, no_porsi, extra={'event': 'attempt'})
 
-                    # Input captcha dengan error handling
-                    try:
-                        elem = wait.until(EC.visibility_of_element_located((By.ID, "canv")))
-                        png = elem.screenshot_as_png
-                        img = Image.open(io.BytesIO(png))
-                        text = pytesseract.image_to_string(img, lang="eng", config="--oem 3 --psm 7").strip()
+                    # Captcha standby page sudah diisi saat disiapkan (hanya untuk percobaan pertama)
+                    prepared = standby is not None and attempts_used == 1
+                    if not prepared:
+                        # Input captcha dengan error handling
+                        try:
+                            elem = wait.until(EC.visibility_of_element_located((By.ID, "canv")))
+                            with time_stage('captcha_ocr'):
+                                png = elem.screenshot_as_png
+                                img = Image.open(io.BytesIO(png))
+                                text = pytesseract.image_to_string(img, lang="eng", config=TESSERACT_CONFIG).strip()
                         
-                        # Validasi hasil OCR
-                        if not text or len(text) < 3:
-                            logger.warning(f"OCR result tidak valid: '{text}', mencoba lagi...")
+                            # Validasi hasil OCR
+                            if not text or len(text) < 3:
+                                logger.warning("OCR result tidak valid: '%s', mencoba lagi...", text, extra={'event': 'captcha_ocr_invalid'})
+                                time.sleep(2)
+                                continue
+                            
+                        except Exception as e:
+                            logger.warning("Error reading captcha: %s", e, extra={'event': 'captcha_error'})
                             time.sleep(2)
                             continue
-                            
-                    except Exception as e:
-                        logger.warning(f"Error reading captcha: {str(e)}")
-                        time.sleep(2)
-                        continue
 
-                    # Input captcha
-                    try:
-                        captcha_input = driver.find_element(By.ID, "captcha-input")
-                        captcha_input.clear()
-                        captcha_input.send_keys(text)
-                    except NoSuchElementException:
-                        logger.warning("Captcha input element not found")
-                        continue
+                        # Input captcha
+                        try:
+                            captcha_input = driver.find_element(By.ID, "captcha-input")
+                            captcha_input.clear()
+                            captcha_input.send_keys(text)
+                        except NoSuchElementException:
+                            logger.warning("Captcha input element not found", extra={'event': 'form_element_missing'})
+                            continue
 
                     # Input nomor porsi
                     try:
@@ -228,50 +339,65 @@ class KemenagScraper:
                         no_porsi_input.clear()
                         no_porsi_input.send_keys(no_porsi)
                     except NoSuchElementException:
-                        logger.warning("Nomor porsi input element not found")
+                        logger.warning("Nomor porsi input element not found", extra={'event': 'form_element_missing'})
                         continue
 
-                    time.sleep(2)
+                    if not prepared:
+                        time.sleep(2)
 
                     # Klik tombol search
                     try:
                         search_button = driver.find_element(By.XPATH, '//*[@id="search-tabs"]/div[3]/div/div/div[1]/form/button')
+                        self.rate_limiter.acquire('search')
                         search_button.click()
                     except NoSuchElementException:
-                        logger.warning("Search button not found")
+                        logger.warning("Search button not found", extra={'event': 'form_element_missing'})
                         continue
 
                     # Tunggu hasil
                     try:
-                        hasil_element = wait.until(EC.presence_of_element_located((By.XPATH, '//*[@id="search-tabs"]/div[3]/div/div[2]')))
+                        with time_stage('result_wait'):
+                            hasil_element = wait.until(EC.presence_of_element_located((By.XPATH, RESULT_PANEL_XPATH)))
                         time.sleep(2)
+                        self.rate_limiter.record_captcha_result(accepted=True)
                         
-                        logger.info(f"Berhasil mendapatkan hasil untuk nomor {no_porsi} (percobaan ke-{attempts_used})")
+                        logger.info("Berhasil mendapatkan hasil untuk nomor %s (percobaan ke-%d)", no_porsi, attempts_used)
                         
-                        # Screenshot hasil pencarian
+                        # Screenshot hasil pencarian (dilewati jika profile tidak membutuhkannya)
                         try:
-                            screenshot_png = hasil_element.screenshot_as_png
+                            filename, write_future = None, None
+                            if profile.screenshot:
+                                with time_stage('screenshot_write'):
+                                    screenshot_png = hasil_element.screenshot_as_png
+                                    
+                                    # Encode dan tulis berjalan di thread writer, key berbasis hash konten
+                                    filename, write_future = self.storage.save_async(screenshot_png, profile.screenshot_quality)
                             
-                            # Generate unique filename dengan timestamp
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            unique_id = str(uuid.uuid4())[:8]
-                            filename = f"hasil_{no_porsi}_{timestamp}_{unique_id}.png"
-                            filepath = os.path.join(self.screenshot_folder, filename)
+                            # Scrape text dari elemen-elemen sambil screenshot ditulis
+                            with time_stage('field_extraction'):
+                                scraped_data = self.scrape_text_elements(driver, wait, no_porsi, profile.fields)
                             
-                            # Simpan screenshot
-                            with open(filepath, 'wb') as file:
-                                file.write(screenshot_png)
-                            
-                            logger.info(f"Screenshot disimpan: {filepath}")
-                            
-                            # Scrape text dari elemen-elemen
-                            scraped_data = self.scrape_text_elements(driver, wait, no_porsi)
+                            if write_future is not None:
+                                try:
+                                    stored = write_future.result(timeout=self.timeout)
+                                    logger.info("Screenshot disimpan: %s" if stored else "Screenshot sudah ada (dedupe): %s", filename, extra={'event': 'screenshot_saved'})
+                                except Exception as e:
+                                    logger.error(f"Error saving screenshot {filename}: {str(e)}")
+                                    filename = None
                             
                             if scraped_data:
                                 success = True
+                                CAPTCHA_ATTEMPTS_PER_SUCCESS.observe(attempts_used)
+                                
+                                # Simpan HTML panel hasil untuk replay ekstraksi offline
+                                if settings.store_snapshots:
+                                    try:
+                                        self.last_snapshot_html = hasil_element.get_attribute('outerHTML')
+                                    except Exception as e:
+                                        logger.warning(f"Error capturing result snapshot: {str(e)}")
                                 return True, filename, scraped_data, None, attempts_used
                             else:
-                                logger.warning("Scraping data failed, retrying...")
+                                logger.warning("Scraping data failed, retrying...", extra={'event': 'extraction_failed'})
                                 continue
                             
                         except Exception as e:
@@ -279,31 +405,38 @@ class KemenagScraper:
                             continue
                         
                     except TimeoutException:
-                        logger.warning(f"Element hasil tidak ditemukan, captcha kemungkinan salah (percobaan ke-{attempts_used})")
+                        self.rate_limiter.record_captcha_result(accepted=False)
+                        logger.warning("Element hasil tidak ditemukan, captcha kemungkinan salah (percobaan ke-%d)", attempts_used, extra={'event': 'captcha_rejected'})
                         time.sleep(2)
                         continue
                         
+                except RateLimitExceeded as e:
+                    # Search tidak dikirim; task di-retry dengan backoff alih-alih melewati limit
+                    self.last_failure_class = FAILURE_RATE_LIMITED
+                    logger.warning(str(e))
+                    return False, None, None, str(e), attempts_used
                 except Exception as e:
-                    logger.warning(f"Error pada percobaan ke-{attempts_used}: {str(e)}")
+                    logger.warning("Error pada percobaan ke-%d: %s", attempts_used, e, extra={'event': 'attempt_error'})
                     time.sleep(2)
                     continue
             
             # Jika sudah mencapai max attempts dan masih belum berhasil
             if not success:
-                error_msg = f"Gagal memproses nomor {no_porsi} setelah {self.max_attempts} percobaan"
+                self.last_failure_class = FAILURE_CAPTCHA
+                error_msg = f"Gagal memproses nomor {no_porsi} setelah {attempts_used} percobaan"
                 logger.error(error_msg)
                 return False, None, None, error_msg, attempts_used
                     
         except Exception as e:
+            self.last_failure_class = FAILURE_DRIVER
             error_msg = f"Error fatal untuk nomor {no_porsi}: {str(e)}"
             logger.error(error_msg)
             return False, None, None, error_msg, attempts_used
         finally:
-            # Pastikan driver selalu ditutup
-            if driver:
-                try:
-                    driver.quit()
-                except Exception as e:
-                    logger.warning(f"Error closing driver: {str(e)}")
+            # Pastikan driver selalu ditutup (atau disimpan untuk scrape berikutnya jika masih sehat)
+            if standby is not None:
+                self.standby_pool.give_back(standby, healthy=self.last_failure_class != FAILURE_DRIVER)
+            elif driver:
+                self.release_driver(driver, healthy=self.last_failure_class != FAILURE_DRIVER)
         
         return False, None, None, "Unknown error occurred", attempts_used
\ No newline at end of file
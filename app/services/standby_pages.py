@@ -0,0 +1,243 @@
+"""
+Standby page per proses worker: halaman pencarian yang sudah dimuat dengan captcha
+yang sudah di-OCR, lolos batas confidence dan sudah diketik ke input captcha.
+
+Thread latar menjaga settings.standby_pages page siap pakai dan menyiapkan ulang
+page sebelum captcha-nya kedaluwarsa (settings.standby_refresh_seconds). Task
+scrape_kemenag mengambil page dengan take() sehingga hanya perlu mengisi no_porsi
+dan submit; setelah selesai driver dikembalikan lewat give_back() untuk disiapkan
+ulang. Jika tidak ada page siap, scrape berjalan seperti biasa dengan Chrome baru.
+Setelah settings.standby_idle_seconds tanpa take(), page ditutup sampai task berikutnya.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+import logging
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from ..config import settings
+from ..metrics import STANDBY_PREPARES, STANDBY_TAKES, time_stage
+from .circuit_breaker import get_circuit_breaker
+from .rate_limiter import RateLimitExceeded
+from .selenium_scraper import KemenagScraper
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StandbyPage:
+    driver: object
+    captcha: str
+    confidence: float
+    uses: int = 0
+    prepared_at: float = field(default_factory=time.monotonic)
+
+    def age(self) -> float:
+        return time.monotonic() - self.prepared_at
+
+class StandbyPool:
+    """Buffer standby page milik satu proses; semua akses ke daftar page lewat lock"""
+
+    def __init__(self, size: int):
+        self.size = size
+        # Dipakai untuk setup Chrome, OCR captcha dan rate limiter upstream
+        self.scraper = KemenagScraper()
+        self._ready: List[StandbyPage] = []
+        self._returned: List[StandbyPage] = []
+        self._on_loan = 0  # page yang sedang dipakai task, kembali lewat give_back
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._failures = 0
+        self._last_take_at = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="standby-pages", daemon=True)
+        self._thread.start()
+
+    def take(self) -> Optional[StandbyPage]:
+        """Page siap pakai yang paling baru, atau None (task memakai jalur biasa)"""
+        expired = []
+        page = None
+        was_idle = self._idle()
+        self._last_take_at = time.monotonic()
+        with self._lock:
+            while self._ready:
+                candidate = self._ready.pop()
+                if candidate.age() < settings.standby_max_age_seconds:
+                    page = candidate
+                    break
+                expired.append(candidate)
+            # Page kedaluwarsa disiapkan ulang oleh thread latar
+            self._returned.extend(expired)
+            if page is not None:
+                self._on_loan += 1
+        if expired:
+            STANDBY_TAKES.labels(result='expired').inc(len(expired))
+        if expired or was_idle:
+            self._wake.set()
+        STANDBY_TAKES.labels(result='hit' if page is not None else 'miss').inc()
+        if page is not None:
+            logger.info("Memakai standby page (umur %.0fs, confidence captcha %.0f)", page.age(), page.confidence)
+        return page
+
+    def give_back(self, page: StandbyPage, healthy: bool):
+        """Kembalikan driver setelah scrape; disiapkan ulang jika masih sehat dan belum melewati driver_max_reuse"""
+        page.uses += 1
+        reuse = healthy and page.uses < settings.driver_max_reuse and not self._stopped.is_set()
+        with self._lock:
+            self._on_loan -= 1
+            if reuse:
+                self._returned.append(page)
+        if not reuse:
+            self.scraper._quit_driver(page.driver)
+        self._wake.set()
+
+    def stop(self):
+        """Hentikan thread latar dan tutup semua Chrome milik pool"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=settings.selenium_timeout)
+        with self._lock:
+            pages, self._ready, self._returned = self._ready + self._returned, [], []
+        for page in pages:
+            self.scraper._quit_driver(page.driver)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._refill()
+            except Exception as e:
+                logger.error(f"Error refreshing standby pages: {str(e)}")
+            self._wake.wait(timeout=self._next_wakeup())
+            self._wake.clear()
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self._last_take_at >= settings.standby_idle_seconds
+
+    def _close_idle_pages(self):
+        """Worker idle: tutup Chrome siap pakai agar tidak memuat ulang upstream tanpa task"""
+        with self._lock:
+            pages, self._ready, self._returned = self._ready + self._returned, [], []
+        for page in pages:
+            self.scraper._quit_driver(page.driver)
+        if pages:
+            logger.info("Standby pool idle, %d page ditutup", len(pages))
+
+    def _refill(self):
+        """Siapkan ulang page yang dikembalikan atau hampir kedaluwarsa, lalu lengkapi sampai size"""
+        if self._idle():
+            self._close_idle_pages()
+            return
+        while not self._stopped.is_set() and not get_circuit_breaker().is_open():
+            with self._lock:
+                stale = [page for page in self._ready if page.age() >= settings.standby_refresh_seconds]
+                for page in stale:
+                    self._ready.remove(page)
+                self._returned.extend(stale)
+                if self._returned:
+                    page = self._returned.pop(0)
+                elif len(self._ready) + self._on_loan < self.size:
+                    # Chrome baru hanya jika tidak ada page yang akan kembali dari task
+                    page = None
+                else:
+                    return
+            prepared = self._prepare(page)
+            if prepared is None:
+                self._failures += 1
+                return
+            self._failures = 0
+            with self._lock:
+                self._ready.append(prepared)
+
+    def _prepare(self, page: Optional[StandbyPage]) -> Optional[StandbyPage]:
+        """Muat halaman pencarian dan isi captcha dengan confidence cukup; None jika gagal (driver ditutup)"""
+        uses = page.uses if page is not None else 0
+        driver = page.driver if page is not None else None
+        try:
+            with time_stage('standby_prepare'):
+                if driver is None:
+                    driver = self.scraper.setup_chrome_driver()
+                else:
+                    driver.delete_all_cookies()
+                wait = WebDriverWait(driver, 15)
+                for _ in range(settings.standby_captcha_tries):
+                    self.scraper.rate_limiter.acquire('page_load')
+                    driver.get(self.scraper.search_url)
+                    time.sleep(3)
+                    http_error = self.scraper.detect_http_error(driver)
+                    if http_error:
+                        self.scraper.rate_limiter.record_throttle('http_error')
+                        STANDBY_PREPARES.labels(result='upstream_error').inc()
+                        logger.warning(f"Upstream returned error page while preparing standby page: {http_error}")
+                        break
+
+                    elem = wait.until(EC.visibility_of_element_located((By.ID, "canv")))
+                    captcha, confidence = self.scraper.read_captcha(elem)
+                    if len(captcha) < 3 or confidence < settings.standby_min_captcha_confidence:
+                        STANDBY_PREPARES.labels(result='low_confidence').inc()
+                        logger.info("Captcha standby '%s' confidence %.0f, memuat captcha baru", captcha, confidence,
+                                    extra={'event': 'standby_low_confidence'})
+                        continue
+
+                    captcha_input = driver.find_element(By.ID, "captcha-input")
+                    captcha_input.clear()
+                    captcha_input.send_keys(captcha)
+                    STANDBY_PREPARES.labels(result='ready').inc()
+                    return StandbyPage(driver=driver, captcha=captcha, confidence=confidence, uses=uses)
+        except RateLimitExceeded as e:
+            STANDBY_PREPARES.labels(result='rate_limited').inc()
+            logger.warning(f"Skipping standby page preparation: {str(e)}")
+        except TimeoutException as e:
+            self.scraper.rate_limiter.record_throttle('timeout')
+            STANDBY_PREPARES.labels(result='upstream_error').inc()
+            logger.warning(f"Timeout preparing standby page: {str(e)}")
+        except Exception as e:
+            STANDBY_PREPARES.labels(result='driver_error').inc()
+            logger.warning(f"Error preparing standby page: {str(e)}")
+
+        if driver is not None:
+            self.scraper._quit_driver(driver)
+        return None
+
+    def _next_wakeup(self) -> float:
+        """Detik sampai page tertua perlu disiapkan ulang, dengan backoff setelah kegagalan"""
+        if self._idle():
+            return settings.standby_idle_seconds  # take() berikutnya membangunkan thread
+        if self._failures:
+            return min(5 * 2 ** (self._failures - 1), settings.standby_max_age_seconds)
+        with self._lock:
+            if len(self._ready) + self._on_loan < self.size or self._returned:
+                return 1.0
+            if not self._ready:
+                return settings.standby_refresh_seconds
+            oldest = max(page.age() for page in self._ready)
+        return max(1.0, settings.standby_refresh_seconds - oldest)
+
+_standby_pool: Optional[StandbyPool] = None
+
+def start_standby_pool() -> Optional[StandbyPool]:
+    """Mulai standby pool untuk proses ini (dipanggil di worker_process_init)"""
+    global _standby_pool
+    if settings.standby_pages <= 0:
+        return None
+    if _standby_pool is None:
+        _standby_pool = StandbyPool(settings.standby_pages)
+        _standby_pool.start()
+    return _standby_pool
+
+def get_standby_pool() -> Optional[StandbyPool]:
+    """Standby pool proses ini, None jika belum dimulai (API, runner CLI, pool solo/threads)"""
+    return _standby_pool
+
+def stop_standby_pool():
+    global _standby_pool
+    if _standby_pool is not None:
+        _standby_pool.stop()
+        _standby_pool = None
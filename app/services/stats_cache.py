@@ -0,0 +1,52 @@
+from typing import Callable, Dict, List
+import hashlib
+import json
+import logging
+import redis
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class StatsCache:
+    """
+    Cache hasil query /stats di Redis, dibagi semua instance API.
+    Jika Redis tidak tersedia, query langsung dijalankan (fail open).
+    """
+
+    def __init__(self, prefix: str = "stats"):
+        self.prefix = prefix
+        self._redis = None
+
+    def _client(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.redis_url)
+        return self._redis
+
+    def key_for(self, params: Dict) -> str:
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        return f"{self.prefix}:{digest}"
+
+    def get_or_compute(self, params: Dict, compute: Callable[[], List[Dict]]) -> List[Dict]:
+        key = self.key_for(params)
+        try:
+            cached = self._client().get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except redis.RedisError as e:
+            logger.warning(f"Stats cache unavailable: {str(e)}")
+            return compute()
+
+        rows = compute()
+        try:
+            self._client().set(key, json.dumps(rows), ex=settings.stats_cache_ttl_seconds)
+        except redis.RedisError as e:
+            logger.warning(f"Error writing stats cache: {str(e)}")
+        return rows
+
+_stats_cache = None
+
+def get_stats_cache() -> StatsCache:
+    global _stats_cache
+    if _stats_cache is None:
+        _stats_cache = StatsCache()
+    return _stats_cache
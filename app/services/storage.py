@@ -0,0 +1,240 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextvars
+from typing import Optional, Tuple
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from ..config import settings
+from ..metrics import time_stage
+from ..tracing import span_parent
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    'webp': 'image/webp',
+    'png': 'image/png',
+}
+
+def shard_key(digest: str, extension: str, variant: Optional[str] = None) -> str:
+    """Key bertingkat dari hash konten, mis. ab/cd/abcd....webp (atau abcd...-q40.webp untuk varian)"""
+    name = f"{digest}-{variant}" if variant else digest
+    return f"{digest[:2]}/{digest[2:4]}/{name}.{extension}"
+
+def thumbnail_key(key: str, width: int) -> str:
+    """Key thumbnail untuk screenshot, mis. thumbs/w320/ab/cd/abcd....webp"""
+    base = key.rsplit('.', 1)[0]
+    return f"thumbs/w{width}/{base}.{settings.screenshot_format}"
+
+def is_content_addressed(key: str) -> bool:
+    """True untuk key hasil shard_key (isi tidak pernah berubah), False untuk nama file lama"""
+    parts = key.split('/')
+    if parts[0] == 'thumbs':
+        parts = parts[2:]
+    if len(parts) != 3:
+        return False
+    digest = parts[2].split('.', 1)[0].split('-', 1)[0]
+    return len(digest) == 64 and parts[0] == digest[:2] and parts[1] == digest[2:4]
+
+def media_type_for(key: str) -> str:
+    return MEDIA_TYPES.get(key.rsplit('.', 1)[-1].lower(), 'application/octet-stream')
+
+def encode_screenshot(png_bytes: bytes, quality: Optional[int] = None) -> bytes:
+    """Re-encode screenshot PNG dari Chrome ke format penyimpanan"""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(png_bytes))
+    output = io.BytesIO()
+    if settings.screenshot_format == 'webp':
+        image.save(output, format='WEBP', quality=quality or settings.screenshot_quality, method=4)
+    else:
+        image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+def encode_thumbnail(image_bytes: bytes, width: int) -> bytes:
+    """Resize screenshot ke lebar tertentu (rasio dipertahankan, tidak pernah diperbesar)"""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+    output = io.BytesIO()
+    if settings.screenshot_format == 'webp':
+        image.save(output, format='WEBP', quality=settings.screenshot_quality, method=4)
+    else:
+        image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+class ScreenshotStorage(ABC):
+    """
+    Penyimpanan screenshot content-addressed. Key dihitung dari hash PNG asli
+    di thread scraping (murah), sedangkan encode dan tulis berjalan di thread writer.
+    Screenshot identik hanya disimpan sekali. Backend mengimplementasikan exists/put/get;
+    backend yang belum lengkap gagal saat dibuat, bukan di thread writer.
+    """
+
+    extension = None
+
+    def __init__(self):
+        self.extension = settings.screenshot_format
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.screenshot_writer_threads,
+            thread_name_prefix="screenshot-writer"
+        )
+
+    def save_async(self, png_bytes: bytes, quality: Optional[int] = None) -> Tuple[str, Future]:
+        """
+        Return key secara langsung dan Future untuk penulisan di background.
+        Quality selain default disimpan sebagai varian terpisah dari konten yang sama.
+        """
+        digest = hashlib.sha256(png_bytes).hexdigest()
+        variant = None
+        if quality and quality != settings.screenshot_quality and self.extension == 'webp':
+            variant = f"q{quality}"
+        key = shard_key(digest, self.extension, variant)
+        # Copy context agar label profile ikut ke thread writer; span writer memakai induk
+        # yang diambil di sini karena stack trace terus dipakai thread task
+        context = contextvars.copy_context()
+        parent = span_parent()
+        return key, self._executor.submit(context.run, self._store, key, png_bytes, quality, parent)
+
+    def _store(self, key: str, png_bytes: bytes, quality: Optional[int] = None, parent=None) -> bool:
+        """Return False jika konten yang sama sudah tersimpan (dedupe)"""
+        if self.exists(key):
+            return False
+        with time_stage('screenshot_store', parent=parent):
+            self.put(key, encode_screenshot(png_bytes, quality))
+        return True
+
+    def ensure_thumbnail(self, key: str, width: int) -> Optional[str]:
+        """
+        Return key thumbnail, dibuat dari screenshot asli saat pertama kali diminta.
+        None jika screenshot asli tidak ada.
+        """
+        thumb_key = thumbnail_key(key, width)
+        if self.exists(thumb_key):
+            return thumb_key
+        original = self.get(key)
+        if original is None:
+            return None
+        with time_stage('thumbnail_encode'):
+            self.put(thumb_key, encode_thumbnail(original, width))
+        return thumb_key
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, data: bytes):
+        ...
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+class LocalScreenshotStorage(ScreenshotStorage):
+    """Filesystem lokal di bawah settings.screenshot_folder"""
+
+    def __init__(self, root: Optional[str] = None):
+        super().__init__()
+        self.root = os.path.abspath(root or settings.screenshot_folder)
+        os.makedirs(self.root, exist_ok=True)
+
+    def resolve_path(self, key: str) -> Optional[str]:
+        """Path absolut untuk key, atau None jika key keluar dari root (path traversal)"""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([self.root, path]) != self.root:
+            return None
+        return path
+
+    def exists(self, key: str) -> bool:
+        path = self.resolve_path(key)
+        return path is not None and os.path.exists(path)
+
+    def put(self, key: str, data: bytes):
+        path = self.resolve_path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.resolve_path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path, 'rb') as file:
+            return file.read()
+
+class S3ScreenshotStorage(ScreenshotStorage):
+    """S3-compatible object store (AWS S3, MinIO atau stand-in lokal lewat s3_endpoint_url)"""
+
+    def __init__(self):
+        super().__init__()
+        import boto3
+
+        self.bucket = settings.s3_bucket
+        self.client = boto3.client(
+            's3',
+            endpoint_url=settings.s3_endpoint_url,
+            region_name=settings.s3_region,
+            aws_access_key_id=settings.s3_access_key,
+            aws_secret_access_key=settings.s3_secret_key,
+        )
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError:
+            return False
+
+    def put(self, key: str, data: bytes):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType=media_type_for(key),
+            # Key berbasis hash konten (juga thumbnail-nya), jadi objek tidak pernah berubah
+            CacheControl="public, max-age=31536000, immutable"
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        except ClientError:
+            return None
+
+    def presigned_url(self, key: str, expires: int = 3600) -> str:
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': key},
+            ExpiresIn=expires
+        )
+
+_storage: Optional[ScreenshotStorage] = None
+
+def get_screenshot_storage() -> ScreenshotStorage:
+    """Storage backend sesuai settings.screenshot_backend (local atau s3)"""
+    global _storage
+    if _storage is None:
+        if settings.screenshot_backend == 's3':
+            _storage = S3ScreenshotStorage()
+        else:
+            _storage = LocalScreenshotStorage()
+    return _storage
@@ -1,32 +1,147 @@
 from celery import current_task
+from celery.signals import task_prerun, task_postrun, worker_ready, worker_process_init, worker_process_shutdown
 from .celery_app import app
-from .services.selenium_scraper import KemenagScraper
 from .database import get_db_session
 from .crud import (
     update_record_started,
     update_record_success,
     update_record_failure,
-    create_transaction
+    create_transaction,
+    save_snapshot,
+    record_porsi_scraped,
+    update_porsi_rollup,
+    get_due_porsi,
+    mark_porsi_enqueued,
+    dead_letter_record,
+    resolve_dead_letter,
+    get_replaying_dead_letters
 )
+from .dead_letters import replay_entries
+from .dispatch import (
+    enqueue_scrape,
+    get_queue_depth,
+    has_paused_consumers,
+    pause_scraping_consumers,
+    resume_scraping_consumers
+)
+from .lanes import LANE_BULK, LANE_QUEUES, QUEUE_LANES, record_queue_wait
+from .services.rescrape_scheduler import available_capacity, covers_tracked_fields
+from .services.circuit_breaker import get_circuit_breaker
+from .services.field_parser import parse_scraped_fields
+from .services.retry_policy import backoff_with_jitter, remaining_attempts
+from .metrics import SCRAPE_OUTCOMES, SCRAPE_SECONDS, TASKS_IN_FLIGHT, profile_label, start_worker_exporter
+from .profiles import resolve_profile
+from .progress import ProgressReporter, result_summary
+from .logging_config import bind_log_context, reset_log_context
+from .tracing import start_trace, finish_trace
 from .config import settings
+from datetime import datetime, timedelta
 import logging
+import time
+import urllib.request
 
 logger = logging.getLogger(__name__)
 
-@app.task(bind=True, max_retries=3, default_retry_delay=60)
-def scrape_kemenag(self, task_id: str, no_porsi: str):
+@worker_ready.connect
+def start_metrics_exporter(sender=None, **kwargs):
+    """Expose metrics Prometheus dari worker"""
+    start_worker_exporter()
+
+@worker_process_init.connect
+def start_standby_pages(**kwargs):
     """
-    Celery task untuk melakukan scraping data Kemenag
+    Siapkan standby page di setiap proses pool sebelum task pertama datang, hanya
+    di worker yang consume lane scraping (bukan worker maintenance)
     """
+    from .services.standby_pages import start_standby_pool
+    consumed = app.amqp.queues.consume_from or {}
+    if any(queue in QUEUE_LANES for queue in consumed):
+        start_standby_pool()
+
+@worker_process_shutdown.connect
+def stop_standby_pages(**kwargs):
+    from .services.standby_pages import stop_standby_pool
+    stop_standby_pool()
+
+# Token context log per task yang sedang berjalan, di-reset di task_postrun
+_log_context_tokens = {}
+
+@task_prerun.connect
+def bind_task_log_context(sender=None, task_id=None, task=None, kwargs=None, **extra):
+    """Semua log selama task berjalan membawa task_id, no_porsi dan trace_id"""
+    trace_context = (getattr(task.request, 'trace', None) or {}) if task is not None else {}
+    _log_context_tokens[task_id] = bind_log_context(
+        task_id=task_id,
+        no_porsi=(kwargs or {}).get('no_porsi'),
+        trace_id=trace_context.get('trace_id')
+    )
+
+@task_postrun.connect
+def reset_task_log_context(sender=None, task_id=None, **extra):
+    token = _log_context_tokens.pop(task_id, None)
+    if token is not None:
+        reset_log_context(token)
+
+@task_postrun.connect
+def track_task_finished(sender=None, **kwargs):
+    if sender is not None and sender.name == 'app.tasks.scrape_kemenag':
+        TASKS_IN_FLIGHT.dec()
+
+@task_prerun.connect
+def measure_queue_wait(sender=None, task=None, **kwargs):
+    """Catat waktu tunggu task di queue per lane (hanya eksekusi pertama, bukan retry)"""
+    if sender is None or sender.name != 'app.tasks.scrape_kemenag':
+        return
+    TASKS_IN_FLIGHT.inc()
+    request = task.request
+    enqueued_at = getattr(request, 'enqueued_at', None)
+    lane = getattr(request, 'lane', None)
+    if enqueued_at is None or lane is None or request.retries:
+        return
+    record_queue_wait(lane, max(0.0, time.time() - float(enqueued_at)))
+
+@app.task(bind=True, max_retries=None)
+def scrape_kemenag(self, task_id: str, no_porsi: str, attempts_spent: int = 0, profile: dict = None):
+    """
+    Celery task untuk melakukan scraping data Kemenag.
+    Retry dibatasi oleh attempt budget (settings.scrape_attempt_budget) yang dipakai
+    bersama oleh loop captcha di scraper dan retry Celery.
+    Profile (app.profiles) menentukan field, screenshot dan apakah hasil masuk ke tabel transaction.
+    """
+    # Import di sini agar Beat dan API yang meng-import app.tasks tidak memuat selenium/pytesseract
+    from .services.selenium_scraper import KemenagScraper, FAILURE_RATE_LIMITED, FAILURE_UPSTREAM
+    from .services.standby_pages import get_standby_pool
+    
+    scrape_profile = resolve_profile(profile)
+    breaker = get_circuit_breaker()
+    trace_context = getattr(self.request, 'trace', None)
+    # Header trace, lane dan dead_letter_id (replay dari dead-letter queue) ikut dibawa saat retry
+    dead_letter_id = getattr(self.request, 'dead_letter_id', None)
+    retry_headers = {'trace': trace_context, 'lane': getattr(self.request, 'lane', None), 'dead_letter_id': dead_letter_id}
+    
+    # Upstream sedang down: tunda task tanpa memakai attempt budget
+    if breaker.is_open():
+        logger.info(f"Circuit breaker open, postponing no_porsi: {no_porsi}")
+        SCRAPE_OUTCOMES.labels(outcome='breaker_open', profile=scrape_profile.name).inc()
+        raise self.retry(countdown=settings.breaker_probe_delay_seconds, headers=retry_headers)
+    
+    trace = start_trace(task_id, trace_context, 'scrape_kemenag', no_porsi=no_porsi, retries=self.request.retries, profile=scrape_profile.name)
+    enqueued_at = getattr(self.request, 'enqueued_at', None)
+    if trace and enqueued_at and not self.request.retries:
+        trace.add_span('queue_wait', float(enqueued_at), trace.root['start'], lane=retry_headers['lane'])
+    
     db = None
+    budget_charged = False
+    # Kegagalan di luar scraper (database, dsb.) diklasifikasikan sebagai exception
+    failure_class = 'exception'
+    trace_status = "ok"
+    # Update PROGRESS yang berdekatan digabung agar tidak setiap tahap menulis ke Redis
+    progress = ProgressReporter(self)
     try:
-        logger.info(f"Starting scraping task for no_porsi: {no_porsi}, task_id: {task_id}")
+        logger.info("Starting scraping task for no_porsi: %s, task_id: %s", no_porsi, task_id)
         
         # Update task state dan database record
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Starting scraping process...', 'progress': 0}
-        )
+        progress.update('Starting scraping process...', 0)
         
         # Get database session
         db = get_db_session()
@@ -35,33 +150,53 @@ def scrape_kemenag(self, task_id: str, no_porsi: str):
         update_record_started(db, task_id)
         
         # Update progress
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Setting up browser...', 'progress': 20}
-        )
+        progress.update('Setting up browser...', 20)
         
         # Initialize scraper
-        scraper = KemenagScraper()
+        scraper = KemenagScraper(standby_pool=get_standby_pool())
         
         # Update progress
-        self.update_state(
-            state='PROGRESS',
-            meta={'status': 'Scraping data...', 'progress': 40}
-        )
+        progress.update('Scraping data...', 40)
+        
+        # Perform scraping dengan sisa attempt budget
+        scrape_started = time.perf_counter()
+        with profile_label(scrape_profile.name):
+            success, filename, scraped_data, error_message, attempts_used = scraper.scrape(
+                no_porsi,
+                max_attempts=min(settings.max_attempts, remaining_attempts(attempts_spent)),
+                profile=scrape_profile
+            )
+        SCRAPE_SECONDS.labels(profile=scrape_profile.name).observe(time.perf_counter() - scrape_started)
+        # Setiap sesi browser memakai minimal satu attempt dari budget
+        attempts_spent += max(attempts_used, 1)
+        budget_charged = True
+        if not success:
+            failure_class = scraper.last_failure_class or 'unknown'
         
-        # Perform scraping
-        success, filename, scraped_data, error_message, attempts_used = scraper.scrape(no_porsi)
+        if scraper.last_failure_class == FAILURE_UPSTREAM:
+            if breaker.record_failure():
+                pause_scraping_consumers()
+                breaker.expect_probe(settings.breaker_probe_delay_seconds)
+                probe_upstream.apply_async(countdown=settings.breaker_probe_delay_seconds)
+        elif scraper.last_failure_class != FAILURE_RATE_LIMITED:
+            # Limit lokal habis bukan sinyal kesehatan upstream
+            breaker.record_success()
+        
+        SCRAPE_OUTCOMES.labels(
+            outcome='success' if success else (scraper.last_failure_class or 'unknown'),
+            profile=scrape_profile.name
+        ).inc()
         
         if success:
             # Update progress
-            self.update_state(
-                state='PROGRESS',
-                meta={'status': 'Saving results...', 'progress': 80}
-            )
+            progress.update('Saving results...', 80)
             
             # Generate screenshot URL
             screenshot_url = f"http://localhost:{settings.api_port}/files/{filename}" if filename else None
             
+            # Field mentah -> kolom bertipe (tahun keberangkatan, status bayar, ...)
+            parsed = parse_scraped_fields(scraped_data)
+            
             # Update database dengan hasil scraping (scrape_records)
             record = update_record_success(
                 db=db,
@@ -69,60 +204,36 @@ def scrape_kemenag(self, task_id: str, no_porsi: str):
                 scraped_data=scraped_data,
                 screenshot_filename=filename,
                 screenshot_url=screenshot_url,
-                attempts_used=attempts_used
-            )
-            # Tambahkan ke tabel transaction
-            create_transaction(db, scraped_data)
-            
-            # Final update
-            self.update_state(
-                state='SUCCESS',
-                meta={
-                    'status': 'Scraping completed successfully',
-                    'progress': 100,
-                    'result': {
-                        'record_id': str(record.id) if record else None,
-                        'no_porsi': no_porsi,
-                        'filename': filename,
-                        'screenshot_url': screenshot_url,
-                        'scraped_data': scraped_data,
-                        'attempts_used': attempts_used
-                    }
-                }
+                attempts_used=attempts_spent,
+                parsed=parsed
             )
+            if record and scraper.last_snapshot_html:
+                save_snapshot(db, record.id, scraper.last_snapshot_html)
+            # Tambahkan ke tabel transaction (bisa dimatikan lewat profile)
+            if scrape_profile.persist_transaction:
+                create_transaction(db, scraped_data)
+            # Update freshness untuk scheduler re-scrape. Profile parsial (mis. estimasi)
+            # dilewati: field lain None sehingga hash-nya selalu terlihat berubah
+            if covers_tracked_fields(scrape_profile.fields):
+                record_porsi_scraped(db, no_porsi, scraped_data)
+            # Rollup analitik untuk /stats
+            if record:
+                update_porsi_rollup(db, no_porsi, record.id, scraped_data, parsed)
+            if dead_letter_id:
+                resolve_dead_letter(db, dead_letter_id)
             
-            logger.info(f"Scraping task completed successfully for no_porsi: {no_porsi}")
+            logger.info("Scraping task completed successfully for no_porsi: %s", no_porsi)
             
-            return {
-                'status': 'SUCCESS',
-                'record_id': str(record.id) if record else None,
-                'no_porsi': no_porsi,
-                'filename': filename,
-                'screenshot_url': screenshot_url,
-                'scraped_data': scraped_data,
-                'attempts_used': attempts_used
-            }
+            # Nilai return menjadi hasil SUCCESS di backend: hanya referensi ke record
+            return result_summary(
+                record_id=str(record.id) if record else None,
+                no_porsi=no_porsi,
+                attempts_used=attempts_spent,
+                filename=filename
+            )
         
         else:
-            # Update database with failure
-            update_record_failure(
-                db=db,
-                task_id=task_id,
-                error_message=error_message,
-                attempts_used=attempts_used
-            )
-            
-            # Update task state
-            self.update_state(
-                state='FAILURE',
-                meta={
-                    'status': 'Scraping failed',
-                    'error': error_message,
-                    'attempts_used': attempts_used
-                }
-            )
-            
-            logger.error(f"Scraping task failed for no_porsi: {no_porsi}, error: {error_message}")
+            logger.error("Scraping task failed for no_porsi: %s, error: %s", no_porsi, error_message)
             
             # Raise exception to mark task as failed
             raise Exception(error_message)
@@ -130,36 +241,54 @@ def scrape_kemenag(self, task_id: str, no_porsi: str):
     except Exception as exc:
         logger.error(f"Task exception for no_porsi: {no_porsi}, error: {str(exc)}")
         
-        # Update database with failure if not already done
+        # Kegagalan sebelum scraping (mis. database) tetap memakai budget agar retry terbatas
+        if not budget_charged:
+            attempts_spent += 1
+            SCRAPE_OUTCOMES.labels(outcome='exception', profile=scrape_profile.name).inc()
+        
+        # Update database with failure
         if db:
             try:
                 update_record_failure(
                     db=db,
                     task_id=task_id,
                     error_message=str(exc),
-                    attempts_used=0
+                    attempts_used=attempts_spent,
+                    failure_class=failure_class
                 )
             except Exception as db_exc:
                 logger.error(f"Error updating database on task failure: {str(db_exc)}")
         
-        # Update task state
-        self.update_state(
-            state='FAILURE',
-            meta={
-                'status': 'Task failed with exception',
-                'error': str(exc)
-            }
-        )
-        
-        # Retry if retries are available
-        if self.request.retries < self.max_retries:
-            logger.info(f"Retrying task for no_porsi: {no_porsi} (attempt {self.request.retries + 1})")
-            raise self.retry(countdown=60, exc=exc)
-        
-        # Final failure
+        # State RETRY/FAILURE ditulis oleh Celery sendiri saat retry atau raise
+        # Retry selama attempt budget masih tersisa
+        if remaining_attempts(attempts_spent) > 0:
+            countdown = backoff_with_jitter(self.request.retries)
+            logger.info(f"Retrying task for no_porsi: {no_porsi} in {countdown:.0f}s ({attempts_spent}/{settings.scrape_attempt_budget} attempts used)")
+            trace_status = "retry"
+            raise self.retry(
+                countdown=countdown,
+                exc=exc,
+                kwargs={'task_id': task_id, 'no_porsi': no_porsi, 'attempts_spent': attempts_spent, 'profile': profile},
+                headers=retry_headers
+            )
+        
+        # Final failure: masuk dead-letter queue untuk triage dan replay
+        trace_status = "error"
+        if db:
+            dead_letter_record(
+                db,
+                task_id=task_id,
+                failure_class=failure_class,
+                error_message=str(exc),
+                attempts_used=attempts_spent,
+                profile=profile,
+                lane=retry_headers['lane']
+            )
         raise exc
     
     finally:
+        finish_trace(trace_status)
+        
         # Close database session
         if db:
             try:
@@ -167,6 +296,117 @@ def scrape_kemenag(self, task_id: str, no_porsi: str):
             except Exception as e:
                 logger.error(f"Error closing database session: {str(e)}")
 
+@app.task
+def schedule_rescrapes():
+    """
+    Periodic task (Celery Beat) untuk re-scrape porsi yang datanya sudah basi.
+    Jumlah enqueue per tick dibatasi oleh kedalaman queue broker.
+    """
+    if not settings.rescrape_enabled:
+        return {'enqueued': 0, 'reason': 'disabled'}
+    
+    try:
+        queue_depth = get_queue_depth(LANE_QUEUES[LANE_BULK])
+    except Exception as e:
+        logger.error(f"Cannot read scraping queue depth, skipping tick: {str(e)}")
+        return {'enqueued': 0, 'reason': 'queue depth unavailable'}
+    
+    capacity = available_capacity(queue_depth)
+    if capacity <= 0:
+        logger.info(f"Scraping queue depth {queue_depth} at limit, skipping re-scrape tick")
+        return {'enqueued': 0, 'queue_depth': queue_depth}
+    
+    db = get_db_session()
+    enqueued = 0
+    try:
+        now = datetime.utcnow()
+        due = get_due_porsi(db, now, capacity)
+        inflight_until = now + timedelta(seconds=settings.rescrape_inflight_timeout_seconds)
+        mark_porsi_enqueued(db, due, now, inflight_until)
+        
+        for schedule in due:
+            try:
+                enqueue_scrape(db, schedule.no_porsi, priority=LANE_BULK)
+                enqueued += 1
+            except Exception as e:
+                logger.error(f"Error enqueueing re-scrape for no_porsi {schedule.no_porsi}: {str(e)}")
+        
+        logger.info(f"Re-scrape tick: enqueued {enqueued} porsi (queue depth {queue_depth})")
+        return {'enqueued': enqueued, 'queue_depth': queue_depth}
+    finally:
+        db.close()
+
+@app.task(bind=True, max_retries=None)
+def probe_upstream(self, delay: int = None):
+    """
+    Probe upstream selama circuit breaker terbuka. Jika berhasil, breaker ditutup
+    dan worker kembali mengambil task scraping; jika gagal, probe dijadwalkan ulang
+    dengan backoff.
+    """
+    breaker = get_circuit_breaker()
+    delay = delay or settings.breaker_probe_delay_seconds
+    
+    if not breaker.is_open():
+        resume_scraping_consumers()
+        return {'state': 'closed'}
+    
+    try:
+        request = urllib.request.Request(settings.kemenag_search_url, headers={'User-Agent': 'Mozilla/5.0'})
+        with urllib.request.urlopen(request, timeout=settings.breaker_probe_timeout) as response:
+            healthy = response.status < 500
+    except Exception as e:
+        logger.warning(f"Upstream probe failed: {str(e)}")
+        healthy = False
+    
+    if healthy:
+        breaker.close()
+        resume_scraping_consumers()
+        return {'state': 'closed'}
+    
+    next_delay = min(delay * 2, settings.breaker_probe_max_delay_seconds)
+    logger.warning(f"Upstream still unavailable, next probe in {next_delay}s")
+    breaker.expect_probe(next_delay)
+    raise self.retry(countdown=next_delay, kwargs={'delay': next_delay})
+
+@app.task
+def check_circuit_breaker():
+    """
+    Periodic task (Celery Beat) yang menjaga breaker tidak macet. Jika breaker terbuka
+    tetapi probe yang dijadwalkan tidak berjalan (task hilang, di-revoke, worker restart),
+    probe baru dijadwalkan. Jika breaker sudah tertutup (atau state open kedaluwarsa)
+    sementara consumer masih di-pause, consumer dikembalikan.
+    """
+    breaker = get_circuit_breaker()
+    if breaker.is_open():
+        if not breaker.probe_overdue():
+            return {'state': 'open'}
+        logger.warning("Circuit breaker open without a pending probe, scheduling one")
+        breaker.expect_probe(0)
+        probe_upstream.apply_async()
+        return {'state': 'open', 'probe': 'scheduled'}
+    if has_paused_consumers():
+        logger.warning("Circuit breaker closed but scraping consumers still paused, resuming")
+        resume_scraping_consumers()
+        return {'state': 'closed', 'resumed': True}
+    return {'state': 'closed'}
+
+@app.task
+def replay_dead_letters(ids: list, rate: float = None, lane: str = None):
+    """
+    Kirim ulang entry dead-letter yang sudah di-claim (lihat app.dead_letters) secara
+    bertahap. Setelah settings.dlq_replay_task_seconds sisa entry dilanjutkan di task
+    baru agar tidak terkena soft time limit.
+    """
+    db = get_db_session()
+    try:
+        entries = get_replaying_dead_letters(db, ids)
+        stats = replay_entries(db, entries, rate=rate, lane=lane, deadline=time.monotonic() + settings.dlq_replay_task_seconds)
+        if stats['remaining']:
+            replay_dead_letters.apply_async(kwargs={'ids': stats['remaining'], 'rate': rate, 'lane': lane})
+        return {**stats, 'remaining': len(stats['remaining'])}
+    finally:
+        db.close()
+
 @app.task
 def cleanup_old_results():
     """
@@ -0,0 +1,151 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import random
+import time
+import uuid
+import redis
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Trace aktif untuk task yang sedang dieksekusi di proses/thread ini
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+def new_trace_context() -> Dict:
+    """Buat trace context saat enqueue; keputusan sampling dibuat sekali di sini"""
+    return {
+        'trace_id': uuid.uuid4().hex,
+        'sampled': random.random() < settings.trace_sample_rate,
+    }
+
+def _trace_key(task_id: str) -> str:
+    return f"trace:{task_id}"
+
+class Trace:
+    """Kumpulan span untuk satu task; di-buffer di memori dan ditulis sekali ke Redis"""
+
+    def __init__(self, task_id: str, trace_id: str):
+        self.task_id = task_id
+        self.trace_id = trace_id
+        self.spans: List[Dict] = []
+        self.stack: List[str] = []
+        self.root: Optional[Dict] = None
+
+    def add_span(self, name: str, start: float, end: float, parent_id: Optional[str] = None,
+                 status: str = "ok", **attrs) -> Dict:
+        span = {
+            'trace_id': self.trace_id,
+            'span_id': uuid.uuid4().hex[:16],
+            'parent_id': parent_id if parent_id is not None else (self.stack[-1] if self.stack else None),
+            'name': name,
+            'start': start,
+            'end': end,
+            'duration_ms': round((end - start) * 1000, 3),
+            'status': status,
+            'attrs': attrs,
+        }
+        self.spans.append(span)
+        return span
+
+    def flush(self):
+        if not self.spans:
+            return
+        try:
+            r = redis.from_url(settings.redis_url)
+            pipe = r.pipeline()
+            pipe.rpush(_trace_key(self.task_id), *[json.dumps(span, default=str) for span in self.spans])
+            pipe.expire(_trace_key(self.task_id), settings.trace_ttl_seconds)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Error exporting trace for task_id {self.task_id}: {str(e)}")
+        self.spans = []
+
+def start_trace(task_id: str, context: Optional[Dict], root_name: str, **attrs) -> Optional[Trace]:
+    """
+    Aktifkan trace untuk task ini jika context-nya ter-sample.
+    Root span dibuka di sini dan ditutup oleh finish_trace().
+    """
+    if not context or not context.get('sampled'):
+        _current_trace.set(None)
+        return None
+    trace = Trace(task_id, context.get('trace_id') or uuid.uuid4().hex)
+    trace.root = {'span_id': uuid.uuid4().hex[:16], 'name': root_name, 'start': time.time(), 'attrs': attrs}
+    trace.stack.append(trace.root['span_id'])
+    _current_trace.set(trace)
+    return trace
+
+def finish_trace(status: str = "ok"):
+    """Tutup root span, tulis semua span ke Redis dan nonaktifkan trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        root = trace.root
+        trace.stack.clear()
+        recorded = trace.add_span(root['name'], root['start'], time.time(), status=status, **root['attrs'])
+        recorded['span_id'] = root['span_id']
+        trace.flush()
+    _current_trace.set(None)
+
+@contextmanager
+def span(name: str, **attrs):
+    """Span di sekitar satu langkah; no-op jika task tidak ter-sample"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = trace.stack[-1] if trace.stack else None
+    trace.stack.append(span_id)
+    start = time.time()
+    status = "ok"
+    try:
+        yield
+    except BaseException as e:
+        status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        trace.stack.pop()
+        recorded = trace.add_span(name, start, time.time(), parent_id=parent_id, status=status, **attrs)
+        recorded['span_id'] = span_id
+
+def span_parent() -> Optional[Tuple[Trace, str]]:
+    """Trace aktif dan span_id induk saat ini, diambil sebelum pekerjaan dikirim ke thread lain"""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    return trace, trace.stack[-1] if trace.stack else trace.root['span_id']
+
+@contextmanager
+def child_span(parent: Optional[Tuple[Trace, str]], name: str, **attrs):
+    """
+    Span dengan induk eksplisit dari span_parent(), untuk thread lain (mis. writer
+    screenshot). Stack trace tidak disentuh karena masih dipakai thread task.
+    """
+    if parent is None:
+        yield
+        return
+
+    trace, parent_id = parent
+    start = time.time()
+    status = "ok"
+    try:
+        yield
+    except BaseException as e:
+        status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        trace.add_span(name, start, time.time(), parent_id=parent_id, status=status, **attrs)
+
+def get_trace(task_id: str) -> List[Dict]:
+    """Ambil semua span untuk task_id, diurutkan berdasarkan waktu mulai"""
+    r = redis.from_url(settings.redis_url)
+    spans = [json.loads(raw) for raw in r.lrange(_trace_key(task_id), 0, -1)]
+    spans.sort(key=lambda item: item['start'])
+    if spans:
+        origin = spans[0]['start']
+        for item in spans:
+            item['offset_ms'] = round((item['start'] - origin) * 1000, 3)
+    return spans
@@ -0,0 +1,21 @@
+"""
+Entry point proses worker Celery dan Beat.
+
+    celery -A app.worker worker -Q scraping -c 4
+    celery -A app.worker worker -Q scraping --autoscale=12,2
+    celery -A app.worker worker -Q maintenance -c 1 -n maintenance@%h
+    celery -A app.worker beat
+
+Queue maintenance (re-scrape terjadwal, probe dan watchdog circuit breaker, replay
+dead letter) wajib dikonsumsi satu worker; worker scraping tidak mengambilnya.
+
+API (uvicorn app.main:app) tidak meng-import modul ini. Dependency scraper
+(selenium, webdriver_manager, pytesseract, PIL) di-import di sini sekali di
+proses utama worker, sebelum fork, sehingga child process tidak membayar
+biaya import saat task pertama.
+"""
+from .celery_app import app
+from . import tasks  # noqa: F401 - register task
+from .services import selenium_scraper  # noqa: F401 - preload sebelum fork
+
+__all__ = ["app"]
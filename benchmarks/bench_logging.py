@@ -0,0 +1,222 @@
+"""
+Overhead logging per lookup: basicConfig + f-string lama vs pipeline async (app.logging_config).
+
+    python -m benchmarks.bench_logging --lookups 2000 --threads 8
+    python -m benchmarks.bench_logging --sink-delay-ms 0.2
+    python -m benchmarks.bench_logging --modes legacy,pipeline --compare benchmarks/results/prev.json
+
+Setiap lookup mensimulasikan urutan log satu scrape (attempt, captcha ditolak, field
+per field, screenshot) tanpa Selenium, dijalankan paralel di beberapa thread. Yang
+diukur adalah waktu di thread pemanggil per lookup (yang menahan scrape), ditambah
+waktu flush listener saat shutdown, jumlah record/byte yang ditulis dan record yang
+di-drop per alasan. Output ditulis ke file sementara, bukan ke terminal;
+--sink-delay-ms menambahkan jeda per write untuk meniru stdout yang tertahan
+(pipe ke log collector yang lambat).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from .common import compare_results, percentile, write_results
+
+FIELDS = [
+    ("Nama", "SITI AMINAH BINTI ABDULLAH"),
+    ("Kabupaten", "KAB. BANDUNG"),
+    ("Provinsi", "JAWA BARAT"),
+    ("Kuota Provinsi / Kab / Kota / Khusus", "38.723"),
+    ("Posisi Porsi Pada Kuota Provinsi / Kab / Kota / Khusus", "12.345"),
+    ("Status Bayar", "Lunas Tunda"),
+    ("Waktu Permintaan Informasi", "19 Oktober 2026 10:11:12"),
+]
+REJECTED_ATTEMPTS = 2
+
+def legacy_lookup(logger: logging.Logger, no_porsi: str):
+    """Urutan log lama: f-string diformat di thread pemanggil"""
+    logger.info(f"Memproses nomor porsi: {no_porsi}")
+    attempts_used = 0
+    for _ in range(REJECTED_ATTEMPTS):
+        attempts_used += 1
+        logger.info(f"Percobaan ke-{attempts_used} untuk nomor {no_porsi}")
+        logger.warning(f"Element hasil tidak ditemukan, captcha kemungkinan salah (percobaan ke-{attempts_used})")
+    attempts_used += 1
+    logger.info(f"Percobaan ke-{attempts_used} untuk nomor {no_porsi}")
+    logger.info(f"Berhasil mendapatkan hasil untuk nomor {no_porsi} (percobaan ke-{attempts_used})")
+    for field, value in FIELDS:
+        logger.info(f"{field} berhasil di-scrape: {value}")
+    logger.info("Estimasi Keberangkatan berhasil di-scrape: 1448 H / 2027 M")
+    logger.info(f"Semua data berhasil di-scrape untuk nomor porsi {no_porsi}")
+    logger.info(f"Screenshot disimpan: {no_porsi}_20261019_101112.png")
+
+def pipeline_lookup(logger: logging.Logger, no_porsi: str):
+    """Urutan log yang sama dengan gaya lazy dan atribut event seperti di selenium_scraper"""
+    from app.logging_config import log_context
+
+    with log_context(no_porsi=no_porsi):
+        logger.info("Memproses nomor porsi: %s", no_porsi)
+        attempts_used = 0
+        for _ in range(REJECTED_ATTEMPTS):
+            attempts_used += 1
+            logger.info("Percobaan ke-%d untuk nomor %s", attempts_used, no_porsi, extra={'event': 'attempt'})
+            logger.warning("Element hasil tidak ditemukan, captcha kemungkinan salah (percobaan ke-%d)", attempts_used, extra={'event': 'captcha_rejected'})
+        attempts_used += 1
+        logger.info("Percobaan ke-%d untuk nomor %s", attempts_used, no_porsi, extra={'event': 'attempt'})
+        logger.info("Berhasil mendapatkan hasil untuk nomor %s (percobaan ke-%d)", no_porsi, attempts_used)
+        for field, value in FIELDS:
+            logger.info("%s berhasil di-scrape: %s", field, value, extra={'event': 'field_scraped'})
+        logger.info("Estimasi Keberangkatan berhasil di-scrape: %s", "1448 H / 2027 M", extra={'event': 'field_scraped'})
+        logger.info("Semua data berhasil di-scrape untuk nomor porsi %s", no_porsi)
+        logger.info("Screenshot disimpan: %s", f"{no_porsi}_20261019_101112.png", extra={'event': 'screenshot_saved'})
+
+class SlowStream:
+    """Stream file dengan jeda per write, meniru sink yang memblokir"""
+
+    def __init__(self, stream, delay_seconds: float):
+        self.stream = stream
+        self.delay_seconds = delay_seconds
+
+    def write(self, data: str):
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+def dropped_counts() -> Dict[str, float]:
+    from app.metrics import LOG_RECORDS_DROPPED
+
+    return {
+        sample.labels["reason"]: sample.value
+        for metric in LOG_RECORDS_DROPPED.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_total")
+    }
+
+def reset_root_logger():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+def setup_legacy(stream):
+    reset_root_logger()
+    # Setara logging.basicConfig(level=logging.INFO) dengan stream file
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+def setup_pipeline(stream, sampled: bool):
+    from app.config import settings
+    from app.logging_config import configure_logging
+
+    if not sampled:
+        settings.log_sample_rates = {}
+        settings.log_event_rate_limit_per_minute = 0
+    configure_logging(stream=stream, force=True)
+
+def run_mode(mode: str, lookups: int, threads: int, sink_delay_ms: float, defaults: Dict) -> Dict:
+    from app.config import settings
+    from app.logging_config import stop_logging
+
+    settings.log_sample_rates = dict(defaults["log_sample_rates"])
+    settings.log_event_rate_limit_per_minute = defaults["log_event_rate_limit_per_minute"]
+
+    fd, path = tempfile.mkstemp(prefix=f"bench_logging_{mode}_", suffix=".log")
+    os.close(fd)
+    stream = open(path, "w")
+    sink = SlowStream(stream, sink_delay_ms / 1000)
+    if mode == "legacy":
+        setup_legacy(sink)
+        lookup: Callable = legacy_lookup
+    else:
+        setup_pipeline(sink, sampled=mode == "pipeline")
+        lookup = pipeline_lookup
+
+    logger = logging.getLogger("app.services.selenium_scraper")
+    dropped_before = dropped_counts()
+
+    def timed(index: int) -> float:
+        started = time.perf_counter()
+        lookup(logger, f"{3000000000 + index}")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies: List[float] = list(pool.map(timed, range(lookups)))
+    caller_seconds = time.perf_counter() - started
+
+    flush_started = time.perf_counter()
+    if mode != "legacy":
+        stop_logging()
+    reset_root_logger()
+    stream.close()
+    flush_seconds = time.perf_counter() - flush_started
+
+    with open(path, "rb") as file:
+        data = file.read()
+    os.remove(path)
+    dropped_after = dropped_counts()
+
+    return {
+        "per_lookup_us": {
+            "p50": round(percentile(latencies, 50) * 1e6, 1),
+            "p95": round(percentile(latencies, 95) * 1e6, 1),
+            "p99": round(percentile(latencies, 99) * 1e6, 1),
+            "mean": round(sum(latencies) / len(latencies) * 1e6, 1),
+        },
+        "lookups_per_second": round(lookups / caller_seconds, 1) if caller_seconds else 0.0,
+        "flush_ms": round(flush_seconds * 1000, 1),
+        "records_written": data.count(b"\n"),
+        "bytes_written": len(data),
+        "bytes_per_lookup": round(len(data) / lookups, 1),
+        "dropped": {
+            reason: dropped_after[reason] - dropped_before.get(reason, 0)
+            for reason in dropped_after
+            if dropped_after[reason] - dropped_before.get(reason, 0)
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead logging per lookup scraping")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8, help="Thread yang logging bersamaan (mis. concurrency worker)")
+    parser.add_argument("--modes", default="legacy,pipeline_unsampled,pipeline")
+    parser.add_argument("--sink-delay-ms", type=float, default=0.0, help="Jeda per write ke output (meniru stdout yang tertahan)")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", help="File hasil sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    from app.config import settings
+
+    defaults = {
+        "log_sample_rates": dict(settings.log_sample_rates),
+        "log_event_rate_limit_per_minute": settings.log_event_rate_limit_per_minute,
+    }
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    results = {
+        "lookups": args.lookups,
+        "threads": args.threads,
+        "sink_delay_ms": args.sink_delay_ms,
+        "log_format": settings.log_format,
+        "config": defaults,
+        "modes": {mode: run_mode(mode, args.lookups, args.threads, args.sink_delay_ms, defaults) for mode in modes},
+    }
+    if args.compare:
+        results["comparison"] = compare_results(
+            results, args.compare,
+            [f"modes.{mode}.per_lookup_us.{key}" for mode in modes for key in ("p50", "p95")]
+            + [f"modes.{mode}.bytes_per_lookup" for mode in modes]
+        )
+    path = write_results("logging", results, args.output)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {path}")
+
+if __name__ == "__main__":
+    main()
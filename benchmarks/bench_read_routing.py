@@ -0,0 +1,170 @@
+"""
+Cek routing read/write split dengan dua database SQLite sebagai primary dan replica.
+
+    python -m benchmarks.bench_read_routing
+    python -m benchmarks.bench_read_routing --redis redis://localhost:6379/15 --reads 500
+
+Replica adalah file SQLite terpisah yang hanya menyusul saat replicate() dipanggil,
+sehingga replica lag bisa diatur. Skenario dijalankan lewat API (TestClient):
+record yang baru ditulis harus dibaca dari primary (read-your-writes), setelah
+penanda kedaluwarsa dibaca dari replica, dan /search dan /stats selalu ke replica.
+Juga mengukur latency GET per target. Exit code 1 jika ada cek yang gagal.
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from .common import latency_summary, write_results
+
+def configure(workdir: str, ttl_seconds: int, redis_url: str):
+    """Harus dipanggil sebelum import app.* (settings dan engine dibuat saat import)"""
+    if redis_url:
+        os.environ["REDIS_URL"] = redis_url
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'primary.db')}"
+    os.environ["DATABASE_READ_URL"] = f"sqlite:///{os.path.join(workdir, 'replica.db')}"
+    os.environ["READ_YOUR_WRITES_SECONDS"] = str(ttl_seconds)
+    os.environ["AUTO_CREATE_SCHEMA"] = "false"
+
+def replicate():
+    """Salin scrape_records primary -> replica (menyusulkan replica)"""
+    from app.database import engine, read_engine
+    from app.models import ScrapeRecord
+
+    table = ScrapeRecord.__table__
+    with engine.connect() as source:
+        rows = [dict(row._mapping) for row in source.execute(table.select())]
+    with read_engine.begin() as target:
+        target.execute(table.delete())
+        if rows:
+            target.execute(table.insert(), rows)
+
+def route_counts() -> Dict[str, float]:
+    from app.metrics import DB_READ_ROUTES
+
+    return {
+        sample.labels["target"]: sample.value
+        for metric in DB_READ_ROUTES.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_total")
+    }
+
+def routed_to(client, path: str) -> str:
+    """Panggil path dan kembalikan target session yang dipakai"""
+    before = route_counts()
+    response = client.get(path)
+    after = route_counts()
+    changed = [target for target, value in after.items() if value > before.get(target, 0)]
+    return f"{changed[0] if changed else 'none'}:{response.status_code}"
+
+def run_checks(client, ttl_seconds: int) -> List[Dict]:
+    from app.crud import create_scrape_record, update_record_success
+    from app.database import get_db_session
+
+    checks = []
+
+    def check(name: str, actual: str, expected: str):
+        checks.append({"check": name, "expected": expected, "actual": actual, "ok": actual == expected})
+
+    db = get_db_session()
+    try:
+        task_id = str(uuid.uuid4())
+        no_porsi = f"RR{uuid.uuid4().hex[:8]}"
+        create_scrape_record(db, task_id, no_porsi)
+        check("new record is read from primary", routed_to(client, f"/records/by-task/{task_id}"), "primary_recent_write:200")
+        check("new porsi list is read from primary", routed_to(client, f"/records/by-porsi/{no_porsi}"), "primary_recent_write:200")
+
+        time.sleep(ttl_seconds + 0.2)
+        check("expired marker reads lagging replica", routed_to(client, f"/records/by-task/{task_id}"), "replica:404")
+
+        replicate()
+        check("caught-up replica serves record", routed_to(client, f"/records/by-task/{task_id}"), "replica:200")
+
+        update_record_success(db, task_id, {"nama": "SITI AMINAH", "provinsi": "JAWA BARAT"})
+        response = client.get(f"/records/by-task/{task_id}")
+        check("status change visible immediately", response.json()["data"]["status"], "SUCCESS")
+
+        check("search reads replica", routed_to(client, "/search?q=siti"), "replica:200")
+        check("stats reads replica", routed_to(client, "/stats"), "replica:200")
+    finally:
+        db.close()
+    return checks
+
+def measure_reads(client, reads: int) -> Dict:
+    """Latency GET /records/by-task per target (replica vs primary karena baru ditulis)"""
+    from app.crud import create_scrape_record
+    from app.database import get_db_session
+
+    db = get_db_session()
+    try:
+        task_id = str(uuid.uuid4())
+        create_scrape_record(db, task_id, f"RR{uuid.uuid4().hex[:8]}")
+    finally:
+        db.close()
+    replicate()
+
+    primary = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        client.get(f"/records/by-task/{task_id}")
+        primary.append(time.perf_counter() - started)
+
+    from app.services.recent_writes import get_recent_writes
+    get_recent_writes()._client().delete(f"rw:task:{task_id}")
+    replica = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        client.get(f"/records/by-task/{task_id}")
+        replica.append(time.perf_counter() - started)
+    return {"primary_recent_write": latency_summary(primary), "replica": latency_summary(replica)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Cek routing read replica dan read-your-writes")
+    parser.add_argument("--ttl", type=int, default=1, help="read_your_writes_seconds untuk run ini")
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--redis", default="", help="URL Redis sungguhan (default fakeredis)")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="read_routing_")
+    configure(workdir, args.ttl, args.redis)
+
+    from fastapi.testclient import TestClient
+    from app.database import Base, engine, read_engine
+    from app.main import app
+    from app.schema import create_schema
+    from app.services.recent_writes import get_recent_writes
+    from app.services.stats_cache import get_stats_cache
+
+    if not args.redis:
+        import fakeredis
+        fake = fakeredis.FakeRedis()
+        get_recent_writes()._redis = fake
+        get_stats_cache()._redis = fake
+
+    create_schema()
+    Base.metadata.create_all(bind=read_engine)
+    assert read_engine is not engine
+
+    client = TestClient(app)
+    checks = run_checks(client, args.ttl)
+    results = {
+        "checks": checks,
+        "passed": all(check["ok"] for check in checks),
+        "latency": measure_reads(client, args.reads),
+    }
+    path = write_results("read_routing", results, args.output)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {path}")
+
+    if not results["passed"]:
+        failed = [check["check"] for check in checks if not check["ok"]]
+        print("Read routing checks failed:\n  " + "\n  ".join(failed), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
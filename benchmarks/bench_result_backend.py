@@ -0,0 +1,164 @@
+"""
+Ukur byte dan operasi Redis per task di result backend Celery.
+
+    python -m benchmarks.bench_result_backend
+    python -m benchmarks.bench_result_backend --redis redis://localhost:6379/15 --scrape-seconds 20
+
+Membandingkan protokol lama (lima update_state dengan pesan lengkap, SUCCESS berisi
+scraped_data) dengan protokol ringkas (ProgressReporter + result_summary), masing-masing
+dengan serializer json dan msgpack. Backend Redis Celery dipakai apa adanya; default
+memakai fakeredis sehingga tidak butuh server.
+"""
+from typing import Dict, List
+import argparse
+import json
+import uuid
+
+from .common import compare_results, write_results
+
+SCRAPED_DATA = {
+    "nama": "SITI AMINAH BINTI ABDULLAH",
+    "kabupaten": "KAB. BANDUNG",
+    "provinsi": "JAWA BARAT",
+    "kuota_provinsi_kab_kota_khusus": "38.723",
+    "status_bayar": "Lunas Tunda",
+    "estimasi_keberangkatan": "Estimasi Keberangkatan : 1451 H / 2030 M",
+    "waktu_permintaan_informasi": "19 Oktober 2026 10:15:42",
+    "no_porsi": "1000123456",
+}
+FILENAME = "ab/cd/abcd5f0e3c9a6b41e1b0f4c2a7d9e8f6a5b4c3d2e1f0a9b8c7d6e5f4a3b2c1d0.webp"
+
+class CountingBackend:
+    """Bungkus RedisBackend.set/get untuk menghitung operasi dan byte yang ditulis"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.sets = 0
+        self.gets = 0
+        self.bytes_written = 0
+        original_set = backend.set
+        original_get = backend.get
+
+        def counting_set(key, value, **kwargs):
+            self.sets += 1
+            self.bytes_written += len(value)
+            return original_set(key, value, **kwargs)
+
+        def counting_get(key):
+            self.gets += 1
+            return original_get(key)
+
+        backend.set = counting_set
+        backend.get = counting_get
+
+class TaskShim:
+    """Cukup untuk ProgressReporter: update_state menulis langsung ke backend"""
+
+    def __init__(self, backend, task_id: str):
+        self.backend = backend
+        self.task_id = task_id
+
+    def update_state(self, state, meta):
+        self.backend.store_result(self.task_id, meta, state)
+
+def make_backend(serializer: str, redis_url: str):
+    from celery import Celery
+
+    app = Celery("bench_result_backend", broker="memory://", backend=redis_url or "redis://localhost:6379/0")
+    app.conf.update(result_serializer=serializer, result_accept_content=["json", "msgpack"])
+    backend = app.backend
+    if not redis_url:
+        import fakeredis
+        backend.client = fakeredis.FakeRedis()
+    return backend
+
+def legacy_protocol(backend, task_id: str, scrape_seconds: float):
+    """Urutan tulis sebelum protokol ringkas (lima update_state + nilai return)"""
+    result = {
+        "record_id": str(uuid.uuid4()),
+        "no_porsi": SCRAPED_DATA["no_porsi"],
+        "filename": FILENAME,
+        "screenshot_url": f"http://localhost:8000/files/{FILENAME}",
+        "scraped_data": SCRAPED_DATA,
+        "attempts_used": 2,
+    }
+    for status, progress in (
+        ("Starting scraping process...", 0),
+        ("Setting up browser...", 20),
+        ("Scraping data...", 40),
+        ("Saving results...", 80),
+    ):
+        backend.store_result(task_id, {"status": status, "progress": progress}, "PROGRESS")
+    backend.store_result(task_id, {"status": "Scraping completed successfully", "progress": 100, "result": result}, "SUCCESS")
+    backend.store_result(task_id, dict(result, status="SUCCESS"), "SUCCESS")
+
+def compact_protocol(backend, task_id: str, scrape_seconds: float):
+    """Urutan tulis scrape_kemenag saat ini dengan jam simulasi"""
+    from app.progress import ProgressReporter, result_summary
+
+    now = [0.0]
+    progress = ProgressReporter(TaskShim(backend, task_id), clock=lambda: now[0])
+    progress.update("Starting scraping process...", 0)
+    now[0] += 0.05  # update_record_started
+    progress.update("Setting up browser...", 20)
+    now[0] += 0.01
+    progress.update("Scraping data...", 40)
+    now[0] += scrape_seconds
+    progress.update("Saving results...", 80)
+    backend.store_result(task_id, result_summary(str(uuid.uuid4()), SCRAPED_DATA["no_porsi"], 2, FILENAME), "SUCCESS")
+
+PROTOCOLS = {
+    "legacy": legacy_protocol,
+    "compact": compact_protocol,
+}
+
+def measure(protocol: str, serializer: str, tasks: int, scrape_seconds: float, redis_url: str) -> Dict:
+    backend = make_backend(serializer, redis_url)
+    counter = CountingBackend(backend)
+    resident = 0
+    for _ in range(tasks):
+        task_id = str(uuid.uuid4())
+        PROTOCOLS[protocol](backend, task_id, scrape_seconds)
+        # Yang tersisa di Redis selama result_expires: nilai terakhir untuk key task
+        resident += len(backend.client.get(backend.get_key_for_task(task_id)) or b"")
+        backend.forget(task_id)
+    return {
+        "protocol": protocol,
+        "serializer": serializer,
+        "writes_per_task": round(counter.sets / tasks, 2),
+        "reads_per_task": round(counter.gets / tasks, 2),
+        "bytes_written_per_task": round(counter.bytes_written / tasks, 1),
+        "resident_bytes_per_task": round(resident / tasks, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Byte dan operasi Redis per task di result backend")
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--scrape-seconds", type=float, default=12.0, help="Durasi simulasi tahap scraping")
+    parser.add_argument("--serializers", type=lambda v: v.split(","), default=["json", "msgpack"])
+    parser.add_argument("--redis", default="", help="URL Redis sungguhan (default fakeredis)")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", help="File JSON run sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    runs: List[Dict] = []
+    for protocol in PROTOCOLS:
+        for serializer in args.serializers:
+            runs.append(measure(protocol, serializer, args.tasks, args.scrape_seconds, args.redis))
+
+    baseline = next(run for run in runs if run["protocol"] == "legacy" and run["serializer"] == args.serializers[0])
+    for run in runs:
+        run["bytes_written_vs_legacy"] = round(run["bytes_written_per_task"] / baseline["bytes_written_per_task"], 3)
+
+    results = {"tasks": args.tasks, "scrape_seconds": args.scrape_seconds, "runs": runs}
+    results["by_key"] = {f"{run['protocol']}_{run['serializer']}": run for run in runs}
+    path = write_results("result_backend", results, args.output)
+    print(json.dumps(runs, indent=2))
+    print(f"Results written to {path}")
+
+    if args.compare:
+        keys = [f"by_key.{name}.{metric}" for name in results["by_key"] for metric in ("bytes_written_per_task", "writes_per_task")]
+        print(json.dumps({"compare": compare_results(results, args.compare, keys)}, indent=2))
+
+if __name__ == "__main__":
+    main()
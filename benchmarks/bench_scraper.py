@@ -0,0 +1,190 @@
+"""
+Benchmark end-to-end KemenagScraper / scrape_kemenag terhadap stand-in site lokal.
+
+    python -m benchmarks.bench_scraper --mode scraper --lookups 50 --concurrency 4
+    python -m benchmarks.bench_scraper --mode task --lookups 50 --compare benchmarks/results/prev.json
+    python -m benchmarks.bench_scraper --profile estimasi --compare benchmarks/results/scraper_full.json
+    python -m benchmarks.bench_scraper --standby 2 --concurrency 1 --arrival-interval 5
+
+--standby menjalankan StandbyPool (app.services.standby_pages) dengan N page yang
+disiapkan sebelum lookup pertama; --arrival-interval memberi jeda antar lookup
+seperti traffic interaktif sehingga page sempat disiapkan ulang.
+
+Mode task menjalankan scrape_kemenag secara eager (tanpa broker) sehingga butuh
+DATABASE_URL yang bisa ditulis, mis. sqlite:///bench.db.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+import argparse
+import json
+import os
+import threading
+import time
+
+from .common import compare_results, latency_summary, rss_snapshot, write_results
+from .fake_site import FakeKemenagSite, add_site_arguments, site_options
+
+def run_scraper_lookup(no_porsi: str, profile: str, standby_pool=None) -> Dict:
+    from app.profiles import resolve_profile
+    from app.services.selenium_scraper import KemenagScraper
+
+    scraper = KemenagScraper(standby_pool=standby_pool)
+    started = time.perf_counter()
+    success, filename, scraped_data, error_message, attempts_used = scraper.scrape(no_porsi, profile=resolve_profile(profile))
+    return {
+        "success": success,
+        "latency": time.perf_counter() - started,
+        "attempts": attempts_used,
+        "failure_class": scraper.last_failure_class,
+    }
+
+def run_task_lookup(no_porsi: str, profile: str, standby_pool=None) -> Dict:
+    from app.crud import create_scrape_record
+    from app.database import get_db_session
+    from app.tasks import scrape_kemenag
+    import uuid
+
+    task_id = str(uuid.uuid4())
+    db = get_db_session()
+    try:
+        create_scrape_record(db, task_id, no_porsi)
+    finally:
+        db.close()
+
+    started = time.perf_counter()
+    result = scrape_kemenag.apply(kwargs={"task_id": task_id, "no_porsi": no_porsi, "profile": profile}, task_id=task_id)
+    latency = time.perf_counter() - started
+    value = result.result if isinstance(result.result, dict) else {}
+    return {
+        "success": result.successful(),
+        "latency": latency,
+        "attempts": value.get("attempts_used", 0),
+        "failure_class": None if result.successful() else type(result.result).__name__,
+    }
+
+def sample_memory(samples: List[Dict], stop: threading.Event, interval: float):
+    while not stop.wait(interval):
+        snapshot = rss_snapshot()
+        snapshot["t"] = round(time.time(), 1)
+        samples.append(snapshot)
+
+def start_standby(pages: int, timeout: float):
+    """StandbyPool untuk run ini, ditunggu sampai semua page siap (atau timeout)"""
+    from app.services import standby_pages
+
+    pool = standby_pages.StandbyPool(pages)
+    pool.start()
+    # Mode task mengambil pool lewat get_standby_pool() seperti di worker
+    standby_pages._standby_pool = pool
+    deadline = time.monotonic() + timeout
+    while len(pool._ready) < pages and time.monotonic() < deadline:
+        time.sleep(0.2)
+    return pool
+
+def standby_counts() -> Dict[str, float]:
+    from app.metrics import STANDBY_PREPARES, STANDBY_TAKES
+
+    return {
+        f"{metric.name}.{sample.labels['result']}": sample.value
+        for counter in (STANDBY_TAKES, STANDBY_PREPARES)
+        for metric in counter.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_total")
+    }
+
+def run_benchmark(args: argparse.Namespace, search_url: str) -> Dict:
+    lookup = run_scraper_lookup if args.mode == "scraper" else run_task_lookup
+    no_porsi_list = [str(args.first_porsi + i) for i in range(args.lookups)]
+    standby_pool = start_standby(args.standby, args.standby_warmup) if args.standby else None
+
+    memory_samples: List[Dict] = []
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_memory, args=(memory_samples, stop, 1.0), daemon=True)
+    sampler.start()
+
+    outcomes = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = []
+        for no_porsi in no_porsi_list:
+            futures.append(executor.submit(lookup, no_porsi, args.profile, standby_pool))
+            if args.arrival_interval:
+                time.sleep(args.arrival_interval)
+        for future in as_completed(futures):
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append({"success": False, "latency": 0.0, "attempts": 0, "failure_class": type(e).__name__})
+    elapsed = time.perf_counter() - started
+    stop.set()
+    standby = None
+    if standby_pool is not None:
+        standby = standby_counts()
+        standby_pool.stop()
+
+    successes = [o for o in outcomes if o["success"]]
+    failures: Dict[str, int] = {}
+    for outcome in outcomes:
+        if not outcome["success"]:
+            key = outcome["failure_class"] or "unknown"
+            failures[key] = failures.get(key, 0) + 1
+
+    return {
+        "mode": args.mode,
+        "search_url": search_url,
+        "config": {key: value for key, value in vars(args).items() if key not in ("compare", "output")},
+        "lookups": len(outcomes),
+        "successes": len(successes),
+        "success_rate": round(len(successes) / len(outcomes), 4) if outcomes else 0.0,
+        "failures": failures,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_per_minute": round(len(successes) / elapsed * 60, 2) if elapsed else 0.0,
+        "latency": latency_summary([o["latency"] for o in successes]),
+        "attempts_per_success": round(sum(o["attempts"] for o in successes) / len(successes), 3) if successes else None,
+        "memory": {
+            "peak_rss_mb": max((s.get("rss_mb", 0) for s in memory_samples), default=0),
+            "peak_children_rss_mb": max((s.get("children_rss_mb", 0) for s in memory_samples), default=0),
+            "final": rss_snapshot(),
+        },
+        "standby": standby,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper terhadap stand-in Kemenag lokal")
+    parser.add_argument("--mode", choices=["scraper", "task"], default="scraper")
+    parser.add_argument("--lookups", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--first-porsi", type=int, default=1000000001)
+    parser.add_argument("--profile", default="full", help="Preset scrape profile (lihat app.profiles)")
+    parser.add_argument("--standby", type=int, default=0, help="Jumlah standby page (0 = tanpa standby pool)")
+    parser.add_argument("--standby-warmup", type=float, default=60.0, help="Batas tunggu page siap sebelum lookup pertama")
+    parser.add_argument("--arrival-interval", type=float, default=0.0, help="Jeda detik antar lookup yang dikirim")
+    parser.add_argument("--output", help="Path file JSON hasil (default benchmarks/results/)")
+    parser.add_argument("--compare", help="File JSON run sebelumnya untuk dibandingkan")
+    add_site_arguments(parser)
+    args = parser.parse_args()
+
+    site = FakeKemenagSite(**site_options(args)).start()
+    # Harus di-set sebelum app.config di-import
+    os.environ["KEMENAG_SEARCH_URL"] = site.search_url
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    try:
+        results = run_benchmark(args, site.search_url)
+        results["site_counters"] = dict(site.state.counters)
+    finally:
+        site.stop()
+
+    path = write_results(f"scraper_{args.mode}", results, args.output)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {path}")
+
+    if args.compare:
+        deltas = compare_results(results, args.compare, [
+            "throughput_per_minute", "latency.p50_ms", "latency.p95_ms", "latency.p99_ms",
+            "attempts_per_success", "memory.peak_children_rss_mb",
+        ])
+        print(json.dumps({"compare": deltas}, indent=2))
+
+if __name__ == "__main__":
+    main()
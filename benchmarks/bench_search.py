@@ -0,0 +1,233 @@
+"""
+Benchmark pencarian nama (/search) di porsi_latest dengan jutaan baris.
+
+    python -m benchmarks.bench_search --rows 3000000 --queries 300
+    python -m benchmarks.bench_search --skip-seed --max-p95-ms 100 --compare benchmarks/results/prev.json
+    python -m benchmarks.bench_search --cleanup
+
+Memakai DATABASE_URL dari settings. Di PostgreSQL baris sintetis (no_porsi berawalan
+BENCH) dibuat dengan generate_series, lalu index trigram dibuat lewat app.schema;
+dialect lain di-seed dari Python dan hanya cocok untuk jumlah baris kecil.
+Query berupa potongan nama dan nama salah ketik, dengan dan tanpa filter wilayah,
+diukur lewat crud.search_porsi (query yang sama dengan endpoint).
+"""
+from typing import Dict, List, Tuple
+import argparse
+import json
+import random
+import sys
+import time
+
+from .common import compare_results, latency_summary, write_results
+
+FIRST_NAMES = [
+    "SITI", "MUHAMMAD", "AHMAD", "NUR", "ABDUL", "DEWI", "SRI", "AGUS", "BUDI", "RINA",
+    "HASAN", "FATIMAH", "AMINAH", "YUSUF", "IBRAHIM", "KHADIJAH", "ZAINAB", "RAHMAT", "SUPARMAN", "WAHYU",
+    "ENDANG", "SUGENG", "ASEP", "UJANG", "NENG", "DADANG", "KOMARUDIN", "MAEMUNAH", "SAMSUDIN", "ROHMAH",
+]
+MIDDLE_NAMES = [
+    "AMINAH", "RAHMAWATI", "HIDAYAT", "SETIAWAN", "KURNIASIH", "PRATAMA", "SAPUTRA", "HANDAYANI", "SULISTYO", "MAULANA",
+    "NURHAYATI", "FIRDAUS", "HAMZAH", "SOLEHAH", "ZULKIFLI", "MARYAM", "ISMAIL", "SUTRISNO", "WULANDARI", "RIYADI",
+]
+FATHER_NAMES = [
+    "ABDULLAH", "SUDIRMAN", "KARTA", "MUCHTAR", "SALIM", "HARUN", "JAMALUDIN", "SUHADI", "MANSUR", "TAUFIK",
+    "SUPRIADI", "ROSYID", "BAKRI", "NAWAWI", "SYAFEI", "DARMAWAN", "SUMARNO", "HUSEIN", "MAKMUR", "SANUSI",
+]
+REGIONS = {
+    "JAWA BARAT": ["KAB. BANDUNG", "KAB. GARUT", "KOTA BEKASI", "KAB. BOGOR", "KAB. CIREBON"],
+    "JAWA TENGAH": ["KAB. DEMAK", "KOTA SEMARANG", "KAB. KUDUS", "KAB. BREBES", "KAB. PATI"],
+    "JAWA TIMUR": ["KOTA MALANG", "KAB. JEMBER", "KOTA SURABAYA", "KAB. SIDOARJO", "KAB. LAMONGAN"],
+    "BANTEN": ["KAB. SERANG", "KOTA TANGERANG", "KAB. LEBAK", "KAB. PANDEGLANG", "KOTA CILEGON"],
+    "SUMATERA UTARA": ["KOTA MEDAN", "KAB. DELI SERDANG", "KAB. LANGKAT", "KAB. ASAHAN", "KAB. KARO"],
+    "SULAWESI SELATAN": ["KOTA MAKASSAR", "KAB. GOWA", "KAB. BONE", "KAB. MAROS", "KAB. PINRANG"],
+}
+PAYMENT_STATUSES = ["lunas", "lunas_tunda", "belum_lunas", "batal"]
+ROW_PREFIX = "BENCH"
+
+def random_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(MIDDLE_NAMES)} BIN {rng.choice(FATHER_NAMES)}"
+
+def misspell(word: str, rng: random.Random) -> str:
+    """Satu kesalahan ketik: tukar, hapus atau ganti satu huruf"""
+    if len(word) < 4:
+        return word
+    index = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(("swap", "drop", "replace"))
+    if kind == "swap":
+        return word[:index] + word[index + 1] + word[index] + word[index + 2:]
+    if kind == "drop":
+        return word[:index] + word[index + 1:]
+    return word[:index] + rng.choice("AIUEO") + word[index + 1:]
+
+def make_queries(count: int, seed: int) -> List[Dict]:
+    """Campuran potongan nama, nama salah ketik, dan filter wilayah"""
+    rng = random.Random(seed)
+    queries = []
+    for index in range(count):
+        words = random_name(rng).split()
+        kind = ("partial", "misspelled", "partial_region", "misspelled_region")[index % 4]
+        if kind.startswith("partial"):
+            q = " ".join(words[:2])
+        else:
+            q = " ".join(misspell(word, rng) for word in words[:2])
+        query = {"kind": kind, "q": q, "provinsi": None, "kabupaten": None}
+        if kind.endswith("region"):
+            query["provinsi"] = rng.choice(list(REGIONS))
+            query["kabupaten"] = rng.choice(REGIONS[query["provinsi"]])
+        queries.append(query)
+    return queries
+
+def seed_postgres(db, rows: int, chunk_size: int):
+    """INSERT ... SELECT generate_series, nama dan wilayah dipilih acak dari daftar di atas"""
+    from sqlalchemy import text
+
+    provinces = list(REGIONS)
+    kabupaten = [kab for province in provinces for kab in REGIONS[province]]
+    statement = text("""
+        INSERT INTO porsi_latest (id, no_porsi, nama, provinsi, kabupaten, departure_year, payment_status, scraped_at, created_at, updated_at)
+        SELECT
+            gen_random_uuid(),
+            :prefix || lpad(g::text, 10, '0'),
+            (CAST(:first AS text[]))[1 + floor(random() * cardinality(CAST(:first AS text[])))::int] || ' ' ||
+            (CAST(:middle AS text[]))[1 + floor(random() * cardinality(CAST(:middle AS text[])))::int] || ' BIN ' ||
+            (CAST(:father AS text[]))[1 + floor(random() * cardinality(CAST(:father AS text[])))::int],
+            (CAST(:provinces AS text[]))[1 + region / :kab_per_province],
+            (CAST(:kabupaten AS text[]))[1 + region],
+            2026 + floor(random() * 40)::int,
+            (CAST(:payments AS text[]))[1 + floor(random() * cardinality(CAST(:payments AS text[])))::int],
+            now(), now(), now()
+        FROM (
+            SELECT g, floor(random() * :regions)::int AS region FROM generate_series(:start, :stop) AS g
+        ) AS series
+        ON CONFLICT (no_porsi) DO NOTHING
+    """)
+    for start in range(1, rows + 1, chunk_size):
+        stop = min(rows, start + chunk_size - 1)
+        db.execute(statement, {
+            "prefix": ROW_PREFIX, "first": FIRST_NAMES, "middle": MIDDLE_NAMES, "father": FATHER_NAMES,
+            "provinces": provinces, "kabupaten": kabupaten, "kab_per_province": len(REGIONS[provinces[0]]),
+            "regions": len(kabupaten), "payments": PAYMENT_STATUSES, "start": start, "stop": stop,
+        })
+        db.commit()
+        print(f"Seeded {stop}/{rows} rows", file=sys.stderr)
+    db.execute(text("ANALYZE porsi_latest"))
+    db.commit()
+
+def seed_python(db, rows: int, chunk_size: int, seed: int):
+    from app.models import PorsiLatest
+
+    rng = random.Random(seed)
+    for start in range(0, rows, chunk_size):
+        mappings = []
+        for index in range(start, min(rows, start + chunk_size)):
+            provinsi = rng.choice(list(REGIONS))
+            mappings.append({
+                "no_porsi": f"{ROW_PREFIX}{index:010d}",
+                "nama": random_name(rng),
+                "provinsi": provinsi,
+                "kabupaten": rng.choice(REGIONS[provinsi]),
+                "departure_year": rng.randrange(2026, 2066),
+                "payment_status": rng.choice(PAYMENT_STATUSES),
+            })
+        db.bulk_insert_mappings(PorsiLatest, mappings)
+        db.commit()
+
+def uses_trigram_index(db, q: str, threshold: float) -> bool:
+    """EXPLAIN query pencarian dan cek bahwa planner memakai index GIN trigram"""
+    from sqlalchemy import text
+
+    db.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"), {"threshold": str(threshold)})
+    plan = "\n".join(row[0] for row in db.execute(text("EXPLAIN SELECT no_porsi FROM porsi_latest WHERE nama %> :q"), {"q": q}))
+    db.rollback()
+    return "ix_porsi_latest_nama_trgm" in plan
+
+def run_queries(db, queries: List[Dict], page_size: int, threshold: float) -> Tuple[Dict, Dict]:
+    from app.crud import search_porsi
+
+    by_kind: Dict[str, List[float]] = {}
+    hits: Dict[str, int] = {}
+    for query in queries:
+        started = time.perf_counter()
+        results, _ = search_porsi(
+            db, query["q"], provinsi=query["provinsi"], kabupaten=query["kabupaten"],
+            limit=page_size, similarity_threshold=threshold
+        )
+        by_kind.setdefault(query["kind"], []).append(time.perf_counter() - started)
+        hits[query["kind"]] = hits.get(query["kind"], 0) + (1 if results else 0)
+        db.rollback()
+    latencies = {kind: latency_summary(samples) for kind, samples in by_kind.items()}
+    latencies["all"] = latency_summary([sample for samples in by_kind.values() for sample in samples])
+    return latencies, {kind: round(count / len(by_kind[kind]), 3) for kind, count in hits.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pencarian nama di porsi_latest")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threshold", type=float, help="Default settings.search_similarity_threshold")
+    parser.add_argument("--skip-seed", action="store_true", help="Pakai baris BENCH yang sudah ada")
+    parser.add_argument("--cleanup", action="store_true", help="Hapus baris BENCH lalu keluar")
+    parser.add_argument("--max-p95-ms", type=float, default=100.0, help="Gate p95 semua query")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", help="File JSON run sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    from app.config import settings
+    from app.database import get_db_session
+    from app.models import PorsiLatest
+    from app.schema import create_schema
+
+    threshold = settings.search_similarity_threshold if args.threshold is None else args.threshold
+    db = get_db_session()
+    try:
+        if args.cleanup:
+            deleted = db.query(PorsiLatest).filter(PorsiLatest.no_porsi.like(f"{ROW_PREFIX}%")).delete(synchronize_session=False)
+            db.commit()
+            print(f"Deleted {deleted} benchmark rows")
+            return
+
+        create_schema()
+        dialect = db.get_bind().dialect.name
+        if not args.skip_seed:
+            started = time.perf_counter()
+            if dialect == "postgresql":
+                seed_postgres(db, args.rows, args.chunk_size)
+            else:
+                seed_python(db, args.rows, min(args.chunk_size, 10_000), args.seed)
+            print(f"Seeding took {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        rows = db.query(PorsiLatest).filter(PorsiLatest.no_porsi.like(f"{ROW_PREFIX}%")).count()
+        queries = make_queries(args.queries, args.seed)
+        # Satu putaran pemanasan agar cache buffer tidak menentukan p95
+        run_queries(db, queries[:10], args.page_size, threshold)
+        latencies, hit_rate = run_queries(db, queries, args.page_size, threshold)
+        results = {
+            "dialect": dialect,
+            "rows": rows,
+            "queries": args.queries,
+            "page_size": args.page_size,
+            "threshold": threshold,
+            "trigram_index_used": uses_trigram_index(db, queries[0]["q"], threshold) if dialect == "postgresql" else False,
+            "latency": latencies,
+            "hit_rate": hit_rate,
+        }
+    finally:
+        db.close()
+
+    path = write_results("search", results, args.output)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {path}")
+
+    if args.compare:
+        keys = [f"latency.{kind}.{metric}" for kind in latencies for metric in ("p50_ms", "p95_ms")]
+        print(json.dumps({"compare": compare_results(results, args.compare, keys)}, indent=2))
+
+    p95 = latencies["all"]["p95_ms"]
+    if p95 > args.max_p95_ms:
+        print(f"Search gate failed: p95 {p95}ms > {args.max_p95_ms:.0f}ms over {rows} rows", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
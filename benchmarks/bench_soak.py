@@ -0,0 +1,348 @@
+"""
+Soak test scrape_kemenag: puluhan ribu lookup terhadap stand-in site lokal dengan
+kegagalan yang disuntikkan, untuk menemukan kebocoran Chrome/chromedriver, file
+descriptor, memori dan koneksi database.
+
+    DATABASE_URL=sqlite:///soak.db python -m benchmarks.bench_soak --lookups 20000 --concurrency 4
+    python -m benchmarks.bench_soak --lookups 2000 --driver-crash-rate 0.05 --hang-rate 0.02 --db-error-rate 0.02
+    python -m benchmarks.bench_soak --lookups 20000 --standby 2 --limit rss_mb=128 --compare benchmarks/results/soak_prev.json
+
+Kegagalan yang disuntikkan:
+- --driver-crash-rate: chromedriver di-SIGKILL di tengah scrape (Chrome-nya tertinggal),
+- --hang-rate / --hang-ms: page load menggantung melewati page load timeout Selenium,
+- --error-rate: page load mengembalikan 503,
+- --db-error-rate: query database di dalam task gagal dengan OperationalError.
+
+Lookup dijalankan per batch (--sample-every). Setelah setiap batch tidak ada task yang
+berjalan, jadi sampel diambil di titik diam: RSS, FD terbuka, thread, child process,
+proses Chrome/chromedriver milik user ini (termasuk yatim yang sudah di-reparent),
+koneksi pool database yang checked-out dan objek Session/WebDriver yang masih hidup.
+Pertumbuhan dihitung dari median jendela awal (setelah --warmup lookup) ke median
+jendela akhir; exit code 1 jika ada metrik yang melewati batasnya.
+
+Seperti mode task di bench_scraper, butuh Chrome, DATABASE_URL yang bisa ditulis dan
+Redis (result backend dan circuit breaker). Butuh psutil.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from .common import compare_results, latency_summary, write_results
+from .fake_site import FakeKemenagSite, add_site_arguments, site_options
+
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "chromedriver", "headless_shell")
+
+# Batas pertumbuhan (akhir - awal) per metrik; diubah lewat --limit metrik=nilai
+DEFAULT_LIMITS = {
+    "rss_mb": 64.0,
+    "open_fds": 16,
+    "threads": 8,
+    "children": 2,
+    "browser_processes": 2,
+    "db_checked_out": 0,
+    "live_sessions": 2,
+    "live_drivers": 2,
+}
+
+class FaultInjector:
+    """Crash chromedriver dan error database secara acak selama soak"""
+
+    def __init__(self, driver_crash_rate: float, crash_after_seconds: float, db_error_rate: float, seed: Optional[int] = None):
+        self.driver_crash_rate = driver_crash_rate
+        self.crash_after_seconds = crash_after_seconds
+        self.db_error_rate = db_error_rate
+        self.rng = random.Random(seed)
+        self.counts = {"driver_crash": 0, "db_error": 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def install(self, engine):
+        from sqlalchemy import event
+        from app.services.selenium_scraper import KemenagScraper
+
+        original = KemenagScraper.setup_chrome_driver
+        injector = self
+
+        def setup_chrome_driver(scraper):
+            driver = original(scraper)
+            if injector.rng.random() < injector.driver_crash_rate:
+                timer = threading.Timer(injector.rng.uniform(0, injector.crash_after_seconds), injector.crash_driver, args=(driver,))
+                timer.daemon = True
+                timer.start()
+            return driver
+
+        KemenagScraper.setup_chrome_driver = setup_chrome_driver
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+
+    def crash_driver(self, driver):
+        """SIGKILL chromedriver saja, seperti crash/OOM kill: Chrome-nya tidak ikut ditutup"""
+        process = getattr(getattr(driver, "service", None), "process", None)
+        if process is not None and process.poll() is None:
+            process.kill()
+            self.count("driver_crash")
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        from sqlalchemy.exc import OperationalError
+
+        # Hanya query dari dalam task; setup record oleh benchmark tidak diganggu
+        if getattr(self._local, "active", False) and self.rng.random() < self.db_error_rate:
+            self.count("db_error")
+            raise OperationalError(statement, parameters, Exception("connection reset (injected by bench_soak)"))
+
+    def activate(self, active: bool):
+        self._local.active = active
+
+def run_lookup(no_porsi: str, profile: str, injector: FaultInjector) -> Dict:
+    from app.crud import create_scrape_record
+    from app.database import get_db_session
+    from app.tasks import scrape_kemenag
+
+    task_id = str(uuid.uuid4())
+    db = get_db_session()
+    try:
+        create_scrape_record(db, task_id, no_porsi)
+    finally:
+        db.close()
+
+    started = time.perf_counter()
+    injector.activate(True)
+    try:
+        # Eager: retry dalam attempt budget dijalankan langsung di thread ini
+        result = scrape_kemenag.apply(kwargs={"task_id": task_id, "no_porsi": no_porsi, "profile": profile}, task_id=task_id)
+    finally:
+        injector.activate(False)
+    return {
+        "success": result.successful(),
+        "latency": time.perf_counter() - started,
+        "failure_class": None if result.successful() else type(result.result).__name__,
+    }
+
+def browser_processes(uid: int) -> int:
+    """Proses Chrome/chromedriver milik user ini, termasuk yatim yang bukan child proses ini"""
+    import psutil
+
+    count = 0
+    for process in psutil.process_iter(["name", "uids"]):
+        try:
+            name = (process.info["name"] or "").lower()
+            uids = process.info["uids"]
+        except psutil.Error:
+            continue
+        if uids is not None and uids.real == uid and any(marker in name for marker in BROWSER_PROCESS_NAMES):
+            count += 1
+    return count
+
+def live_objects() -> Dict[str, int]:
+    from selenium.webdriver.remote.webdriver import WebDriver
+    from sqlalchemy.orm import Session
+
+    sessions = drivers = 0
+    for obj in gc.get_objects():
+        if isinstance(obj, Session):
+            sessions += 1
+        elif isinstance(obj, WebDriver):
+            drivers += 1
+    return {"live_sessions": sessions, "live_drivers": drivers}
+
+def sample_resources(lookups_done: int, started: float, engine) -> Dict:
+    import psutil
+
+    # Siklus referensi yang belum dikoleksi tidak dihitung sebagai kebocoran
+    gc.collect()
+    process = psutil.Process()
+    children = process.children(recursive=True)
+    pool = engine.pool
+    sample = {
+        "lookups": lookups_done,
+        "t": round(time.perf_counter() - started, 1),
+        "rss_mb": round(process.memory_info().rss / 1024 / 1024, 1),
+        "open_fds": process.num_fds(),
+        "threads": process.num_threads(),
+        "children": len(children),
+        "zombies": sum(1 for child in children if _status(child) == psutil.STATUS_ZOMBIE),
+        "browser_processes": browser_processes(os.getuid()),
+        "db_checked_out": pool.checkedout() if hasattr(pool, "checkedout") else 0,
+        "db_pooled": pool.checkedin() if hasattr(pool, "checkedin") else 0,
+    }
+    sample.update(live_objects())
+    return sample
+
+def _status(process) -> Optional[str]:
+    import psutil
+
+    try:
+        return process.status()
+    except psutil.Error:
+        return None
+
+def growth(samples: List[Dict], key: str, warmup: int, limit: float) -> Dict:
+    """Median jendela awal vs akhir (seperempat sampel setelah warmup) dan slope per 1000 lookup"""
+    points = [(s["lookups"], s[key]) for s in samples if s["lookups"] >= warmup]
+    if len(points) < 4:
+        return {"status": "insufficient_samples", "samples": len(points), "limit": limit}
+    window = max(1, len(points) // 4)
+    start = statistics.median(value for _, value in points[:window])
+    end = statistics.median(value for _, value in points[-window:])
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / spread if spread else 0.0
+    return {
+        "start": start,
+        "end": end,
+        "growth": round(end - start, 2),
+        "slope_per_1k": round(slope * 1000, 3),
+        "limit": limit,
+        "status": "ok" if end - start <= limit else "leak",
+    }
+
+def parse_limits(values: List[str]) -> Dict[str, float]:
+    limits = dict(DEFAULT_LIMITS)
+    for value in values:
+        key, _, number = value.partition("=")
+        if key not in DEFAULT_LIMITS or not number:
+            raise SystemExit(f"--limit harus metrik=nilai dengan metrik salah satu dari: {', '.join(DEFAULT_LIMITS)}")
+        limits[key] = float(number)
+    return limits
+
+def run_soak(args: argparse.Namespace, limits: Dict[str, float]) -> Dict:
+    from app.database import engine
+    from .bench_scraper import standby_counts, start_standby
+
+    injector = FaultInjector(args.driver_crash_rate, args.crash_after_seconds, args.db_error_rate, args.seed)
+    injector.install(engine)
+    standby_pool = start_standby(args.standby, args.standby_warmup) if args.standby else None
+
+    started = time.perf_counter()
+    samples = [sample_resources(0, started, engine)]
+    outcomes: List[Dict] = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        while done < args.lookups:
+            batch = range(done, min(done + args.sample_every, args.lookups))
+            for future in [executor.submit(run_lookup, str(args.first_porsi + i % args.porsi_pool), args.profile, injector) for i in batch]:
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    outcomes.append({"success": False, "latency": 0.0, "failure_class": type(e).__name__})
+            done += len(batch)
+            sample = sample_resources(done, started, engine)
+            samples.append(sample)
+            print(json.dumps(sample), file=sys.stderr)
+    elapsed = time.perf_counter() - started
+
+    standby = None
+    if standby_pool is not None:
+        standby = standby_counts()
+        standby_pool.stop()
+    final = sample_resources(done, started, engine)
+
+    failures: Dict[str, int] = {}
+    for outcome in outcomes:
+        if not outcome["success"]:
+            key = outcome["failure_class"] or "unknown"
+            failures[key] = failures.get(key, 0) + 1
+    successes = [o for o in outcomes if o["success"]]
+    leaks = {key: growth(samples, key, args.warmup, limit) for key, limit in limits.items()}
+
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("compare", "output", "limit")},
+        "limits": limits,
+        "lookups": len(outcomes),
+        "successes": len(successes),
+        "success_rate": round(len(successes) / len(outcomes), 4) if outcomes else 0.0,
+        "failures": failures,
+        "injected": dict(injector.counts),
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_per_minute": round(len(outcomes) / elapsed * 60, 2) if elapsed else 0.0,
+        "latency": latency_summary([o["latency"] for o in successes]),
+        "growth": leaks,
+        "passed": all(result["status"] != "leak" for result in leaks.values()),
+        "final": final,
+        "standby": standby,
+        "samples": samples,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test scrape_kemenag untuk kebocoran browser, FD, memori dan koneksi database")
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sample-every", type=int, default=500, help="Lookup per batch; sampel diambil setelah setiap batch")
+    parser.add_argument("--warmup", type=int, default=1000, help="Lookup awal yang tidak dihitung (cache, pool, import)")
+    parser.add_argument("--first-porsi", type=int, default=1000000001)
+    parser.add_argument("--porsi-pool", type=int, default=5000, help="Jumlah no_porsi berbeda yang dipakai bergiliran")
+    parser.add_argument("--profile", default="full", help="Preset scrape profile (lihat app.profiles)")
+    parser.add_argument("--standby", type=int, default=0, help="Jumlah standby page (0 = tanpa standby pool)")
+    parser.add_argument("--standby-warmup", type=float, default=60.0)
+    parser.add_argument("--driver-crash-rate", type=float, default=0.02, help="Peluang chromedriver di-kill di tengah scrape")
+    parser.add_argument("--crash-after-seconds", type=float, default=3.0, help="Kill terjadi acak dalam rentang ini setelah driver dibuat")
+    parser.add_argument("--db-error-rate", type=float, default=0.005, help="Peluang satu query di dalam task gagal")
+    parser.add_argument("--selenium-timeout", type=int, default=10, help="Page load timeout selama soak (lebih pendek dari --hang-ms)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--limit", action="append", default=[], metavar="METRIK=NILAI",
+                        help=f"Batas pertumbuhan, mis. rss_mb=128 (metrik: {', '.join(DEFAULT_LIMITS)})")
+    parser.add_argument("--output", help="Path file JSON hasil (default benchmarks/results/)")
+    parser.add_argument("--compare", help="File JSON run sebelumnya untuk dibandingkan")
+    add_site_arguments(parser)
+    parser.set_defaults(error_rate=0.01, hang_rate=0.005, hang_ms=30000)
+    args = parser.parse_args()
+    limits = parse_limits(args.limit)
+
+    try:
+        import psutil  # noqa: F401
+    except ImportError:
+        raise SystemExit("bench_soak butuh psutil (pip install psutil)")
+
+    site = FakeKemenagSite(**site_options(args)).start()
+    # Harus di-set sebelum app.config di-import
+    os.environ["KEMENAG_SEARCH_URL"] = site.search_url
+    os.environ["SELENIUM_TIMEOUT"] = str(args.selenium_timeout)
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    # Kegagalan yang disuntikkan tidak boleh membuka breaker (pause consumer lewat broker)
+    os.environ.setdefault("BREAKER_FAILURE_THRESHOLD", str(args.lookups * 10))
+    screenshot_folder = None
+    if "SCREENSHOT_FOLDER" not in os.environ:
+        screenshot_folder = tempfile.mkdtemp(prefix="bench_soak_")
+        os.environ["SCREENSHOT_FOLDER"] = screenshot_folder
+
+    try:
+        results = run_soak(args, limits)
+        results["site_counters"] = dict(site.state.counters)
+    finally:
+        site.stop()
+        if screenshot_folder:
+            shutil.rmtree(screenshot_folder, ignore_errors=True)
+
+    if args.compare:
+        results["comparison"] = compare_results(
+            results, args.compare,
+            ["throughput_per_minute", "latency.p50_ms", "latency.p95_ms"]
+            + [f"growth.{key}.growth" for key in limits]
+        )
+    path = write_results("soak", results, args.output)
+    print(json.dumps({key: value for key, value in results.items() if key != "samples"}, indent=2))
+    print(f"Results written to {path}")
+    if not results["passed"]:
+        leaking = [key for key, result in results["growth"].items() if result["status"] == "leak"]
+        print(f"FAILED: unbounded growth in {', '.join(leaking)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
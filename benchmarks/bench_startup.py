@@ -0,0 +1,173 @@
+"""
+Benchmark import time dan cold start untuk entry point API dan worker.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --max-ready-seconds 1.0 --compare benchmarks/results/prev.json
+
+Setiap run memakai proses Python baru (cache import kosong di level interpreter):
+- import: waktu `import app.main` / `import app.worker`, modul termahal dari
+  `-X importtime`, dan modul berat yang tidak seharusnya ikut termuat di API
+- cold start: waktu dari spawn uvicorn sampai GET /ready mengembalikan 200
+
+Cold start API tidak butuh database/Redis yang hidup: cek dependency berjalan
+di background setelah server siap.
+"""
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from .common import compare_results, latency_summary, write_results
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = {
+    "api": "app.main",
+    "worker": "app.worker",
+}
+
+# Dependency scraper yang tidak boleh dimuat oleh proses API
+HEAVY_MODULES = ("selenium", "webdriver_manager", "pytesseract", "PIL", "lxml", "boto3")
+
+PROBE_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy, "modules": len(sys.modules)}}))
+"""
+
+def child_env(extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("AUTO_CREATE_SCHEMA", "false")
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    if extra:
+        env.update(extra)
+    return env
+
+def measure_import(module: str) -> Dict:
+    """Import satu entry point di interpreter baru"""
+    script = PROBE_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=PROJECT_ROOT, env=child_env(), capture_output=True, text=True, timeout=120
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def top_imports(module: str, limit: int) -> List[Tuple[str, float]]:
+    """Modul dengan waktu import kumulatif terbesar dari `python -X importtime`"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=child_env(), capture_output=True, text=True, timeout=120
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        # Format: "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        entries.append((parts[2].strip(), int(parts[1].strip()) / 1_000_000))
+    entries.sort(key=lambda entry: entry[1], reverse=True)
+    return [(name, round(seconds, 4)) for name, seconds in entries[:limit]]
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_cold_start(timeout: float) -> float:
+    """Detik dari spawn uvicorn sampai /ready merespon 200"""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=child_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited early:\n{process.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=0.5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"/ready not reachable within {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def run_benchmark(args: argparse.Namespace) -> Dict:
+    results = {"runs": args.runs, "imports": {}}
+    for name in args.entry_points:
+        module = ENTRY_POINTS[name]
+        samples = [measure_import(module) for _ in range(args.runs)]
+        results["imports"][name] = {
+            "module": module,
+            "latency": latency_summary([sample["seconds"] for sample in samples]),
+            "modules_loaded": samples[-1]["modules"],
+            "heavy_modules": samples[-1]["heavy_modules"],
+            "top_imports": top_imports(module, args.top),
+        }
+
+    if "api" in args.entry_points and not args.skip_cold_start:
+        results["cold_start"] = latency_summary([measure_cold_start(args.timeout) for _ in range(args.runs)])
+    return results
+
+def check_gates(results: Dict, max_ready_seconds: float) -> List[str]:
+    problems = []
+    api = results["imports"].get("api")
+    if api and api["heavy_modules"]:
+        problems.append(f"API imports scraper dependencies: {', '.join(api['heavy_modules'])}")
+    cold_start = results.get("cold_start")
+    if cold_start and cold_start["p95_ms"] > max_ready_seconds * 1000:
+        problems.append(f"API cold start p95 {cold_start['p95_ms']}ms > {max_ready_seconds * 1000:.0f}ms")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time dan cold start API/worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--entry-points", type=lambda v: v.split(","), default=list(ENTRY_POINTS))
+    parser.add_argument("--top", type=int, default=15, help="Jumlah modul termahal yang dilaporkan")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Batas waktu menunggu /ready per run")
+    parser.add_argument("--skip-cold-start", action="store_true")
+    parser.add_argument("--max-ready-seconds", type=float, default=1.0, help="Gate p95 cold start API")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", help="File JSON run sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    path = write_results("startup", results, args.output)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {path}")
+
+    if args.compare:
+        deltas = compare_results(results, args.compare, [
+            "imports.api.latency.p50_ms", "imports.worker.latency.p50_ms",
+            "cold_start.p50_ms", "cold_start.p95_ms",
+        ])
+        print(json.dumps({"compare": deltas}, indent=2))
+
+    problems = check_gates(results, args.max_ready_seconds)
+    if problems:
+        print("Startup gate failed:\n  " + "\n  ".join(problems), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+import math
+import os
+import resource
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile nearest-rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(len(ordered), max(1, rank)) - 1]
+
+def latency_summary(latencies: List[float]) -> Dict:
+    """Ringkasan distribusi latency dalam milidetik"""
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+def rss_snapshot() -> Dict:
+    """RSS proses ini dan child process (Chrome/chromedriver) dalam MB"""
+    try:
+        import psutil
+        process = psutil.Process()
+        children = process.children(recursive=True)
+        children_rss = 0
+        for child in children:
+            try:
+                children_rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return {
+            "rss_mb": round(process.memory_info().rss / 1024 / 1024, 1),
+            "children_rss_mb": round(children_rss / 1024 / 1024, 1),
+            "children": len(children),
+        }
+    except ImportError:
+        # ru_maxrss dalam KB di Linux
+        return {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+def write_results(name: str, results: Dict, output: Optional[str] = None) -> str:
+    """Simpan hasil benchmark sebagai JSON untuk dibandingkan antar run"""
+    results = dict(results)
+    results.setdefault("benchmark", name)
+    results.setdefault("timestamp", datetime.now().isoformat())
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    return output
+
+def compare_results(current: Dict, baseline_path: str, keys: List[str]) -> Dict:
+    """Selisih relatif metrik tertentu terhadap run sebelumnya"""
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    deltas = {}
+    for key in keys:
+        old = _lookup(baseline, key)
+        new = _lookup(current, key)
+        if isinstance(old, (int, float)) and isinstance(new, (int, float)) and old:
+            deltas[key] = {"baseline": old, "current": new, "change": round((new - old) / old, 4)}
+    return deltas
+
+def _lookup(data: Dict, dotted: str):
+    for part in dotted.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data
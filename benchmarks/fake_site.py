@@ -0,0 +1,308 @@
+"""
+Stand-in lokal untuk halaman https://haji.kemenag.go.id/v5/?search=estimation.
+
+Struktur DOM meniru XPath yang dipakai KemenagScraper (#search-tabs, #canv,
+#captcha-input, input nomor porsi, tombol search dan panel hasil), dengan
+latency, error rate, page yang menggantung dan penolakan captcha yang bisa diatur.
+
+    python -m benchmarks.fake_site --port 8800 --latency-ms 300 --error-rate 0.02
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import argparse
+import json
+import random
+import string
+import threading
+import time
+import uuid
+
+# Karakter ambigu (0/O, 1/I/L) dihindari agar hasil OCR bisa dibandingkan dengan answer key
+CAPTCHA_ALPHABET = "".join(c for c in string.ascii_uppercase + string.digits if c not in "0O1IL")
+
+KABUPATEN = [
+    ("KAB. BANDUNG", "JAWA BARAT"),
+    ("KOTA BEKASI", "JAWA BARAT"),
+    ("KAB. SLEMAN", "DI YOGYAKARTA"),
+    ("KOTA SURABAYA", "JAWA TIMUR"),
+    ("KAB. GOWA", "SULAWESI SELATAN"),
+    ("KOTA MEDAN", "SUMATERA UTARA"),
+]
+
+BULAN = ["Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli",
+         "Agustus", "September", "Oktober", "November", "Desember"]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>Estimasi Keberangkatan - Kemenag (stand-in)</title></head>
+<body>
+<div id="search-tabs">
+  <div><a href="#">Nomor Porsi</a></div>
+  <div><a href="#">Estimasi</a></div>
+  <div>
+    <div>
+      <div>
+        <div>
+          <form onsubmit="return submitSearch(event)">
+            <input type="text" placeholder="Masukkan Nomor Porsi" id="no-porsi">
+            <canvas id="canv" width="220" height="60"></canvas>
+            <input type="text" id="captcha-input">
+            <button type="submit">Cari</button>
+          </form>
+          <p id="search-error"></p>
+        </div>
+      </div>
+    </div>
+  </div>
+</div>
+<script>
+var token = "__TOKEN__";
+function drawCaptcha(code) {
+  var canvas = document.getElementById("canv");
+  var ctx = canvas.getContext("2d");
+  ctx.fillStyle = "#ffffff";
+  ctx.fillRect(0, 0, canvas.width, canvas.height);
+  for (var i = 0; i < __NOISE__; i++) {
+    ctx.strokeStyle = "#bbbbbb";
+    ctx.beginPath();
+    ctx.moveTo(Math.random() * canvas.width, Math.random() * canvas.height);
+    ctx.lineTo(Math.random() * canvas.width, Math.random() * canvas.height);
+    ctx.stroke();
+  }
+  ctx.fillStyle = "#000000";
+  ctx.font = "bold 36px monospace";
+  ctx.fillText(code, 20, 42);
+}
+function submitSearch(event) {
+  event.preventDefault();
+  var body = JSON.stringify({
+    token: token,
+    captcha: document.getElementById("captcha-input").value,
+    no_porsi: document.getElementById("no-porsi").value
+  });
+  fetch("/api/search", {method: "POST", headers: {"Content-Type": "application/json"}, body: body})
+    .then(function (response) { return response.json(); })
+    .then(function (data) {
+      if (!data.ok) {
+        document.getElementById("search-error").textContent = data.message;
+        drawCaptcha(data.captcha);
+        return;
+      }
+      var r = data.result;
+      var panel = document.createElement("div");
+      panel.innerHTML =
+        "<div><p>" + r.nama + "</p><p>" + r.kabupaten + "</p></div>" +
+        "<div><p>" + r.provinsi + "</p><p>" + r.kuota + "</p></div>" +
+        "<div><p>" + r.status_bayar + "</p>" + r.estimasi + "<p>" + r.waktu + "</p></div>";
+      document.querySelector("#search-tabs > div:nth-child(3) > div").appendChild(panel);
+    });
+  return false;
+}
+drawCaptcha("__CAPTCHA__");
+</script>
+</body>
+</html>
+"""
+
+ERROR_PAGE = """<!DOCTYPE html>
+<html><head><title>503 Service Unavailable</title></head>
+<body><h1>503 Service Unavailable</h1></body></html>
+"""
+
+class FakeSiteState:
+    """Konfigurasi, answer key captcha dan counter request"""
+
+    def __init__(self, latency_ms: int = 0, jitter_ms: int = 0, error_rate: float = 0.0,
+                 reject_rate: float = 0.0, search_latency_ms: int = 0, captcha_noise: int = 0,
+                 hang_rate: float = 0.0, hang_ms: int = 60000):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.reject_rate = reject_rate
+        self.search_latency_ms = search_latency_ms
+        self.captcha_noise = captcha_noise
+        self.hang_rate = hang_rate
+        self.hang_ms = hang_ms
+        self.answers: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.counters = {
+            "pages": 0,
+            "errors": 0,
+            "hangs": 0,
+            "searches": 0,
+            "captcha_wrong": 0,
+            "captcha_rejected": 0,
+            "results": 0,
+        }
+
+    def count(self, name: str):
+        with self.lock:
+            self.counters[name] += 1
+
+    def new_captcha(self, token: str) -> str:
+        code = "".join(random.choice(CAPTCHA_ALPHABET) for _ in range(5))
+        with self.lock:
+            self.answers[token] = code
+        return code
+
+    def delay(self, base_ms: int):
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        wait = max(0.0, (base_ms + jitter) / 1000)
+        if wait:
+            time.sleep(wait)
+
+def build_result(no_porsi: str) -> Dict:
+    """Data deterministik per no_porsi supaya hasil bisa diverifikasi"""
+    rng = random.Random(no_porsi)
+    kabupaten, provinsi = rng.choice(KABUPATEN)
+    tahun_masehi = rng.randint(2027, 2060)
+    now = time.localtime()
+    return {
+        "nama": f"PEMOHON {no_porsi}",
+        "kabupaten": kabupaten,
+        "provinsi": provinsi,
+        "kuota": rng.choice(["Kuota Provinsi", "Kuota Kab/Kota", "Kuota Khusus"]),
+        "status_bayar": rng.choice(["Sudah Lunas", "Belum Lunas"]),
+        "estimasi": f"Estimasi Keberangkatan Tahun {tahun_masehi - 579} H / {tahun_masehi} M",
+        "waktu": f"{now.tm_mday} {BULAN[now.tm_mon - 1]} {now.tm_year} {time.strftime('%H:%M:%S', now)}",
+    }
+
+def make_handler(state: FakeSiteState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8"):
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_json(self, status: int, data: Dict):
+            self._send(status, json.dumps(data), "application/json")
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path == "/__stats":
+                with state.lock:
+                    self._send_json(200, dict(state.counters))
+                return
+            if parsed.path.rstrip("/") != "/v5":
+                self._send(404, "not found", "text/plain")
+                return
+
+            state.delay(state.latency_ms)
+            if random.random() < state.hang_rate:
+                # Melewati page load timeout Selenium (TimeoutException di scraper)
+                state.count("hangs")
+                time.sleep(state.hang_ms / 1000)
+            if random.random() < state.error_rate:
+                state.count("errors")
+                self._send(503, ERROR_PAGE)
+                return
+
+            state.count("pages")
+            token = uuid.uuid4().hex
+            code = state.new_captcha(token)
+            page = (PAGE_TEMPLATE
+                    .replace("__TOKEN__", token)
+                    .replace("__CAPTCHA__", code)
+                    .replace("__NOISE__", str(state.captcha_noise)))
+            self._send(200, page)
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/api/search":
+                self._send(404, "not found", "text/plain")
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            token = body.get("token", "")
+            state.count("searches")
+            state.delay(state.search_latency_ms)
+
+            with state.lock:
+                expected = state.answers.get(token)
+            submitted = (body.get("captcha") or "").strip().upper()
+
+            if expected is None or submitted != expected:
+                state.count("captcha_wrong")
+                self._send_json(200, {"ok": False, "message": "Captcha salah", "captcha": state.new_captcha(token)})
+                return
+            if random.random() < state.reject_rate:
+                state.count("captcha_rejected")
+                self._send_json(200, {"ok": False, "message": "Captcha kedaluwarsa", "captcha": state.new_captcha(token)})
+                return
+
+            state.count("results")
+            with state.lock:
+                state.answers.pop(token, None)
+            self._send_json(200, {"ok": True, "result": build_result(body.get("no_porsi", ""))})
+
+    return Handler
+
+class FakeKemenagSite:
+    """Server stand-in yang bisa dijalankan di background thread dari benchmark"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **options):
+        self.state = FakeSiteState(**options)
+        self.server = ThreadingHTTPServer((host, port), make_handler(self.state))
+        self.server.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def search_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v5/?search=estimation"
+
+    def start(self) -> "FakeKemenagSite":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def add_site_arguments(parser: argparse.ArgumentParser):
+    """Opsi stand-in site yang dipakai bersama oleh semua benchmark"""
+    parser.add_argument("--latency-ms", type=int, default=200, help="Latency page load")
+    parser.add_argument("--jitter-ms", type=int, default=50)
+    parser.add_argument("--search-latency-ms", type=int, default=300, help="Latency response search")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Peluang page load mengembalikan 503")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Peluang captcha benar tetap ditolak")
+    parser.add_argument("--captcha-noise", type=int, default=0, help="Jumlah garis noise di canvas captcha")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Peluang page load menggantung selama --hang-ms")
+    parser.add_argument("--hang-ms", type=int, default=60000)
+
+def site_options(args: argparse.Namespace) -> Dict:
+    return {
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "search_latency_ms": args.search_latency_ms,
+        "error_rate": args.error_rate,
+        "reject_rate": args.reject_rate,
+        "captcha_noise": args.captcha_noise,
+        "hang_rate": args.hang_rate,
+        "hang_ms": args.hang_ms,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in lokal untuk halaman estimasi Kemenag")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    add_site_arguments(parser)
+    args = parser.parse_args()
+
+    site = FakeKemenagSite(args.host, args.port, **site_options(args))
+    print(f"Fake Kemenag site listening on {site.search_url}")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        site.stop()
+
+if __name__ == "__main__":
+    main()
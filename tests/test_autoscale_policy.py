@@ -0,0 +1,71 @@
+import pytest
+
+from app.config import settings
+from app.services.autoscale_policy import (
+    REASON_BACKLOG,
+    REASON_IDLE,
+    REASON_MEMORY_CAP,
+    REASON_MEMORY_CEILING,
+    REASON_STEADY,
+    REASON_WAIT,
+    desired_concurrency,
+    memory_capacity,
+)
+
+@pytest.fixture(autouse=True)
+def policy_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'autoscale_memory_ceiling_mb', 6000)
+    monkeypatch.setattr(settings, 'autoscale_wait_target_seconds', 30.0)
+    monkeypatch.setattr(settings, 'autoscale_scale_up_step', 2)
+
+def decide(**overrides):
+    kwargs = dict(
+        current=4, min_concurrency=2, max_concurrency=12, busy=4, queue_depth=0,
+        wait_p95_seconds=0.0, memory_cap=100, total_rss_mb=None,
+    )
+    kwargs.update(overrides)
+    return desired_concurrency(**kwargs)
+
+@pytest.mark.parametrize("base_mb, slot_mb, expected", [
+    (1000, 500, 10),
+    (1000, 600, 8),
+    (5800, 500, 0),
+    (7000, 500, 0),
+    (1000, 0, 0),
+])
+def test_memory_capacity(base_mb, slot_mb, expected):
+    assert memory_capacity(base_mb, slot_mb) == expected
+
+def test_steady_when_demand_matches_pool():
+    assert decide() == (4, REASON_STEADY)
+
+def test_backlog_scales_to_demand():
+    assert decide(busy=4, queue_depth=3) == (7, REASON_BACKLOG)
+
+def test_backlog_is_capped_by_max_concurrency():
+    assert decide(busy=4, queue_depth=50) == (12, REASON_BACKLOG)
+
+def test_lane_wait_steps_up_beyond_backlog():
+    assert decide(busy=4, queue_depth=1, wait_p95_seconds=60.0) == (6, REASON_WAIT)
+
+def test_lane_wait_ignored_without_queued_tasks():
+    assert decide(busy=4, queue_depth=0, wait_p95_seconds=60.0) == (4, REASON_STEADY)
+
+def test_lane_wait_does_not_lower_larger_backlog():
+    assert decide(busy=4, queue_depth=6, wait_p95_seconds=60.0) == (10, REASON_BACKLOG)
+
+def test_idle_scales_down_to_min_concurrency():
+    assert decide(current=8, busy=0, queue_depth=0) == (2, REASON_IDLE)
+
+def test_memory_cap_limits_target():
+    assert decide(busy=4, queue_depth=6, memory_cap=6) == (6, REASON_MEMORY_CAP)
+
+def test_memory_cap_keeps_one_process():
+    assert decide(memory_cap=0) == (1, REASON_MEMORY_CAP)
+
+def test_memory_ceiling_sheds_one_process_below_min():
+    assert decide(current=2, busy=2, queue_depth=10, total_rss_mb=6500) == (1, REASON_MEMORY_CEILING)
+    assert decide(current=1, total_rss_mb=6500) == (1, REASON_MEMORY_CEILING)
+
+def test_memory_under_ceiling_uses_normal_policy():
+    assert decide(busy=4, queue_depth=3, total_rss_mb=5000) == (7, REASON_BACKLOG)
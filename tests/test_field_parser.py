@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.field_parser import (
+    HIJRI_OFFSET,
+    PARSED_FIELDS,
+    PAYMENT_BATAL,
+    PAYMENT_BELUM_LUNAS,
+    PAYMENT_LAINNYA,
+    PAYMENT_LUNAS,
+    PAYMENT_LUNAS_TUNDA,
+    QUOTA_KAB_KOTA,
+    QUOTA_KHUSUS,
+    QUOTA_PROVINSI,
+    normalize_name,
+    normalize_payment_status,
+    normalize_region,
+    parse_departure_year,
+    parse_quota_class,
+    parse_request_time,
+    parse_scraped_fields,
+)
+
+@pytest.mark.parametrize("text, expected", [
+    ("Estimasi Keberangkatan Tahun 1451 H / 2030 M", (2030, 1451)),
+    ("2030 M / 1451 H", (2030, 1451)),
+    ("tahun 2030m / 1451h", (2030, 1451)),
+    # Hanya salah satu penanda: yang lain dilengkapi dengan selisih kasar
+    ("Tahun 1451 H", (1451 + HIJRI_OFFSET, 1451)),
+    ("Tahun 2030 M", (2030, 2030 - HIJRI_OFFSET)),
+    # Tanpa penanda H/M: ditebak dari rentang tahun
+    ("Estimasi 2030 / 1451", (2030, 1451)),
+    ("Estimasi 1451", (1451 + HIJRI_OFFSET, 1451)),
+    ("Estimasi 2030", (2030, 2030 - HIJRI_OFFSET)),
+])
+def test_parse_departure_year(text, expected):
+    assert parse_departure_year(text) == expected
+
+@pytest.mark.parametrize("text", [None, "", "Belum ada estimasi", "Nomor 1234567890"])
+def test_parse_departure_year_without_year(text):
+    assert parse_departure_year(text) == (None, None)
+
+@pytest.mark.parametrize("text, expected", [
+    ("19 Oktober 2026 10:15:42", datetime(2026, 10, 19, 10, 15, 42)),
+    ("Senin, 19 Oktober 2026 pukul 10.15", datetime(2026, 10, 19, 10, 15)),
+    ("1 Agt 2026", datetime(2026, 8, 1)),
+    ("5 des 2025, 07:30", datetime(2025, 12, 5, 7, 30)),
+    ("19/10/2026 10:15", datetime(2026, 10, 19, 10, 15)),
+    ("19-10-2026 10.15.42", datetime(2026, 10, 19, 10, 15, 42)),
+    ("05/01/2026", datetime(2026, 1, 5)),
+])
+def test_parse_request_time(text, expected):
+    assert parse_request_time(text) == expected
+
+@pytest.mark.parametrize("text", [None, "", "tidak diketahui", "31 Februari 2026", "32/13/2026", "19 Foo 2026"])
+def test_parse_request_time_invalid(text):
+    assert parse_request_time(text) is None
+
+@pytest.mark.parametrize("text, expected", [
+    ("Kuota Provinsi", QUOTA_PROVINSI),
+    ("PROV", QUOTA_PROVINSI),
+    ("Kuota Kab/Kota", QUOTA_KAB_KOTA),
+    ("Kota", QUOTA_KAB_KOTA),
+    ("Kuota Khusus", QUOTA_KHUSUS),
+    # Khusus menang walaupun teks juga menyebut provinsi
+    ("Khusus Provinsi", QUOTA_KHUSUS),
+    ("Lainnya", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_quota_class(text, expected):
+    assert parse_quota_class(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("LUNAS", PAYMENT_LUNAS),
+    ("Lunas Tunda", PAYMENT_LUNAS_TUNDA),
+    ("BELUM LUNAS", PAYMENT_BELUM_LUNAS),
+    ("Batal (Lunas)", PAYMENT_BATAL),
+    ("Menunggu verifikasi", PAYMENT_LAINNYA),
+    ("", None),
+    (None, None),
+])
+def test_normalize_payment_status(text, expected):
+    assert normalize_payment_status(text) == expected
+
+@pytest.mark.parametrize("normalize", [normalize_name, normalize_region])
+def test_normalize_text(normalize):
+    assert normalize("  jawa   barat ") == "JAWA BARAT"
+    assert normalize("   ") is None
+    assert normalize(None) is None
+
+def test_parse_scraped_fields():
+    parsed = parse_scraped_fields({
+        'kuota_provinsi_kab_kota_khusus': 'Kuota Provinsi',
+        'status_bayar': 'LUNAS',
+        'estimasi_keberangkatan': '1451 H / 2030 M',
+        'waktu_permintaan_informasi': '19 Oktober 2026 10:15:42',
+    })
+    assert tuple(parsed) == PARSED_FIELDS
+    assert parsed == {
+        'departure_year': 2030,
+        'departure_hijri_year': 1451,
+        'requested_at': datetime(2026, 10, 19, 10, 15, 42),
+        'quota_class': QUOTA_PROVINSI,
+        'payment_status': PAYMENT_LUNAS,
+    }
+
+def test_parse_scraped_fields_partial_profile():
+    # Profile estimasi: field lain tidak di-scrape dan menjadi None
+    parsed = parse_scraped_fields({'estimasi_keberangkatan': '2031 M'})
+    assert parsed['departure_year'] == 2031
+    assert parsed['requested_at'] is None
+    assert parsed['quota_class'] is None
+    assert parsed['payment_status'] is None
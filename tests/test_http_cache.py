@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from starlette.requests import Request
+
+from app import http_cache
+from app.http_cache import (
+    SuccessRecordCache,
+    http_date,
+    is_not_modified,
+    make_etag,
+    record_cache_control,
+)
+
+ETAG = make_etag("record-1", "SUCCESS", "2026-10-19T10:15:42")
+MODIFIED = datetime(2026, 10, 19, 10, 15, 42, 500000)
+
+def make_request(**headers) -> Request:
+    raw = [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()]
+    return Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': raw})
+
+def test_make_etag_is_quoted_and_stable():
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+    assert ETAG == make_etag("record-1", "SUCCESS", "2026-10-19T10:15:42")
+    assert ETAG != make_etag("record-1", "SUCCESS", "2026-10-19T10:15:43")
+
+def test_http_date_treats_naive_as_utc():
+    assert http_date(MODIFIED) == "Mon, 19 Oct 2026 10:15:42 GMT"
+    jakarta = timezone(timedelta(hours=7))
+    assert http_date(datetime(2026, 10, 19, 17, 15, 42, tzinfo=jakarta)) == "Mon, 19 Oct 2026 10:15:42 GMT"
+
+def test_no_validators_is_modified():
+    assert is_not_modified(make_request(), ETAG, MODIFIED) is False
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (ETAG, True),
+    (f"W/{ETAG}", True),
+    (f'"other", {ETAG}', True),
+    ("*", True),
+    ('"other"', False),
+    ("", False),
+])
+def test_if_none_match(if_none_match, expected):
+    assert is_not_modified(make_request(if_none_match=if_none_match), ETAG, MODIFIED) is expected
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    request = make_request(if_none_match='"other"', if_modified_since="Tue, 20 Oct 2026 00:00:00 GMT")
+    assert is_not_modified(request, ETAG, MODIFIED) is False
+
+@pytest.mark.parametrize("if_modified_since, expected", [
+    # Detik yang sama dengan Last-Modified (mikrodetik diabaikan)
+    ("Mon, 19 Oct 2026 10:15:42 GMT", True),
+    ("Tue, 20 Oct 2026 00:00:00 GMT", True),
+    ("Mon, 19 Oct 2026 10:15:41 GMT", False),
+    ("bukan tanggal", False),
+])
+def test_if_modified_since(if_modified_since, expected):
+    assert is_not_modified(make_request(if_modified_since=if_modified_since), ETAG, MODIFIED) is expected
+
+def test_if_modified_since_without_last_modified():
+    request = make_request(if_modified_since="Tue, 20 Oct 2026 00:00:00 GMT")
+    assert is_not_modified(request, ETAG, None) is False
+
+@pytest.mark.parametrize("status, expected", [
+    ("SUCCESS", "public, max-age=60"),
+    ("FAILURE", "no-cache"),
+    ("PENDING", "no-cache"),
+    ("PROGRESS", "no-cache"),
+])
+def test_record_cache_control(monkeypatch, status, expected):
+    monkeypatch.setattr(http_cache.settings, 'record_cache_max_age_seconds', 60)
+    assert record_cache_control(status) == expected
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_cache, 'time', clock)
+    return clock
+
+def test_record_cache_stores_only_success(clock):
+    cache = SuccessRecordCache(max_size=10, ttl_seconds=60)
+    cache.put({'id': 'a', 'status': 'FAILURE'}, 'a')
+    cache.put({'id': 'b', 'status': 'SUCCESS'}, 'b', 'task-b')
+    assert cache.get('a') is None
+    assert cache.get('b') == cache.get('task-b') == {'id': 'b', 'status': 'SUCCESS'}
+
+def test_record_cache_expires_after_ttl(clock):
+    cache = SuccessRecordCache(max_size=10, ttl_seconds=60)
+    cache.put({'id': 'a', 'status': 'SUCCESS'}, 'a')
+    clock.now += 59
+    assert cache.get('a') is not None
+    clock.now += 2
+    assert cache.get('a') is None
+
+def test_record_cache_evicts_least_recently_used(clock):
+    cache = SuccessRecordCache(max_size=2, ttl_seconds=60)
+    cache.put({'id': 'a', 'status': 'SUCCESS'}, 'a')
+    cache.put({'id': 'b', 'status': 'SUCCESS'}, 'b')
+    cache.get('a')
+    cache.put({'id': 'c', 'status': 'SUCCESS'}, 'c')
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+
+def test_record_cache_disabled(clock):
+    cache = SuccessRecordCache(max_size=0, ttl_seconds=60)
+    cache.put({'id': 'a', 'status': 'SUCCESS'}, 'a')
+    assert cache.get('a') is None
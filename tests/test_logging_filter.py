@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+
+from app import logging_config
+from app.logging_config import EventFilter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 600.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(logging_config, 'time', clock)
+    return clock
+
+def make_record(event=None):
+    record = logging.LogRecord('app.test', logging.INFO, __file__, 1, 'msg', None, None)
+    if event is not None:
+        record.event = event
+    return record
+
+def test_record_without_event_always_passes(clock):
+    event_filter = EventFilter({'field_scraped': 0.0}, rate_limit_per_minute=1)
+    assert all(event_filter.filter(make_record()) for _ in range(5))
+
+def test_sampling_drops_and_marks_rate(clock, monkeypatch):
+    event_filter = EventFilter({'field_scraped': 0.25}, rate_limit_per_minute=0)
+    monkeypatch.setattr(logging_config.random, 'random', lambda: 0.5)
+    assert event_filter.filter(make_record('field_scraped')) is False
+
+    monkeypatch.setattr(logging_config.random, 'random', lambda: 0.1)
+    record = make_record('field_scraped')
+    assert event_filter.filter(record) is True
+    assert record.sample_rate == 0.25
+
+def test_full_sample_rate_is_not_marked(clock):
+    event_filter = EventFilter({'field_scraped': 1.0}, rate_limit_per_minute=0)
+    record = make_record('field_scraped')
+    assert event_filter.filter(record) is True
+    assert not hasattr(record, 'sample_rate')
+
+def test_rate_limit_per_event_and_window(clock):
+    event_filter = EventFilter({}, rate_limit_per_minute=2)
+    results = [event_filter.filter(make_record('captcha_retry')) for _ in range(4)]
+    assert results == [True, True, False, False]
+    # Event lain punya kuota sendiri
+    assert event_filter.filter(make_record('standby_low_confidence')) is True
+
+    # Window berikutnya: lolos lagi dan membawa jumlah yang ditahan
+    clock.now += 60
+    record = make_record('captcha_retry')
+    assert event_filter.filter(record) is True
+    assert record.suppressed == 2
+    following = make_record('captcha_retry')
+    assert event_filter.filter(following) is True
+    assert not hasattr(following, 'suppressed')
+
+def test_rate_limit_disabled(clock):
+    event_filter = EventFilter({}, rate_limit_per_minute=0)
+    assert all(event_filter.filter(make_record('captcha_retry')) for _ in range(100))
+
+def test_sampled_out_records_do_not_use_rate_limit(clock, monkeypatch):
+    event_filter = EventFilter({'field_scraped': 0.5}, rate_limit_per_minute=1)
+    monkeypatch.setattr(logging_config.random, 'random', lambda: 0.9)
+    assert event_filter.filter(make_record('field_scraped')) is False
+    monkeypatch.setattr(logging_config.random, 'random', lambda: 0.0)
+    assert event_filter.filter(make_record('field_scraped')) is True
+    assert event_filter.filter(make_record('field_scraped')) is False
@@ -0,0 +1,72 @@
+from app.progress import ProgressReporter, result_summary
+
+class FakeTask:
+    def __init__(self):
+        self.states = []
+
+    def update_state(self, state, meta):
+        self.states.append((state, meta))
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def make_reporter(min_interval=1.0):
+    task = FakeTask()
+    clock = FakeClock()
+    return ProgressReporter(task, min_interval=min_interval, clock=clock), task, clock
+
+def test_first_update_is_written():
+    reporter, task, _ = make_reporter()
+    assert reporter.update('Memuat halaman', 10) is True
+    assert task.states == [('PROGRESS', {'status': 'Memuat halaman', 'progress': 10})]
+
+def test_updates_within_interval_are_coalesced():
+    reporter, task, clock = make_reporter()
+    reporter.update('a', 10)
+    clock.now += 0.5
+    assert reporter.update('b', 20) is False
+    clock.now += 0.4
+    assert reporter.update('c', 30) is False
+    assert [meta['progress'] for _, meta in task.states] == [10]
+    assert (reporter.writes, reporter.skipped) == (1, 2)
+
+def test_interval_is_measured_from_last_write():
+    reporter, task, clock = make_reporter()
+    reporter.update('a', 10)
+    clock.now += 0.9
+    reporter.update('b', 20)
+    clock.now += 0.1
+    assert reporter.update('c', 30) is True
+    clock.now += 0.5
+    assert reporter.update('d', 40) is False
+    assert [meta['progress'] for _, meta in task.states] == [10, 30]
+
+def test_force_bypasses_throttle():
+    reporter, task, clock = make_reporter()
+    reporter.update('a', 10)
+    assert reporter.update('selesai', 100, force=True) is True
+    assert [meta['progress'] for _, meta in task.states] == [10, 100]
+
+def test_zero_interval_writes_everything():
+    reporter, task, _ = make_reporter(min_interval=0)
+    for progress in (10, 20, 30):
+        assert reporter.update('x', progress) is True
+    assert reporter.writes == 3
+
+def test_result_summary_references_record():
+    assert result_summary('rec-1', '1234567890', 3, 'ab/cd.webp') == {
+        'status': 'SUCCESS',
+        'record_id': 'rec-1',
+        'no_porsi': '1234567890',
+        'attempts_used': 3,
+        'filename': 'ab/cd.webp',
+    }
+
+def test_result_summary_without_screenshot():
+    summary = result_summary(None, '1234567890', 1)
+    assert 'filename' not in summary
+    assert summary['record_id'] is None